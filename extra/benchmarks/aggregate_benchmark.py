@@ -0,0 +1,84 @@
+"""
+Description: Measures the point by point statistics of every cycle of a synthetic scan (RgaScan.aggregate)
+    against np.mean/np.std/np.quantile over the fully loaded spectra: time, peak memory in a fresh
+    interpreter, and the largest relative error of the estimated quantiles.
+
+Usage:
+    python aggregate_benchmark.py [number_of_cycles ...] [--points-per-amu N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SOURCE_DIR = os.path.join(REPO_DIR, "rga_compare")
+sys.path.insert(0, SOURCE_DIR)
+
+import numpy as np  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+QUANTILES = (0.05, 0.5, 0.95)
+
+# Runs one way of aggregating in a fresh interpreter, prints its time and the growth of the peak RSS (Linux only)
+MEASURE_SCRIPT = """
+import sys, time
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+from rgaScanClass import RgaScan
+
+def status(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith(field))
+
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+baseline = status("VmRSS:")
+start = time.perf_counter()
+scan = RgaScan(sys.argv[2], lazy=True)
+if sys.argv[3] == "chunked":
+    scan.aggregate(quantiles=(0.05, 0.5, 0.95))
+else:
+    spectra = np.asarray(scan.spectra, dtype=np.float64)
+    spectra.mean(axis=0), spectra.std(axis=0), spectra.min(axis=0), spectra.max(axis=0)
+    np.quantile(spectra, (0.05, 0.5, 0.95), axis=0)
+print(time.perf_counter() - start, status("VmHWM:") - baseline)
+"""
+
+
+def measure(file_path: str, mode: str) -> tuple[float, float]:
+    if not os.path.exists("/proc/self/clear_refs"):
+        return float("nan"), float("nan")
+    result = subprocess.run([sys.executable, "-c", MEASURE_SCRIPT, SOURCE_DIR, file_path, mode], capture_output=True, text=True, check=True)
+    elapsed, peak = result.stdout.split()
+    return float(elapsed), float(peak)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cycle_counts", type=int, nargs="*", default=[1000, 10000])
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'cycles':>7} {'points':>7} {'naive':>9} {'naive mem':>10} {'chunked':>9} {'chunked mem':>12} {'quantile error':>15}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cycle_count in args.cycle_counts:
+            file_path = os.path.join(temp_dir, f"synthetic_{cycle_count}.rgadata")
+            write_synthetic_rgadata(file_path, cycle_count, points_per_amu=args.points_per_amu)
+
+            naive_time, naive_memory = measure(file_path, "naive")
+            chunked_time, chunked_memory = measure(file_path, "chunked")
+
+            # Relative error of the quantiles against the exact ones
+            scan = RgaScan(file_path)
+            start = time.perf_counter()
+            aggregate = scan.aggregate(quantiles=QUANTILES)
+            chunked_time = chunked_time if np.isfinite(chunked_time) else time.perf_counter() - start
+            exact = np.quantile(np.asarray(scan.spectra, dtype=np.float64), QUANTILES, axis=0)
+            error = max(float(np.max(np.abs(aggregate.quantiles[quantile] - exact[i]) / np.abs(exact[i]))) for i, quantile in enumerate(QUANTILES))
+
+            print(f"{cycle_count:>7} {scan.spectra.shape[1]:>7} {naive_time:>7.2f} s {naive_memory / 1e6:>7.0f} MB {chunked_time:>7.2f} s {chunked_memory / 1e6:>9.0f} MB {error * 100:>13.2f} %")
@@ -0,0 +1,236 @@
+"""
+Description: Reproducible benchmark suite on synthetic .rgadata files (see synthetic_rgadata.py) of growing
+    size: decode time and throughput (eager and lazy), peak RSS of a decode, replot latency, hover latency
+    and multi-file load throughput through RgaScanLoader. Every run is appended as one JSON line to a results
+    file along with the commit it ran on, and compared with the latest run of another commit, so regressions
+    can be tracked from commit to commit.
+
+Usage:
+    python benchmark_suite.py [--cycles 100 1000 10000] [--files 20] [--scans 10] [--repeat 5] [--output results.jsonl] [--no-record]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SOURCE_DIR = os.path.join(REPO_DIR, "rga_compare")
+sys.path.insert(0, SOURCE_DIR)
+
+import numpy as np  # noqa: E402
+import pyqtgraph as pg  # noqa: E402
+from PySide6 import __version__ as pyside_version  # noqa: E402
+from PySide6.QtCore import QPointF  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+from rgaPlotClass import RGAPlot  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from rgaScanLoaderClass import RgaScanLoader  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+HOVER_MOVES = 200
+
+# Decodes a file in a fresh interpreter, the peak RSS is reset after the imports where the platform allows it (Linux),
+# so it is the decode's alone on top of the interpreter's current RSS
+PEAK_RSS_SCRIPT = """
+import resource, sys
+sys.path.insert(0, sys.argv[1])
+from rgaScanClass import RgaScan
+
+def status(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith(field))
+
+try:
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # Resets VmHWM, the peak RSS, to the current RSS
+    baseline = status("VmRSS:")
+except OSError:
+    baseline = 0
+scan = RgaScan(sys.argv[2], lazy=sys.argv[3] == "lazy")
+scan.get_cycle(-1)
+try:
+    peak = status("VmHWM:")
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+print(baseline, peak)
+"""
+
+
+def median_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def peak_rss(file_path: str, mode: str) -> tuple[float, float]:
+    """Returns the RSS of an interpreter before decoding a file and its peak RSS while decoding it (in bytes), NaN where unsupported"""
+    try:
+        import resource  # noqa: F401  Unix only
+    except ImportError:
+        return float("nan"), float("nan")
+    result = subprocess.run([sys.executable, "-c", PEAK_RSS_SCRIPT, SOURCE_DIR, file_path, mode], capture_output=True, text=True, check=True)
+    baseline, peak = result.stdout.split()
+    return float(baseline), float(peak)
+
+
+def benchmark_decode(file_path: str, repeat: int) -> dict:
+    size = os.path.getsize(file_path)
+    cycles = len(RgaScan(file_path, lazy=True).cycle_time_stamps())
+    eager = median_time(lambda: RgaScan(file_path), repeat)
+    lazy = median_time(lambda: RgaScan(file_path, lazy=True), repeat)
+    baseline, eager_peak = peak_rss(file_path, "eager")
+    _, lazy_peak = peak_rss(file_path, "lazy")
+    return {
+        "file_mb": size / 1e6,
+        "eager_s": eager,
+        "eager_mb_per_s": size / 1e6 / eager,
+        "eager_cycles_per_s": cycles / eager,
+        "lazy_s": lazy,
+        "eager_peak_rss_mb": (eager_peak - baseline) / 1e6,
+        "lazy_peak_rss_mb": (lazy_peak - baseline) / 1e6,
+    }
+
+
+def benchmark_plot(app: QApplication, file_path: str, number_of_scans: int, repeat: int) -> dict:
+    """Replot latency (every curve recomputed and rendered) and hover latency with the same file plotted many times"""
+    plot = RGAPlot()
+    plot.resize(1600, 900)
+    for i in range(number_of_scans):
+        scan = RgaScan(file_path, lazy=True)
+        scan.colour = pg.intColor(i, number_of_scans).name()
+        plot.add_plot(scan)
+    plot.show()
+    app.processEvents()
+
+    def replot():
+        plot.replot()
+        plot.grab()  # Renders the plot, repaint() is a no-op offscreen
+
+    replot_time = median_time(replot, repeat)
+
+    view_box = plot.getPlotItem().getViewBox()
+    positions = [view_box.mapViewToScene(QPointF(mass, plot.y_lim_upper / 2)) for mass in np.linspace(plot.x_lim_lower, plot.x_lim_upper, HOVER_MOVES)]
+
+    def hover():
+        for position in positions:
+            plot.update_hover((position,))
+
+    hover_time = median_time(hover, repeat) / len(positions)
+    plot.hide()
+    plot.deleteLater()
+    return {"replot_s": replot_time, "hover_s": hover_time}
+
+
+def benchmark_load(app: QApplication, file_paths: list[str], lazy: bool) -> dict:
+    """Multi-file load throughput of RgaScanLoader, without the scan cache"""
+    loader = RgaScanLoader(lazy=lazy)
+    loaded = []
+    loader.scan_loaded.connect(loaded.append)
+    start = time.perf_counter()
+    loader.load(file_paths)
+    while loader.is_loading():
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(file_path) for file_path in file_paths)
+    return {"files_per_s": len(loaded) / elapsed, "mb_per_s": size / 1e6 / elapsed}
+
+
+def git_state() -> tuple[str, bool]:
+    """Returns the current commit and whether the working tree has changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def previous_run(results_path: str, commit: str) -> dict | None:
+    """Returns the latest recorded run of another commit, if any"""
+    if not os.path.exists(results_path):
+        return None
+    previous = None
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                run = json.loads(line)
+                if run["commit"] != commit:
+                    previous = run
+    return previous
+
+
+def print_results(metrics: dict, previous: dict | None):
+    header = f"{'metric':<48} {'value':>14}"
+    if previous is not None:
+        header += f" {previous['commit'][:10]:>14} {'change':>8}"
+    print(header)
+    for name, value in metrics.items():
+        line = f"{name:<48} {value:>14.6g}"
+        if previous is not None and name in previous["metrics"]:
+            old_value = previous["metrics"][name]
+            change = (value - old_value) / old_value * 100 if old_value else float("nan")
+            line += f" {old_value:>14.6g} {change:>+7.1f}%"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cycles", type=int, nargs="+", default=[100, 1000, 10000], help="Sizes of the sweep, in cycles per file")
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    parser.add_argument("--files", type=int, default=20, help="Files loaded at once by the load throughput benchmark")
+    parser.add_argument("--scans", type=int, default=10, help="Scans plotted by the replot and hover benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="JSON lines file the run is appended to")
+    parser.add_argument("--no-record", action="store_true", help="Don't append the run to the results file")
+    args = parser.parse_args()
+
+    app = QApplication([])
+    metrics = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cycles in args.cycles:
+            file_path = os.path.join(temp_dir, f"synthetic-{cycles}.rgadata")
+            write_synthetic_rgadata(file_path, cycles, points_per_amu=args.points_per_amu, gases=[18, 28, 32])
+
+            results = {f"decode.{name}": value for name, value in benchmark_decode(file_path, args.repeat).items()}
+            results.update({f"plot.{name}": value for name, value in benchmark_plot(app, file_path, args.scans, args.repeat).items()})
+
+            file_paths = [file_path] * args.files
+            results.update({f"load_eager.{name}": value for name, value in benchmark_load(app, file_paths, lazy=False).items()})
+            results.update({f"load_lazy.{name}": value for name, value in benchmark_load(app, file_paths, lazy=True).items()})
+            metrics.update({f"{name}[cycles={cycles}]": value for name, value in results.items()})
+
+    commit, dirty = git_state()
+    run = {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pyside6": pyside_version,
+            "pyqtgraph": pg.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "parameters": vars(args),
+        "metrics": metrics,
+    }
+
+    print_results(metrics, previous_run(args.output, commit))
+    if not args.no_record:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"\nRecorded in {args.output}")
@@ -0,0 +1,44 @@
+"""
+Description: Compares opening synthetic .rgadata files by parsing them with RgaScan
+    against a cold (decode + store) and a warm (memory-mapped) load from RgaScanCache.
+
+Usage:
+    python cache_benchmark.py [number_of_cycles ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+from rgaScanClass import RgaScan  # noqa: E402
+from rgaScanCacheClass import RgaScanCache  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    cycle_counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+
+    print(f"{'cycles':>8} {'size':>11} {'parse':>12} {'cold cache':>12} {'warm cache':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = RgaScanCache(os.path.join(temp_dir, "cache"))
+        for cycles in cycle_counts:
+            file_path = os.path.join(temp_dir, f"synthetic-{cycles}-cycles.rgadata")
+            write_synthetic_rgadata(file_path, cycles, gases=[18, 28, 32])
+            size_mb = os.path.getsize(file_path) / 1e6
+            parse_time = timed(RgaScan, file_path)
+            cold_time = timed(cache.load, file_path)
+            warm_time = timed(cache.load, file_path)
+            print(f"{cycles:>8} {size_mb:>8.1f} MB {parse_time * 1e3:>9.2f} ms {cold_time * 1e3:>9.2f} ms {warm_time * 1e3:>9.2f} ms")
@@ -0,0 +1,96 @@
+"""
+Description: Compares reading a synthetic scan from its .rgadata file (lazy, memory-mapped) and from its
+    chunked columnar export (see rgaChunkedScanFileClass): file size, export time, and the time and bytes
+    read from disk to get one mass over every cycle, the total pressure and the last cycle. The page cache
+    of the file is dropped before every read (posix_fadvise) and every read runs in a fresh interpreter,
+    so the numbers are those of a first read, e.g. over a network share.
+
+Usage:
+    python chunked_benchmark.py [number_of_cycles ...] [--points-per-amu N] [--codec lz4|zlib|none]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SOURCE_DIR = os.path.join(REPO_DIR, "rga_compare")
+sys.path.insert(0, SOURCE_DIR)
+
+from rgaScanClass import RgaScan  # noqa: E402
+from rgaChunkedScanFileClass import read_chunked_scan, write_chunked_scan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+ACCESSES = ("mass", "total_pressure", "last_cycle")
+
+# Opens a scan in a fresh interpreter and reads one thing from it, prints the time and the bytes read from disk (Linux only)
+MEASURE_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from rgaScanClass import RgaScan
+from rgaChunkedScanFileClass import is_chunked_scan, read_chunked_scan
+
+def read_bytes():
+    try:
+        with open("/proc/self/io") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("read_bytes:"))
+    except OSError:
+        return -1
+
+before = read_bytes()
+start = time.perf_counter()
+scan = read_chunked_scan(sys.argv[2]) if is_chunked_scan(sys.argv[2]) else RgaScan(sys.argv[2], lazy=True)
+if sys.argv[3] == "mass":
+    scan.mass_trend([28])
+elif sys.argv[3] == "total_pressure":
+    scan.signal("total_pressure")
+else:
+    scan.get_cycle(-1)
+print(time.perf_counter() - start, read_bytes() - before)
+"""
+
+
+def drop_page_cache(file_path: str):
+    if hasattr(os, "posix_fadvise"):
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def measure(file_path: str, access: str) -> tuple[float, float]:
+    drop_page_cache(file_path)
+    result = subprocess.run([sys.executable, "-c", MEASURE_SCRIPT, SOURCE_DIR, file_path, access], capture_output=True, text=True, check=True)
+    elapsed, read_bytes = result.stdout.split()
+    return float(elapsed), float(read_bytes) if float(read_bytes) >= 0 else float("nan")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cycle_counts", type=int, nargs="*", default=[1000, 10000])
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    parser.add_argument("--codec", default=None)
+    args = parser.parse_args()
+
+    print(f"{'cycles':>7} {'access':>15} {'rgadata':>9} {'read':>10} {'chunked':>9} {'read':>10}")
+    with tempfile.TemporaryDirectory(dir=os.path.expanduser("~")) as temp_dir:  # Not on a tmpfs, its pages can't be dropped
+        for cycle_count in args.cycle_counts:
+            file_path = os.path.join(temp_dir, f"synthetic_{cycle_count}.rgadata")
+            chunked_path = os.path.join(temp_dir, f"synthetic_{cycle_count}.rgachunks")
+            write_synthetic_rgadata(file_path, cycle_count, points_per_amu=args.points_per_amu)
+
+            start = time.perf_counter()
+            write_chunked_scan(RgaScan(file_path, lazy=True), chunked_path, args.codec)
+            export_time = time.perf_counter() - start
+            codec = read_chunked_scan(chunked_path).columns["step0_time_stamp"].chunked_file.codec
+            print(f"{cycle_count:>7} {'size':>15} {os.path.getsize(file_path) / 1e6:>7.1f} MB {'':>10} {os.path.getsize(chunked_path) / 1e6:>7.1f} MB  ({codec}, exported in {export_time:.2f} s)")
+
+            for access in ACCESSES:
+                rgadata_time, rgadata_bytes = measure(file_path, access)
+                chunked_time, chunked_bytes = measure(chunked_path, access)
+                print(f"{cycle_count:>7} {access:>15} {rgadata_time * 1e3:>6.0f} ms {rgadata_bytes / 1e6:>7.1f} MB {chunked_time * 1e3:>6.0f} ms {chunked_bytes / 1e6:>7.1f} MB")
@@ -0,0 +1,93 @@
+"""
+Description: Measures switching the reference scan of the Compare plot among many scans with different
+    mass ranges and resolutions. The comparisons alone are timed the first time every reference is picked
+    (each cycle resampled once, then compared), once they are memoized, and when both spectra are resampled
+    again on every switch, then the full switch including the curve updates.
+
+Usage:
+    python compare_benchmark.py [number_of_scans] [--points-per-amu N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+import numpy as np  # noqa: E402
+import pyqtgraph as pg  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+from rgaComparePlotClass import RGAComparePlot  # noqa: E402
+from rgaComparison import compare_spectra  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+
+def time_per_switch(plot: RGAComparePlot, scans: list[RgaScan], mode: str) -> float:
+    """Switches the plot to every reference in turn, comparisons and curve updates"""
+    start = time.perf_counter()
+    for reference in scans:
+        plot.set_comparison(reference, mode)
+    return (time.perf_counter() - start) / len(scans)
+
+
+def time_per_comparison_switch(plot: RGAComparePlot, scans: list[RgaScan], mode: str) -> float:
+    """Only the comparisons of every reference in turn, from the memo of the plot"""
+    start = time.perf_counter()
+    for reference in scans:
+        for scan in scans:
+            if scan is not reference:
+                plot.comparison.compare(scan, plot.plotted_cycle(scan), reference, plot.plotted_cycle(reference), mode)
+    return (time.perf_counter() - start) / len(scans)
+
+
+def time_per_unmemoized_switch(plot: RGAComparePlot, scans: list[RgaScan], mode: str) -> float:
+    """Only the comparisons of every reference in turn, resampling the reference and every scan again on every switch"""
+    grid = plot.comparison.grid
+    start = time.perf_counter()
+    for reference in scans:
+        reference_values = np.interp(grid, reference.amu_axis(), reference.get_cycle(plot.plotted_cycle(reference)), left=np.nan, right=np.nan)
+        for scan in scans:
+            if scan is not reference:
+                compare_spectra(np.interp(grid, scan.amu_axis(), scan.get_cycle(plot.plotted_cycle(scan)), left=np.nan, right=np.nan), reference_values, mode)
+    return (time.perf_counter() - start) / len(scans)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("number_of_scans", type=int, nargs="?", default=30)
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scans = []
+        for i in range(args.number_of_scans):
+            # Mass ranges and resolutions vary between the scans
+            file_path = os.path.join(temp_dir, f"synthetic_{i}.rgadata")
+            write_synthetic_rgadata(file_path, 3, start_mass=1 + i % 3, stop_mass=100 + 50 * (i % 4), points_per_amu=max(args.points_per_amu // (1 + i % 2), 1), seed=i)
+            scan = RgaScan(file_path)
+            scan.colour = pg.intColor(i, args.number_of_scans).name()
+            scans.append(scan)
+
+        plot = RGAComparePlot()
+        for scan in scans:
+            plot.add_plot(scan)
+        plot.resize(1600, 900)
+        plot.show()
+        app.processEvents()
+
+        print(f"{'scans':>6} {'grid':>7} {'compare first':>14} {'memoized':>11} {'unmemoized':>11} {'with curves':>12}")
+        for mode in ("difference", "log_ratio"):
+            plot.comparison.comparisons.clear()
+            plot.comparison.resampled.clear()
+            first = time_per_comparison_switch(plot, scans, mode)
+            memoized = time_per_comparison_switch(plot, scans, mode)
+            unmemoized = time_per_unmemoized_switch(plot, scans, mode)
+            with_curves = time_per_switch(plot, scans, mode)
+            print(f"{len(scans):>6} {len(plot.comparison.grid):>7} {first * 1e3:>11.2f} ms {memoized * 1e3:>8.2f} ms {unmemoized * 1e3:>8.2f} ms {with_curves * 1e3:>9.2f} ms  {mode}")
@@ -0,0 +1,107 @@
+"""
+Description: Compares the original per-value struct.unpack decoder of .rgadata files
+    with the vectorized np.frombuffer decoder used by RgaScan.load_scan_data, on the
+    files in sample_scans/ and on synthetic large files. Both decoders are checked to
+    give the same spectra, time stamps, PvsT and auxiliary signals.
+
+Usage:
+    python decode_benchmark.py [number_of_cycles ...]
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+
+def legacy_load_scan_data(file_path: str) -> dict:
+    """The decoder RgaScan.load_scan_data used before vectorization, one struct.unpack per value"""
+    with open(file_path, "rb") as f:
+        f.read(32)
+        f_version = struct.unpack("i", f.read(4))[0]
+        f.read(1)
+        vsize = struct.unpack("I", f.read(4))[0]
+        bytes = f.read(vsize * 8)
+        metadata_list = [struct.unpack("q", bytes[8 * i : 8 * i + 8])[0] for i in range(vsize)]
+        settings_location, data_location, settings_size = metadata_list[0:3]
+        number_of_cycles = metadata_list[4]
+        step_data_sizes = metadata_list[7 : 7 + metadata_list[6]]
+
+        f.seek(settings_location)
+        json_settings = json.loads(f.read(settings_size)[4:].decode("utf-8"))
+        f.seek(data_location)
+
+        data = {name: [] for name in ("time_stamps", "spectra", "pvst", "total_pressures", "rtd_temperatures", "flange_temperatures", "analog_Vin_signals", "analog_Iin_signals", "gpio_in_signals")}
+        for cycle in range(number_of_cycles):
+            if f_version > 17:
+                for name in ("total_pressures", "rtd_temperatures", "flange_temperatures", "analog_Vin_signals", "analog_Iin_signals"):
+                    data[name].append(struct.unpack("f", f.read(4))[0])
+                data["gpio_in_signals"].append(struct.unpack("i", f.read(4))[0])
+            for step in range(len(step_data_sizes)):
+                data["time_stamps"].append(struct.unpack("q", f.read(8))[0])
+                if step == 0:
+                    vsize = struct.unpack("I", f.read(4))[0]
+                    bytes = f.read(vsize * 4)
+                    data["spectra"].append([struct.unpack("f", bytes[4 * i : 4 * i + 4])[0] for i in range(vsize)])
+                elif step == 1:
+                    n_gases = len(json_settings["cfgs"][1]["gases"])
+                    bytes = f.read(n_gases * 4)
+                    data["pvst"].append([struct.unpack("f", bytes[4 * i : 4 * i + 4])[0] for i in range(n_gases)])
+        data["spectra"] = np.asarray(data["spectra"])
+    return data
+
+
+def vectorized_load_scan_data(file_path: str) -> RgaScan:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return RgaScan(file_path)
+
+
+def check_equal(legacy: dict, scan: RgaScan):
+    for name, values in legacy.items():
+        decoded = getattr(scan, name)
+        if not np.array_equal(np.asarray(values).reshape(np.shape(decoded)), decoded):
+            raise AssertionError(f"{name} differs between decoders")
+
+
+def best_time(function, *args, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_file(file_path: str, repeat: int = 3):
+    check_equal(legacy_load_scan_data(file_path), vectorized_load_scan_data(file_path))
+    legacy_time = best_time(legacy_load_scan_data, file_path, repeat=repeat)
+    vectorized_time = best_time(vectorized_load_scan_data, file_path, repeat=repeat)
+    size_mb = os.path.getsize(file_path) / 1e6
+    print(f"{os.path.basename(file_path):<45} {size_mb:>9.2f} MB {legacy_time * 1e3:>11.2f} ms {vectorized_time * 1e3:>11.2f} ms {legacy_time / vectorized_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    cycle_counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]
+
+    print(f"{'file':<45} {'size':>12} {'legacy':>14} {'vectorized':>14} {'speedup':>10}")
+    for file_path in sorted(glob.glob(os.path.join(REPO_DIR, "sample_scans", "*.rgadata"))):
+        benchmark_file(file_path)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cycles in cycle_counts:
+            file_path = os.path.join(temp_dir, f"synthetic-{cycles}-cycles.rgadata")
+            write_synthetic_rgadata(file_path, cycles, start_mass=1, stop_mass=200, points_per_amu=10, gases=[18, 28, 32])
+            benchmark_file(file_path, repeat=1)
@@ -0,0 +1,93 @@
+"""
+Description: Measures the cost of one RGAPlot.update_hover call against the number of
+    plotted scans, compared with the previous implementation which rebuilt the AMU axis,
+    copied the cycle and searched it with np.argmin for every scan on every mouse move.
+
+Usage:
+    python hover_benchmark.py [number_of_scans ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+import numpy as np  # noqa: E402
+from PySide6.QtCore import QPointF  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+from rgaPlotClass import RGAPlot  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+MOUSE_MOVES = 200
+
+
+def legacy_update_hover(plot: RGAPlot, event):
+    """update_hover before caching: new AMU axis, cycle copy and O(n) search per scan, label rebuilt on every move"""
+    pos = event[0]
+    if plot.sceneBoundingRect().contains(pos):
+        mousePoint = plot.getPlotItem().vb.mapSceneToView(pos)
+        x = min(max(mousePoint.x(), plot.x_lim_lower), plot.x_lim_upper)
+        label_html = f"<div style='background-color: rgba(30, 30, 46, 150); padding: 5px; border: 1px solid #cdd6f4;'>"
+        label_html += f"<b style='color: #f5e0dc;'>AMU: {x:.2f}</b><br>"
+        for i, scan in enumerate(plot.scan_list):
+            cycle = scan.get_cycle(scan.number_of_cyles() - 1)
+            scan_x = scan.amu_axis()
+            index = np.argmin(np.abs(scan_x - x))
+            label_html += f"<span style='color: {scan.colour};'>Scan {i+1}: {cycle[index]:.3e}</span><br>"
+        label_html += "</div>"
+        plot.vLine.setPos(x)
+        plot.label.setHtml(label_html)
+        plot.label.setPos(x, mousePoint.y())
+
+
+def mouse_positions(plot: RGAPlot) -> list[QPointF]:
+    """Scene positions of a slow sweep over the plotted mass range, a few pixels per mouse move"""
+    view_box = plot.getPlotItem().getViewBox()
+    masses = np.linspace(plot.x_lim_lower, plot.x_lim_upper, MOUSE_MOVES)
+    return [view_box.mapViewToScene(QPointF(mass, plot.y_lim_upper / 2)) for mass in masses]
+
+
+def time_per_move(update_hover, plot: RGAPlot, positions: list[QPointF]) -> float:
+    start = time.perf_counter()
+    for position in positions:
+        update_hover((position,))
+    return (time.perf_counter() - start) / len(positions)
+
+
+if __name__ == "__main__":
+    scan_counts = [int(arg) for arg in sys.argv[1:]] or [1, 10, 50, 100]
+
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "synthetic.rgadata")
+        write_synthetic_rgadata(file_path, 10, start_mass=1, stop_mass=200, points_per_amu=10)
+
+        print(f"{'scans':>6} {'moves':>7} {'update_hover':>14} {'legacy':>12} {'speedup':>9}")
+        for scan_count in scan_counts:
+            plot = RGAPlot()
+            plot.resize(1200, 800)
+            plot.show()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(scan_count):
+                    scan = RgaScan(file_path)
+                    scan.colour = "#1f77b4"
+                    plot.add_plot(scan)
+            app.processEvents()
+
+            # Sweeps the whole mass range, then moves within a single data point where the label is reused
+            positions = mouse_positions(plot)
+            x_step = plot.getPlotItem().getViewBox().mapViewToScene(QPointF(0.01, 0)).x() - plot.getPlotItem().getViewBox().mapViewToScene(QPointF(0, 0)).x()
+            jitter = [positions[len(positions) // 2] + QPointF((i % 3) * x_step, 0) for i in range(MOUSE_MOVES)]
+            for name, moves in (("sweep", positions), ("jitter", jitter)):
+                hover_time = time_per_move(plot.update_hover, plot, moves)
+                legacy_time = time_per_move(lambda event: legacy_update_hover(plot, event), plot, moves)
+                print(f"{scan_count:>6} {name:>7} {hover_time * 1e6:>11.1f} us {legacy_time * 1e6:>9.1f} us {legacy_time / hover_time:>8.1f}x")
+            plot.hide()
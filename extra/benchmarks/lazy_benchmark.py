@@ -0,0 +1,55 @@
+"""
+Description: Measures how long it takes to open synthetic .rgadata files of growing
+    size with RgaScan, eagerly and lazily (memory-mapped), and the resident memory
+    used after reading the last cycle as RGAPlot does.
+
+Usage:
+    python lazy_benchmark.py [number_of_cycles ...]
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+# Run in a fresh interpreter per measurement so the peak RSS of one run doesn't leak into the next
+MEASURE_SCRIPT = """
+import contextlib, io, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+from rgaScanClass import RgaScan
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    scan = RgaScan(sys.argv[2], lazy=sys.argv[3] == "lazy")
+open_time = time.perf_counter() - start
+cycle = scan.get_cycle(scan.number_of_cyles() - 1)
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{open_time * 1e3:.2f} {rss_mb:.1f}")
+"""
+
+
+def measure(file_path: str, mode: str) -> tuple[float, float]:
+    output = subprocess.run([sys.executable, "-c", MEASURE_SCRIPT, os.path.join(REPO_DIR, "rga_compare"), file_path, mode], capture_output=True, text=True, check=True).stdout
+    open_ms, rss_mb = output.split()
+    return float(open_ms), float(rss_mb)
+
+
+if __name__ == "__main__":
+    cycle_counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+
+    print(f"{'cycles':>8} {'size':>11} {'eager open':>12} {'eager RSS':>11} {'lazy open':>12} {'lazy RSS':>11}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cycles in cycle_counts:
+            file_path = os.path.join(temp_dir, f"synthetic-{cycles}-cycles.rgadata")
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_synthetic_rgadata(file_path, cycles)
+            size_mb = os.path.getsize(file_path) / 1e6
+            eager_ms, eager_rss = measure(file_path, "eager")
+            lazy_ms, lazy_rss = measure(file_path, "lazy")
+            print(f"{cycles:>8} {size_mb:>8.1f} MB {eager_ms:>9.2f} ms {eager_rss:>8.1f} MB {lazy_ms:>9.2f} ms {lazy_rss:>8.1f} MB")
@@ -0,0 +1,64 @@
+"""
+Description: Measures decomposing every cycle of a scan into library species, the batched solve of
+    SpectrumLibrary.fit against fitting the cycles one at a time, on synthetic mixes of a random library.
+
+Usage:
+    python library_benchmark.py [number_of_cycles ...] [--species N] [--library-size N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+import numpy as np  # noqa: E402
+from rgaLibrary import SpectrumLibrary  # noqa: E402
+
+MAX_MASS = 200
+
+
+def random_library(size: int, seed: int = 0) -> SpectrumLibrary:
+    """A library of random cracking patterns with a handful of peaks each"""
+    rng = np.random.default_rng(seed)
+    patterns = np.zeros((size, MAX_MASS + 1), dtype=np.float32)
+    for row in patterns:
+        peaks = rng.choice(np.arange(1, MAX_MASS + 1), rng.integers(3, 10), replace=False)
+        row[peaks] = rng.random(len(peaks))
+        row /= row.max()
+    return SpectrumLibrary([f"species {i}" for i in range(size)], [""] * size, patterns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cycle_counts", type=int, nargs="*", default=[100, 1000, 10000])
+    parser.add_argument("--species", type=int, default=8, help="Species mixed into every cycle")
+    parser.add_argument("--library-size", type=int, default=500)
+    args = parser.parse_args()
+
+    library = random_library(args.library_size)
+    rng = np.random.default_rng(1)
+    species = rng.choice(len(library), args.species, replace=False)
+    nominal_masses = np.arange(1, MAX_MASS + 1)
+
+    print(f"{'cycles':>7} {'candidates':>11} {'batched':>11} {'per cycle':>12} {'speedup':>8} {'max error':>10}")
+    for cycle_count in args.cycle_counts:
+        pressures = rng.random((cycle_count, args.species)) * 1e-7
+        heights = pressures @ library.patterns[species][:, nominal_masses] + rng.normal(0, 1e-11, (cycle_count, len(nominal_masses)))
+        heights[heights < 5e-11] = np.nan  # Peaks lost in the noise aren't found
+
+        start = time.perf_counter()
+        fit = library.fit(nominal_masses, heights)
+        batched_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for cycle in range(min(cycle_count, 100)):
+            library.fit(nominal_masses, heights[cycle], species=fit.species)
+        per_cycle_time = (time.perf_counter() - start) / min(cycle_count, 100) * cycle_count
+
+        fitted = np.zeros((cycle_count, len(library)))
+        fitted[:, fit.species] = fit.pressures
+        error = np.abs(fitted[:, species] - pressures).max() / pressures.max()
+        print(f"{cycle_count:>7} {len(fit.species):>11} {batched_time * 1e3:>8.1f} ms {per_cycle_time * 1e3:>9.1f} ms {per_cycle_time / batched_time:>7.1f}x {error:>10.1e}")
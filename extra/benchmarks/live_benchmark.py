@@ -0,0 +1,66 @@
+"""
+Description: Simulates RGASoft appending cycles to a .rgadata file and compares the
+    per-update cost of RgaScan.read_new_cycles (eager and lazy) against reopening the
+    whole file, at several scan lengths.
+
+Usage:
+    python live_benchmark.py [number_of_cycles ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+UPDATES = 50  # Cycles appended one at a time at the end of the scan
+
+
+if __name__ == "__main__":
+    cycle_counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+
+    print(f"{'cycles':>8} {'eager update':>14} {'lazy update':>13} {'reopen':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cycles in cycle_counts:
+            full_path = os.path.join(temp_dir, f"synthetic-{cycles}-cycles.rgadata")
+            live_path = os.path.join(temp_dir, "live.rgadata")
+            write_synthetic_rgadata(full_path, cycles + UPDATES, gases=[18, 28, 32])
+            with contextlib.redirect_stdout(io.StringIO()):
+                layout = RgaScan(full_path, lazy=True)
+            cycle_size = layout.cycle_dtype.itemsize
+            with open(full_path, "rb") as f:
+                data = f.read()
+
+            # The live file starts with the first cycles, the remaining ones are appended one by one
+            with open(live_path, "wb") as f:
+                f.write(data[: layout.data_location + cycles * cycle_size])
+            with contextlib.redirect_stdout(io.StringIO()):
+                scans = [RgaScan(live_path), RgaScan(live_path, lazy=True)]
+
+            update_times = [0.0, 0.0]
+            reopen_time = 0.0
+            for update in range(UPDATES):
+                start = layout.data_location + (cycles + update) * cycle_size
+                with open(live_path, "ab") as f:
+                    f.write(data[start : start + cycle_size])
+
+                for i, scan in enumerate(scans):
+                    start_time = time.perf_counter()
+                    scan.read_new_cycles()
+                    scan.get_cycle(len(scan.spectra) - 1)
+                    update_times[i] += time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    RgaScan(live_path).get_cycle(-1)
+                reopen_time += time.perf_counter() - start_time
+
+            eager_time, lazy_time = (update_time / UPDATES for update_time in update_times)
+            print(f"{cycles:>8} {eager_time * 1e3:>11.3f} ms {lazy_time * 1e3:>10.3f} ms {reopen_time / UPDATES * 1e3:>9.3f} ms")
@@ -0,0 +1,57 @@
+"""
+Description: Measures building the mass table (peak detection and integration of every cycle) of a
+    synthetic scan, in full and incrementally as cycles are appended to a followed scan, and checks
+    the incremental table matches the full one.
+
+Usage:
+    python peak_benchmark.py [number_of_cycles ...] [--points-per-amu N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+import numpy as np  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+APPENDED_CYCLES = 10
+
+
+def time_mass_table(scan: RgaScan) -> float:
+    start = time.perf_counter()
+    scan.mass_table()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cycle_counts", type=int, nargs="*", default=[100, 1000])
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'cycles':>7} {'points':>7} {'full':>11} {'+' + str(APPENDED_CYCLES) + ' cycles':>12} {'matches':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for cycle_count in args.cycle_counts:
+            file_path = os.path.join(temp_dir, f"synthetic_{cycle_count}.rgadata")
+            write_synthetic_rgadata(file_path, cycle_count + APPENDED_CYCLES, points_per_amu=args.points_per_amu)
+
+            # Full table of the whole scan
+            scan = RgaScan(file_path)
+            full_time = time_mass_table(scan)
+            full = scan.mass_table()
+
+            # Table of the first cycles, then of the appended ones only, as when following a scan
+            followed = RgaScan(file_path)
+            followed.set_columns({name: values[:cycle_count] for name, values in followed.columns.items()})
+            followed.mass_table()
+            followed.set_columns(scan.columns)
+            incremental_time = time_mass_table(followed)
+
+            matches = all(np.array_equal(getattr(full, name), getattr(followed.mass_table(), name), equal_nan=True) for name in ("heights", "centroids", "integrals", "baselines"))
+            print(f"{cycle_count:>7} {scan.spectra.shape[1]:>7} {full_time * 1e3:>8.1f} ms {incremental_time * 1e3:>9.1f} ms {'yes' if matches else 'no':>8}")
@@ -0,0 +1,66 @@
+"""
+Description: Measures the overhead per call of the rgaProfiler instrumentation, on an empty function
+    (worst case) and on RGAPlot.update_axis_limits with many scans, with profiling disabled and enabled.
+
+Usage:
+    python profiler_benchmark.py [--calls N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+import pyqtgraph as pg  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+from rgaPlotClass import RGAPlot  # noqa: E402
+from rgaProfiler import PROFILER, profiled  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+
+def empty():
+    pass
+
+
+@profiled("benchmark.empty")
+def instrumented_empty():
+    pass
+
+
+def time_per_call(function, calls: int) -> float:
+    return min(timeit.repeat(function, number=calls, repeat=5)) / calls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    plot = RGAPlot()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "synthetic.rgadata")
+        write_synthetic_rgadata(file_path, 3)
+        for i in range(50):
+            scan = RgaScan(file_path)
+            scan.colour = pg.intColor(i, 50).name()
+            plot.add_plot(scan)
+
+    axis_limits = plot.update_axis_limits.__wrapped__.__get__(plot)  # Without the instrumentation
+    print(f"{'function':<28} {'plain':>10} {'disabled':>10} {'enabled':>10}")
+    for name, plain, instrumented, calls in (("empty function", empty, instrumented_empty, args.calls), ("update_axis_limits, 50 scans", axis_limits, plot.update_axis_limits, args.calls // 100)):
+        PROFILER.enabled = False
+        plain_time = time_per_call(plain, calls)
+        disabled_time = time_per_call(instrumented, calls)
+        PROFILER.enabled = True
+        enabled_time = time_per_call(instrumented, calls)
+        PROFILER.enabled = False
+        PROFILER.reset()
+        print(f"{name:<28} {plain_time * 1e6:>7.2f} us {disabled_time * 1e6:>7.2f} us {enabled_time * 1e6:>7.2f} us")
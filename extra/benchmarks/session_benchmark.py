@@ -0,0 +1,70 @@
+"""
+Description: Measures restoring a session of many synthetic .rgadata files in MainWindow: the time until
+    restore_session returns (window state applied) and until every scan is listed and plotted, with the
+    scan cache cold (first time the files are opened) and warm (files opened before).
+
+Usage:
+    python session_benchmark.py [number_of_scans] [--cycles N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+
+def time_restore(app, window_class, session_path: str) -> tuple[float, float]:
+    """Returns the time until restore_session returns and until the last scan was added (in s)"""
+    window = window_class()
+    window.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    window.restore_session(session_path)
+    returned = time.perf_counter() - start
+    while window.scan_loader.is_loading():
+        app.processEvents()
+    app.processEvents()
+    loaded = time.perf_counter() - start
+
+    window.close()
+    window.deleteLater()
+    return returned, loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("number_of_scans", type=int, nargs="?", default=50)
+    parser.add_argument("--cycles", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Cache and recent files of the run are kept apart from the user's
+        os.environ["RGA_COMPARE_CACHE_DIR"] = os.path.join(temp_dir, "cache")
+        os.environ["XDG_CONFIG_HOME"] = os.path.join(temp_dir, "config")
+
+        from PySide6.QtWidgets import QApplication  # noqa: E402
+        from gui import MainWindow  # noqa: E402
+        from rgaSessionClass import RgaSession  # noqa: E402
+
+        app = QApplication([])
+        session = RgaSession()
+        for i in range(args.number_of_scans):
+            file_path = os.path.join(temp_dir, f"synthetic_{i}.rgadata")
+            write_synthetic_rgadata(file_path, args.cycles, seed=i)
+            session.add_scan(file_path)
+        session_path = os.path.join(temp_dir, "benchmark.rgasession")
+        session.save(session_path)
+
+        print(f"{'scans':>6} {'cycles':>7} {'cache':>6} {'window ready':>13} {'all scans':>11}")
+        for cache in ("cold", "warm"):
+            returned, loaded = time_restore(app, MainWindow, session_path)
+            print(f"{args.number_of_scans:>6} {args.cycles:>7} {cache:>6} {returned * 1e3:>10.1f} ms {loaded:>9.2f} s")
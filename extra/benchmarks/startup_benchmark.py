@@ -0,0 +1,75 @@
+"""
+Description: Measures the import time of the parser, batch CLI and GUI modules (from
+    python -X importtime) and the time from interpreter start to the main window being
+    shown by main.py, each in a fresh process. Pass the rga_compare directory of another
+    checkout to compare against it, e.g. an older revision.
+
+Usage:
+    python startup_benchmark.py [rga_compare_dir ...] [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODULES = ["rgaScanClass", "cli", "gui"]
+
+# Runs main.py as is, QApplication.exec is replaced to report once the window has been shown and painted
+FIRST_WINDOW_SCRIPT = """
+import runpy, sys, time
+from PySide6.QtWidgets import QApplication
+
+def report_first_window(app):
+    app.processEvents()
+    print(time.time() - float(sys.argv[1]))
+    return 0
+
+QApplication.exec = report_first_window
+runpy.run_path("main.py", run_name="__main__")
+"""
+
+
+def import_time(source_dir: str, module: str) -> tuple[float, bool]:
+    """Returns the cumulative import time of a module (in s) and whether it imported Qt"""
+    if not os.path.exists(os.path.join(source_dir, f"{module}.py")):
+        return float("nan"), False
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=source_dir, capture_output=True, text=True)
+    cumulative = float("nan")
+    imports_qt = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        imports_qt |= name.strip() == "PySide6"
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1e6
+    return cumulative, imports_qt
+
+
+def time_to_first_window(source_dir: str) -> float:
+    """Returns the time from starting the interpreter to the main window being shown (in s)"""
+    environment = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    result = subprocess.run([sys.executable, "-c", FIRST_WINDOW_SCRIPT, str(time.time())], cwd=source_dir, env=environment, capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source_dirs", nargs="*", default=[os.path.join(REPO_DIR, "rga_compare")])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    header = "".join(f"{f'import {module}':>20}" for module in MODULES)
+    print(f"{'source':<40}{header}{'first window':>15}")
+    for source_dir in args.source_dirs:
+        cells = []
+        for module in MODULES:
+            times, imports_qt = zip(*(import_time(source_dir, module) for _ in range(args.runs)))
+            cells.append(f"{statistics.median(times) * 1e3:>9.1f} ms {'(Qt)' if imports_qt[0] else '(no Qt)':>7}")
+        first_window = statistics.median(time_to_first_window(source_dir) for _ in range(args.runs))
+        print(f"{source_dir[-40:]:<40}{''.join(f'{cell:>20}' for cell in cells)}{first_window * 1e3:>12.1f} ms")
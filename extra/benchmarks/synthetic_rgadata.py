@@ -0,0 +1,148 @@
+"""
+Description: Writes synthetic RGASoft .rgadata files following the layout read by
+    RgaScan.load_scan_data, for benchmarking with files much larger than the ones
+    in sample_scans/.
+
+Usage:
+    python synthetic_rgadata.py <out_file> [number_of_cycles] [--start-mass 1] [--stop-mass 200] [--points-per-amu 10]
+        [--version 18] [--gases 18 28 32] [--no-spectrum] [--seed 0] [--noise 1.2e-10]
+"""
+
+import argparse
+import json
+import struct
+
+import numpy as np
+
+FILE_IDENTIFIER = b"SRS_RGA_DATA_FILE\r\n\x00".ljust(32, b" ")
+BLOCK_MARKER = struct.pack("<I", 0x12345678)
+METADATA_SIZE = 100
+
+DEFAULT_PEAKS = ((2, 2e-8), (18, 1e-7), (28, 5e-8), (32, 1e-8), (44, 5e-9))  # (mass, height in Torr) of the spectrum peaks
+DEFAULT_NOISE = 1.2e-10  # Standard deviation of the baseline noise (in Torr), about a fifth of the background points are negative as in sample_scans/
+
+# Value, or (low, high) range of uniform noise, of every auxiliary signal, -1000 when RGASoft didn't measure it
+DEFAULT_AUX_SIGNALS = {
+    "total_pressure": (1e-7, 2e-7),
+    "rtd_temperature": -1000.0,
+    "flange_temperature": (22.0, 24.0),
+    "analog_Vin": -1000.0,
+    "analog_Iin": -1000.0,
+    "gpio_in": -1,
+}
+
+
+def write_synthetic_rgadata(
+    file_path: str,
+    number_of_cycles: int,
+    start_mass: int = 1,
+    stop_mass: int = 200,
+    points_per_amu: int = 10,
+    file_version: int = 18,
+    gases: list[int] = (),
+    seed: int = 0,
+    peaks: list[tuple[float, float]] = DEFAULT_PEAKS,
+    aux_signals: dict | None = None,
+    spectrum: bool = True,
+    cycle_interval_ms: int = 20_000,
+    noise: float = DEFAULT_NOISE,
+):
+    """Writes a synthetic .rgadata file with an Analog scan step and/or a PvsT step
+
+    Args:
+        file_path (str): Location of the file to write
+        number_of_cycles (int): Number of scan cycles
+        start_mass (int): Start mass of the Analog scan
+        stop_mass (int): Stop mass of the Analog scan
+        points_per_amu (int): Points per AMU of the Analog scan
+        file_version (int): File version, the auxiliary signals are only written for versions > 17
+        gases (list[int]): Masses of the PvsT gases, no PvsT step is written if empty
+        seed (int): Seed of the random signal noise
+        peaks (list[tuple[float, float]]): (mass, height) of the gaussian peaks of the spectrum, on a 1e-10 Torr background
+        aux_signals (dict): Value or (low, high) noise range of auxiliary signals, overriding DEFAULT_AUX_SIGNALS
+        spectrum (bool): Writes the Analog scan step, a PvsT only file is written if False
+        cycle_interval_ms (int): Time between the start of consecutive cycles (in ms)
+        noise (float): Standard deviation of the zero-mean noise added to every point of the spectrum (in Torr), so some intensities are negative like in real files
+    """
+    if not spectrum and not gases:
+        raise ValueError("A file needs an Analog scan step or PvsT gases")
+    rng = np.random.default_rng(seed)
+    number_of_points = (stop_mass - start_mass) * points_per_amu + 1
+    aux_signals = dict(DEFAULT_AUX_SIGNALS, **(aux_signals or {}))
+
+    cfgs = []
+    step_data_sizes = []
+    if spectrum:
+        cfgs.append({"mode": 1, "pointsPerAmu": points_per_amu, "scanRate": 5, "startMass": start_mass, "stopMass": stop_mass})
+        step_data_sizes.append(8 + 4 + 4 * number_of_points)
+    if gases:
+        cfgs.append({"mode": 3, "gases": [{"disabled": False, "mass": mass, "name": f"m{mass}", "scanRate": 5} for mass in gases]})
+        step_data_sizes.append(8 + 4 * len(gases))
+    aux_size = 24 if file_version > 17 else 0
+    single_cycle_data_size = aux_size + sum(step_data_sizes)
+
+    json_bytes = json.dumps({"cfgs": cfgs, "schedule": {"scanStartTime": "2026-01-01T00:00:00Z"}}).encode("utf-8")
+    settings_location = 32 + 4 + 1 + 4 + 8 * METADATA_SIZE + len(BLOCK_MARKER)
+    settings_size = 4 + len(json_bytes)
+    data_location = settings_location + settings_size + len(BLOCK_MARKER)
+
+    metadata = np.zeros(METADATA_SIZE, dtype="<i8")
+    metadata[:7] = [settings_location, data_location, settings_size, single_cycle_data_size * number_of_cycles, number_of_cycles, single_cycle_data_size, len(step_data_sizes)]
+    metadata[7 : 7 + len(step_data_sizes)] = step_data_sizes
+
+    # A few gaussian peaks on a flat background, shared by every cycle
+    amu = np.linspace(start_mass, stop_mass, number_of_points)
+    base_spectrum = np.full(number_of_points, 1e-10)
+    for mass, height in peaks:
+        base_spectrum += height * np.exp(-0.5 * ((amu - mass) / 0.15) ** 2)
+
+    cycle_dtype = [("time_stamp", "<i8"), ("vsize", "<u4"), ("signals", "<f4", (number_of_points,))] if spectrum else []
+    if aux_size:
+        cycle_dtype.insert(0, ("aux", [("total_pressure", "<f4"), ("rtd_temperature", "<f4"), ("flange_temperature", "<f4"), ("analog_Vin", "<f4"), ("analog_Iin", "<f4"), ("gpio_in", "<i4")]))
+    if gases:
+        cycle_dtype += [("pvst_time_stamp", "<i8"), ("pvst", "<f4", (len(gases),))]
+
+    with open(file_path, "wb") as f:
+        f.write(FILE_IDENTIFIER)
+        f.write(struct.pack("<i?I", file_version, True, METADATA_SIZE))
+        f.write(metadata.tobytes())
+        f.write(BLOCK_MARKER)
+        f.write(struct.pack("<i", len(json_bytes)))
+        f.write(json_bytes)
+        f.write(BLOCK_MARKER)
+
+        # Written in batches of cycles to keep memory bounded for very large files
+        batch_size = max(1, 1_000_000 // number_of_points)
+        for first_cycle in range(0, number_of_cycles, batch_size):
+            cycles = min(batch_size, number_of_cycles - first_cycle)
+            records = np.zeros(cycles, dtype=cycle_dtype)
+            time_stamps = (np.arange(first_cycle, first_cycle + cycles) * cycle_interval_ms) + 2_000
+            if spectrum:
+                records["time_stamp"] = time_stamps
+                records["vsize"] = number_of_points
+                records["signals"] = base_spectrum * rng.uniform(0.9, 1.1, (cycles, number_of_points))
+                if noise:
+                    records["signals"] += rng.normal(0, noise, (cycles, number_of_points))
+            if aux_size:
+                for name, value in aux_signals.items():
+                    records["aux"][name] = rng.uniform(*value, cycles) if isinstance(value, tuple) else value
+            if gases:
+                records["pvst_time_stamp"] = time_stamps + 10_000
+                records["pvst"] = rng.uniform(1e-9, 1e-7, (cycles, len(gases)))
+            f.write(records.tobytes())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out_file")
+    parser.add_argument("number_of_cycles", type=int, nargs="?", default=1000)
+    parser.add_argument("--start-mass", type=int, default=1)
+    parser.add_argument("--stop-mass", type=int, default=200)
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    parser.add_argument("--version", type=int, default=18, help="File version, auxiliary signals are written from 18 on")
+    parser.add_argument("--gases", type=int, nargs="*", default=[18, 28, 32], help="Masses of the PvsT gases, none for no PvsT step")
+    parser.add_argument("--no-spectrum", action="store_true", help="Only write the PvsT step")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=DEFAULT_NOISE, help="Standard deviation of the baseline noise (in Torr), 0 for none")
+    args = parser.parse_args()
+    write_synthetic_rgadata(args.out_file, args.number_of_cycles, args.start_mass, args.stop_mass, args.points_per_amu, args.version, args.gases, args.seed, spectrum=not args.no_spectrum, noise=args.noise)
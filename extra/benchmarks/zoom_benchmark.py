@@ -0,0 +1,95 @@
+"""
+Description: Measures the cost of zooming and panning RGAPlot with many overlaid scans, view change
+    plus repaint, compared with the previous setup where every curve held the full cycle and pyqtgraph
+    clipped and peak-downsampled it again on every view change (setClipToView + auto setDownsampling).
+
+Usage:
+    python zoom_benchmark.py [number_of_scans ...] [--points-per-amu N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_DIR, "rga_compare"))
+
+import numpy as np  # noqa: E402
+import pyqtgraph as pg  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+from rgaPlotClass import RGAPlot  # noqa: E402
+from rgaScanClass import RgaScan  # noqa: E402
+from synthetic_rgadata import write_synthetic_rgadata  # noqa: E402
+
+VIEW_CHANGES = 60
+
+
+def legacy_plot(scans: list[RgaScan]) -> RGAPlot:
+    """An RGAPlot set up like before the pyramids, full cycles handed to pyqtgraph to clip and downsample"""
+    plot = RGAPlot()
+    plot.update_curves = lambda: None  # View changes no longer feed the curves from the pyramids
+    plot.getPlotItem().setClipToView(True)
+    plot.getPlotItem().setDownsampling(mode="peak", auto=True)
+    for scan in scans:
+        plot.add_plot(scan)
+        plot.curves[scan].setData(*plot.plot_data[scan])
+    return plot
+
+
+def view_ranges(start_mass: float, stop_mass: float) -> list[tuple[float, float]]:
+    """Zooms from the full range into a few AMU around mass 28, then pans back and forth"""
+    zoom = [(28 - (28 - start_mass) * f, 28 + (stop_mass - 28) * f) for f in np.geomspace(1, 0.01, VIEW_CHANGES // 2)]
+    x_min, x_max = zoom[-1]
+    pan = [(x_min + shift, x_max + shift) for shift in 5 * np.sin(np.linspace(0, 2 * np.pi, VIEW_CHANGES - len(zoom)))]
+    return zoom + pan
+
+
+def time_per_view_change(plot: pg.PlotWidget, ranges: list[tuple[float, float]], render: bool) -> float:
+    view_box = plot.getPlotItem().getViewBox()
+    start = time.perf_counter()
+    for x_min, x_max in ranges:
+        view_box.setXRange(x_min, x_max, padding=0)
+        if render:
+            plot.grab()  # Renders the plot, repaint() is a no-op offscreen
+    return (time.perf_counter() - start) / len(ranges)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scan_counts", type=int, nargs="*", default=[1, 10, 50])
+    parser.add_argument("--points-per-amu", type=int, default=10)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "synthetic.rgadata")
+        write_synthetic_rgadata(file_path, 3, start_mass=1, stop_mass=300, points_per_amu=args.points_per_amu)
+        ranges = view_ranges(1, 300)
+
+        print(f"{'scans':>6} {'points':>9} {'render':>7} {'RGAPlot':>12} {'legacy':>12} {'speedup':>9}")
+        for scan_count in args.scan_counts:
+            scans = []
+            for i in range(scan_count):
+                scan = RgaScan(file_path)
+                scan.colour = pg.intColor(i, scan_count).name()
+                scans.append(scan)
+
+            plots = [RGAPlot(), legacy_plot(scans)]
+            for scan in scans:
+                plots[0].add_plot(scan)
+            for plot in plots:
+                plot.resize(1600, 900)
+                plot.show()
+                app.processEvents()
+
+            # View updates alone, then with every view rendered
+            points = scan_count * scans[0].spectra.shape[1]
+            for render in (False, True):
+                times = [time_per_view_change(plot, ranges, render) for plot in plots]
+                print(f"{scan_count:>6} {points:>9} {'yes' if render else 'no':>7} {times[0] * 1e3:>9.2f} ms {times[1] * 1e3:>9.2f} ms {times[1] / times[0]:>8.1f}x")
+            for plot in plots:
+                plot.hide()
@@ -0,0 +1,350 @@
+"""
+Description: Headless batch mode, summarizes every .rgadata file of a directory tree without
+    starting the GUI (only rgaScanClass is used, Qt isn't imported). Files are decoded in a
+    process pool and every summary is written out as soon as it is ready.
+
+Usage:
+    python cli.py summarize <directory> [--csv summary.csv] [--columns summary_dir] [--masses 2 18 28 32 44] [--workers N]
+    python cli.py library <jdx files or directories> --output library.npz
+    python cli.py decompose <scan.rgadata> --library library.npz --csv species.csv
+    python cli.py index <directory> [--index scan_index.sqlite] [--workers N]
+    python cli.py search [--start-mass 1] [--stop-mass 100] [--peak 18 1e-9] [--path text] [--index scan_index.sqlite]
+    python cli.py convert <.rgadata files or directories> [--output-dir converted] [--codec lz4|zlib|none]
+"""
+
+import argparse
+import contextlib
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+import numpy as np
+from rgaScanClass import RgaScan
+from rgaLibrary import SpectrumLibrary
+from rgaScanIndexClass import RgaScanIndex, find_scan_files
+from rgaChunkedScanFileClass import CHUNK_CYCLES, CHUNK_POINTS, CHUNKED_EXTENSION, CODECS, write_chunked_scan
+
+DEFAULT_MASSES = [2, 18, 28, 32, 44]
+TEXT_COLUMN_WIDTH = 256  # Characters kept of the text columns in the columnar output
+
+
+def summary_columns(masses: list[float]) -> dict[str, str]:
+    """Returns the columns of a scan summary (see summarize_scan) and their dtype in the columnar output"""
+    text = f"<U{TEXT_COLUMN_WIDTH}"
+    columns = {
+        "path": text,
+        "file_name": text,
+        "error": text,
+        "file_version": "<i8",
+        "cycles": "<i8",
+        "start_time": "<f8",
+        "duration": "<f8",
+        "start_mass": "<f8",
+        "stop_mass": "<f8",
+        "points_per_amu": "<f8",
+    }
+    for mass in masses:
+        columns[f"peak_m{mass:g}"] = "<f8"
+    for name in ("total_pressure_mean", "total_pressure_min", "total_pressure_max", "rtd_temperature_min", "rtd_temperature_max", "flange_temperature_min", "flange_temperature_max"):
+        columns[name] = "<f8"
+    return columns
+
+
+def signal_stats(scan: RgaScan, channel: str) -> tuple[float, float, float]:
+    """Returns the mean, min and max of an auxiliary signal, NaN if the scan didn't measure it"""
+    if channel not in scan.signal_channels():
+        return np.nan, np.nan, np.nan
+    _, values = scan.signal(channel)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.nan, np.nan, np.nan
+    return float(np.mean(values)), float(np.min(values)), float(np.max(values))
+
+
+def summarize_scan(scan: RgaScan, masses: list[float]) -> dict:
+    """Summarizes a scan: cycle count, duration, last cycle peaks at the given masses and auxiliary signal ranges
+
+    Args:
+        scan (RgaScan): The scan, only the last cycle and the auxiliary signals are read from a lazy scan
+        masses (list[float]): Masses of the peaks (in AMU), see RgaScan.mass_trend
+
+    Returns:
+        dict: The summary, keyed by the columns of summary_columns
+    """
+    time_stamps = scan.cycle_time_stamps()
+    start_time = scan.start_time()
+    summary = {
+        "file_version": scan.f_version,
+        "cycles": len(time_stamps),
+        "start_time": np.nan if start_time is None else start_time,
+        "duration": float(time_stamps[-1] - time_stamps[0]) / 1000 if len(time_stamps) else np.nan,
+        "start_mass": np.nan if scan.startMass is None else scan.startMass,
+        "stop_mass": np.nan if scan.stopMass is None else scan.stopMass,
+        "points_per_amu": np.nan if scan.pointsPerAmu is None else scan.pointsPerAmu,
+    }
+
+    peaks = scan.mass_trend(masses, reducer="peak", cycles=slice(-1, None))
+    for i, mass in enumerate(masses):
+        summary[f"peak_m{mass:g}"] = float(peaks[0, i]) if len(peaks) else np.nan
+
+    summary["total_pressure_mean"], summary["total_pressure_min"], summary["total_pressure_max"] = signal_stats(scan, "total_pressure")
+    _, summary["rtd_temperature_min"], summary["rtd_temperature_max"] = signal_stats(scan, "rtd_temperature")
+    _, summary["flange_temperature_min"], summary["flange_temperature_max"] = signal_stats(scan, "flange_temperature")
+    return summary
+
+
+def summarize_file(file_path: str, masses: list[float]) -> dict:
+    """Summarizes a single .rgadata file, runs in the worker processes. A file that can't be read gets a summary
+    with only its error filled in, so one bad file doesn't stop the batch
+    """
+    summary = {"path": file_path, "file_name": os.path.basename(file_path), "error": ""}
+    try:
+        scan = RgaScan(file_path, lazy=True)
+        summary.update(summarize_scan(scan, masses))
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    return summary
+
+
+class CsvSummaryWriter:
+    """Writes the summaries to a CSV file, one row at a time"""
+
+    def __init__(self, file_path: str, columns: dict[str, str]):
+        self.file = open(file_path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=list(columns), restval="")
+        self.writer.writeheader()
+
+    def write(self, index: int, summary: dict):
+        self.writer.writerow({name: "" if isinstance(value, float) and np.isnan(value) else value for name, value in summary.items()})
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarSummaryWriter:
+    """Writes the summaries to a directory holding one .npy file per column, which can be read back
+    one column at a time with np.load(..., mmap_mode="r"). The files are memory-mapped and filled in place,
+    so the summaries are never all held in memory
+
+    Args:
+        directory (str): Output directory, created if needed
+        columns (dict[str, str]): Column -> dtype, see summary_columns
+        number_of_rows (int): Number of summaries that will be written
+    """
+
+    def __init__(self, directory: str, columns: dict[str, str], number_of_rows: int):
+        os.makedirs(directory, exist_ok=True)
+        self.columns = {name: np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+", dtype=dtype, shape=(number_of_rows,)) for name, dtype in columns.items()}
+        for values in self.columns.values():
+            values[:] = np.nan if values.dtype.kind == "f" else ("" if values.dtype.kind == "U" else -1)
+
+    def write(self, index: int, summary: dict):
+        for name, value in summary.items():
+            if self.columns[name].dtype.kind == "U":
+                value = str(value)[:TEXT_COLUMN_WIDTH]
+            self.columns[name][index] = value
+
+    def close(self):
+        for values in self.columns.values():
+            values.flush()
+        self.columns = {}
+
+
+def summarize(directory: str, csv_path: str | None = None, columns_path: str | None = None, masses: list[float] = DEFAULT_MASSES, workers: int | None = None) -> tuple[int, int]:
+    """Summarizes every .rgadata file under a directory into CSV and/or columnar output
+
+    The files are spread over a pool of worker processes in small chunks, each worker only keeps the scan it's
+    summarizing, and the summaries are written as they come back, so memory stays bounded with any number of files
+
+    Args:
+        directory (str): Directory searched (recursively) for .rgadata files
+        csv_path (str): CSV file to write, if any
+        columns_path (str): Directory of the columnar output, if any
+        masses (list[float]): Masses of the last cycle peaks (in AMU)
+        workers (int): Number of worker processes, one per core if None, no pool if 1
+
+    Returns:
+        tuple[int, int]: Number of files summarized and number of files that couldn't be read
+    """
+    file_paths = find_scan_files(directory)
+    columns = summary_columns(masses)
+    workers = workers or os.cpu_count() or 1
+
+    writers = []
+    if csv_path is not None:
+        writers.append(CsvSummaryWriter(csv_path, columns))
+    if columns_path is not None:
+        writers.append(ColumnarSummaryWriter(columns_path, columns, len(file_paths)))
+
+    task = partial(summarize_file, masses=masses)
+    failed = 0
+    try:
+        with multiprocessing.Pool(workers) if workers > 1 else contextlib.nullcontext() as pool:
+            if pool is None:
+                summaries = map(task, file_paths)
+            else:
+                chunk_size = max(1, min(16, len(file_paths) // (workers * 8)))  # Small chunks keep the workers evenly loaded
+                summaries = pool.imap(task, file_paths, chunksize=chunk_size)
+
+            for index, summary in enumerate(summaries):
+                failed += bool(summary["error"])
+                for writer in writers:
+                    writer.write(index, summary)
+    finally:
+        for writer in writers:
+            writer.close()
+
+    return len(file_paths), failed
+
+
+def decompose(file_path: str, library: SpectrumLibrary, csv_path: str) -> int:
+    """Fits every cycle of a scan as a mix of library species in one batched solve (see SpectrumLibrary.fit)
+    and writes the partial pressures to a CSV file, one row per cycle
+
+    Returns:
+        int: Number of species found
+    """
+    scan = RgaScan(file_path, lazy=True)
+    mass_table = scan.mass_table()
+    if mass_table is None:
+        raise ValueError(f"{os.path.basename(file_path)} has no Analog/Histogram scan step")
+    fit = library.fit(mass_table.nominal_masses, mass_table.heights)
+
+    time_stamps = scan.cycle_time_stamps()
+    with open(csv_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["cycle", "time"] + fit.names + ["residual"])
+        for cycle, (pressures, residual) in enumerate(zip(fit.pressures, fit.residuals)):
+            writer.writerow([cycle, float(time_stamps[cycle] - time_stamps[0]) / 1000] + pressures.tolist() + [residual])
+    return len(fit.names)
+
+
+def convert(paths: list[str], output_dir: str | None = None, codec: str | None = None, chunk_cycles: int = CHUNK_CYCLES, chunk_points: int = CHUNK_POINTS) -> list[tuple[str, str]]:
+    """Exports .rgadata files to chunked columnar files (see rgaChunkedScanFileClass), one scan at a time,
+    each scan is read in blocks of cycles so files larger than memory can be converted
+
+    Args:
+        paths (list[str]): .rgadata files, or directories searched recursively for them
+        output_dir (str): Directory of the exports, next to every file if None
+        codec (str): Compression of the chunks, see write_chunked_scan
+
+    Returns:
+        list[tuple[str, str]]: Every file converted and its export
+    """
+    file_paths = []
+    for path in paths:
+        file_paths.extend(find_scan_files(path) if os.path.isdir(path) else [path])
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    converted = []
+    for file_path in file_paths:
+        file_name = os.path.splitext(os.path.basename(file_path))[0] + CHUNKED_EXTENSION
+        output_path = os.path.join(output_dir if output_dir is not None else os.path.dirname(file_path), file_name)
+        write_chunked_scan(RgaScan(file_path, lazy=True), output_path, codec, chunk_cycles, chunk_points)
+        converted.append((file_path, output_path))
+    return converted
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="rga_compare", description="Headless batch processing of RGASoft .rgadata scans")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summarize_parser = subparsers.add_parser("summarize", help="Summarize every .rgadata file under a directory")
+    summarize_parser.add_argument("directory", help="Directory searched recursively for .rgadata files")
+    summarize_parser.add_argument("--csv", dest="csv_path", help="CSV file to write")
+    summarize_parser.add_argument("--columns", dest="columns_path", help="Directory to write one .npy file per column to")
+    summarize_parser.add_argument("--masses", type=float, nargs="+", default=DEFAULT_MASSES, help="Masses of the last cycle peaks (in AMU)")
+    summarize_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: one per core)")
+
+    library_parser = subparsers.add_parser("library", help="Pack JCAMP-DX reference spectra into a library file")
+    library_parser.add_argument("paths", nargs="+", help=".jdx files, or directories holding them")
+    library_parser.add_argument("--output", "-o", required=True, help="Library file to write (.npz)")
+
+    decompose_parser = subparsers.add_parser("decompose", help="Fit every cycle of a scan as a mix of library species")
+    decompose_parser.add_argument("file_path", help=".rgadata file")
+    decompose_parser.add_argument("--library", required=True, help="Library file written by the library command")
+    decompose_parser.add_argument("--csv", dest="csv_path", required=True, help="CSV file to write")
+
+    index_parser = subparsers.add_parser("index", help="Index every .rgadata file under a directory for search, only new and modified files are read")
+    index_parser.add_argument("directory", help="Directory searched recursively for .rgadata files")
+    index_parser.add_argument("--index", dest="index_path", default=None, help="Index file (default: in the user's data directory, or RGA_COMPARE_INDEX)")
+    index_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: one per core)")
+
+    search_parser = subparsers.add_parser("search", help="List the indexed files matching every criterion given")
+    search_parser.add_argument("--index", dest="index_path", default=None, help="Index file (default: in the user's data directory, or RGA_COMPARE_INDEX)")
+    search_parser.add_argument("--start-mass", type=float, help="Start of the mass range (in AMU)")
+    search_parser.add_argument("--stop-mass", type=float, help="End of the mass range (in AMU)")
+    search_parser.add_argument("--points-per-amu", type=float)
+    search_parser.add_argument("--scan-rate", type=float)
+    search_parser.add_argument("--file-version", type=int)
+    search_parser.add_argument("--min-cycles", type=int)
+    search_parser.add_argument("--step-type", choices=["spectrum", "pvst"], help="Kind of step the scan must have")
+    search_parser.add_argument("--peak", nargs=2, type=float, action="append", metavar=("MASS", "MIN_HEIGHT"), help="Last cycle peak at a nominal mass at least this high (in Torr), can be repeated")
+    search_parser.add_argument("--path", dest="path_contains", help="Text the path must contain")
+    search_parser.add_argument("--under", dest="directory", help="Directory the files must be under")
+    search_parser.add_argument("--limit", type=int)
+
+    convert_parser = subparsers.add_parser("convert", help="Export .rgadata files to chunked columnar files, fast to read one mass or signal from")
+    convert_parser.add_argument("paths", nargs="+", help=".rgadata files, or directories searched recursively for them")
+    convert_parser.add_argument("--output-dir", "-o", default=None, help="Directory to write the exports to (default: next to every file)")
+    convert_parser.add_argument("--codec", choices=CODECS, default=None, help="Compression of the chunks (default: lz4 if installed, zlib otherwise)")
+    convert_parser.add_argument("--chunk-cycles", type=int, default=CHUNK_CYCLES, help="Cycles per chunk")
+    convert_parser.add_argument("--chunk-points", type=int, default=CHUNK_POINTS, help="Points (or PvsT gases) per chunk")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "summarize":
+        if args.csv_path is None and args.columns_path is None:
+            parser.error("summarize needs --csv and/or --columns")
+        start = time.perf_counter()
+        total, failed = summarize(args.directory, args.csv_path, args.columns_path, args.masses, args.workers)
+        print(f"Summarized {total} files ({failed} failed) in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+        return 1 if failed else 0
+
+    if args.command == "library":
+        library = SpectrumLibrary.from_jcamp_files(args.paths)
+        library.save(args.output)
+        for file_path, error in library.skipped_files:
+            print(f"Skipped {file_path}: {error}", file=sys.stderr)
+        print(f"Packed {len(library)} spectra into {args.output} ({len(library.skipped_files)} files skipped)", file=sys.stderr)
+
+    if args.command == "index":
+        start = time.perf_counter()
+        index = RgaScanIndex(args.index_path)
+        summarized, dropped, failed = index.update(args.directory, args.workers)
+        print(f"Indexed {summarized} new or modified files ({failed} failed), dropped {dropped}, {len(index)} files in {index.index_path} ({time.perf_counter() - start:.1f} s)", file=sys.stderr)
+        index.close()
+
+    if args.command == "search":
+        start = time.perf_counter()
+        index = RgaScanIndex(args.index_path)
+        min_peaks = {mass: height for mass, height in args.peak or []}
+        criteria = ("start_mass", "stop_mass", "points_per_amu", "scan_rate", "file_version", "min_cycles", "step_type", "path_contains", "directory", "limit")
+        results = index.search(min_peaks=min_peaks, **{name: getattr(args, name) for name in criteria})
+        index.close()
+        for result in results:
+            print(result["path"])
+        print(f"Found {len(results)} files in {(time.perf_counter() - start) * 1e3:.0f} ms", file=sys.stderr)
+
+    if args.command == "convert":
+        start = time.perf_counter()
+        converted = convert(args.paths, args.output_dir, args.codec, args.chunk_cycles, args.chunk_points)
+        input_size = sum(os.path.getsize(file_path) for file_path, _ in converted)
+        output_size = sum(os.path.getsize(output_path) for _, output_path in converted)
+        for _, output_path in converted:
+            print(output_path)
+        print(f"Converted {len(converted)} files, {input_size / 1e6:.1f} MB to {output_size / 1e6:.1f} MB, in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    if args.command == "decompose":
+        start = time.perf_counter()
+        number_of_species = decompose(args.file_path, SpectrumLibrary.load(args.library), args.csv_path)
+        print(f"Fitted {number_of_species} species in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,19 +19,84 @@ from PySide6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QMenuBar,
+    QProgressDialog,
+    QMessageBox,
+    QTabWidget,
+    QComboBox,
+    QLineEdit,
+    QDockWidget,
+    QDialog,
 )
-from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QIcon, QColor, QPixmap
+from PySide6.QtCore import Qt, QSize, QSettings
+from PySide6.QtGui import QIcon, QColor, QPixmap, QKeySequence
 from rgaPlotClass import RGAPlot
-from rgaScanClass import RgaScanList, RgaScan
+from rgaPeakTableClass import RGAPeakTable
+from rgaSpeciesTableClass import RGASpeciesTable
+from rgaScanClass import RgaScan
+from rgaScanListClass import RgaScanList
+from rgaScanLoaderClass import RgaScanLoader
+from rgaFolderBrowserClass import RgaFolderBrowser, BROWSE_ORDERS
+from rgaScanCacheClass import RgaScanCache
+from rgaScanFollowerClass import RgaScanFollower
+from rgaSessionClass import RgaSession, SESSION_EXTENSION
+from rgaProfiler import PROFILER
+from rgaProfilerPanelClass import RGAProfilerPanel
 from utils import asset_path
 
+MAX_RECENT_FILES = 10
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
         self.rga_plot = RGAPlot()
-        self.rga_scan_list = RgaScanList()
+        self.peak_table = RGAPeakTable(self.rga_plot)
+        self.species_table = RGASpeciesTable(self.rga_plot)
+        # With RGA_COMPARE_SHARED_MEMORY set to 1, scans are decoded in worker processes into shared memory blocks
+        # other processes can attach to (see RgaSharedScanStore), instead of going through the on-disk cache
+        self.shared_store = None
+        if os.environ.get("RGA_COMPARE_SHARED_MEMORY", "0") not in ("", "0"):
+            from rgaSharedScanStoreClass import RgaSharedScanStore  # Imports multiprocessing, only when used
+
+            self.shared_store = RgaSharedScanStore()
+        self.rga_scan_list = RgaScanList(self.shared_store)
+        self.hidden_scans = set()  # Scans hidden with their Hide button
+        self.scan_items = {}  # Sidebar item of every scan
+        self.hide_buttons = {}  # Hide button of every scan
+        self.log_mode = False
+
+        # The other plot modes are only built the first time their tab is opened, see on_plot_tab_changed,
+        # so they cost nothing at startup
+        self.waterfall_plot = None
+        self.selector_scans = []  # Scans listed in the waterfall and compare scan selectors, in the same order
+        self.trend_plot = None
+        self.signal_plot = None
+        self.compare_plot = None
+
+        # Parses the selected files in the background, finished scans are added in the order they were selected
+        self.scan_loader = RgaScanLoader(lazy=True, cache=RgaScanCache(), store=self.shared_store)
+        self.scan_loader.scan_loaded.connect(self.on_scan_loaded)
+        self.scan_loader.load_failed.connect(self.on_scan_load_failed)
+        self.scan_loader.progress.connect(self.on_scan_load_progress)
+        self.scan_loader.finished.connect(self.on_scan_load_finished)
+        self.load_errors = []
+        self.load_progress_dialog = None
+
+        # Colour and hidden state of the scans of a session being restored, by file path, see restore_session
+        self.restored_scan_states = {}
+        self.restored_view_range = None
+        self.settings = QSettings("RGACompare", "RGACompare")  # Holds the recent files
+
+        # Decodes the cycles appended to scans that are still being acquired, only their spectrum curve is redrawn
+        self.scan_follower = RgaScanFollower()
+        self.scan_follower.cycles_appended.connect(self.on_cycles_appended)
+
+        # Steps through the scans of a folder, decoding the neighbours of the current one ahead of time
+        self.folder_browser = RgaFolderBrowser()
+        self.folder_browser.current_changed.connect(self.on_browsed_scan_changed)
+        self.folder_browser.position_changed.connect(self.on_browse_position_changed)
+        self.folder_browser.load_failed.connect(self.on_browsed_scan_failed)
+        self.browsed_scan = None  # Scan of the folder being browsed that is listed, replaced at every step
 
         self.setWindowTitle("RGA Compare")
         self.setWindowIcon(QIcon(asset_path("resources/icons/rga_compare.ico")))
@@ -41,6 +106,7 @@ class MainWindow(QMainWindow):
 
         sidebar_layout = QVBoxLayout()
         sidebar_layout.addWidget(self.create_linear_log_buttons())
+        sidebar_layout.addWidget(self.create_browse_box())
         sidebar_layout.addWidget(self.create_scan_table())
         sidebar_layout.addWidget(file_button)
         sidebar_widget = QWidget()
@@ -55,10 +121,17 @@ class MainWindow(QMainWindow):
         self.menu_bar = self.menuBar()
         self.setMenuBar(self.menu_bar)
         file_menu = self.menu_bar.addMenu("File")
-        recent_menu = file_menu.addMenu("Recent Files")
-        recent_menu.addAction("Document 1")
-        recent_menu.addAction("Document 2")
-        recent_menu.addAction("Document 3")
+        file_menu.addAction("Open Scans...").triggered.connect(self.open_rga_scan)
+        file_menu.addAction("Search Archive...").triggered.connect(self.search_archive)
+        file_menu.addAction("Browse Folder...").triggered.connect(self.browse_folder)
+        file_menu.addAction("Open Session...").triggered.connect(self.open_session)
+        file_menu.addAction("Save Session As...").triggered.connect(self.save_session)
+        file_menu.addSeparator()
+        self.recent_menu = file_menu.addMenu("Recent Files")
+        self.recent_menu.aboutToShow.connect(self.update_recent_menu)
+        library_menu = self.menu_bar.addMenu("Library")
+        library_menu.addAction("Load Library...").triggered.connect(self.open_library)
+        self.create_profiling_menu()
 
         layout = QVBoxLayout()
         layout.addWidget(splitter)
@@ -70,34 +143,436 @@ class MainWindow(QMainWindow):
         self.rga_scan_list.scan_added.connect(self.on_scan_added)
         self.rga_scan_list.scan_removed.connect(self.on_scan_removed)
 
+    def create_profiling_menu(self):
+        """Generates the Profiling menu and the (hidden) stats panel of the instrumented sections, see rgaProfiler"""
+        self.profiler_dock = QDockWidget("Profiling", self)
+        self.profiler_dock.setWidget(RGAProfilerPanel(PROFILER))
+        self.profiler_dock.hide()
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.profiler_dock)
+
+        profiling_menu = self.menu_bar.addMenu("Profiling")
+        self.enable_profiling_action = profiling_menu.addAction("Enable Profiling")
+        self.enable_profiling_action.setCheckable(True)
+        self.enable_profiling_action.setChecked(PROFILER.enabled)
+        self.enable_profiling_action.toggled.connect(lambda checked: setattr(PROFILER, "enabled", checked))
+        stats_action = self.profiler_dock.toggleViewAction()
+        stats_action.setText("Show Stats")
+        profiling_menu.addAction(stats_action)
+        profiling_menu.addAction("Reset").triggered.connect(PROFILER.reset)
+        profiling_menu.addAction("Export Trace...").triggered.connect(self.export_trace)
+
+    def export_trace(self):
+        """Opens a file dialog to save the recorded sections as a Chrome trace, e.g. to attach to a bug report"""
+        file_path, _ = QFileDialog().getSaveFileName(self, "Export trace", "rga_compare_trace.json", "Chrome Trace (*.json)")
+        if not file_path:
+            return
+        try:
+            PROFILER.export_trace(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "RGA Compare", f"The trace could not be exported:\n\n{e}")
+
     def create_linear_log_buttons(self):
         """Generates the box for the Linear and Logarithmic radio buttons for the plot"""
 
-        lin_button = QRadioButton("Linear")
-        log_button = QRadioButton("Log")
-        lin_button.setChecked(True)
-        log_button.toggled.connect(self.rga_plot.set_axis_scale)
+        self.lin_button = QRadioButton("Linear")
+        self.log_button = QRadioButton("Log")
+        self.lin_button.setChecked(True)
+        self.log_button.toggled.connect(self.set_axis_scale)
 
         layout = QHBoxLayout()
-        layout.addWidget(lin_button)
-        layout.addWidget(log_button)
+        layout.addWidget(self.lin_button)
+        layout.addWidget(self.log_button)
 
         group_box = QGroupBox("Linear or Logarithmic")
         group_box.setLayout(layout)
 
         return group_box
 
+    def scan_plots(self) -> list:
+        """Returns the plots already built that show every scan (see on_plot_tab_changed)"""
+        return [plot for plot in (self.rga_plot, self.trend_plot, self.signal_plot, self.compare_plot) if plot is not None]
+
+    def add_scans_to_plot(self, plot):
+        """Catches a newly built plot up with the loaded scans, their visibility and the axis scale"""
+        for scan in self.rga_scan_list.scan_files:
+            plot.add_plot(scan)
+            if scan in self.hidden_scans:
+                plot.set_plot_visible(scan, False)
+        if self.log_mode:
+            plot.set_axis_scale(True)
+
+    def set_axis_scale(self, log_mode: bool):
+        self.log_mode = log_mode
+        for plot in self.scan_plots():
+            plot.set_axis_scale(log_mode)
+
+    def set_scan_visible(self, scan: RgaScan, visible: bool):
+        if visible:
+            self.hidden_scans.discard(scan)
+        else:
+            self.hidden_scans.add(scan)
+        for plot in self.scan_plots():
+            plot.set_plot_visible(scan, visible)
+        self.schedule_table_updates()
+
+    def schedule_table_updates(self):
+        """Refreshes the tables under the spectrum plot once the current changes are done"""
+        self.peak_table.schedule_update()
+        self.species_table.schedule_update()
+
     def create_RGA_plot(self, rga_plot):
-        """Generates the Plot for the RGA data (mostly here for organization)"""
+        """Generates the Plot for the RGA data (mostly here for organization), every plot mode gets its own tab"""
+
+        self.plot_tabs = QTabWidget()
+        spectrum_splitter = QSplitter(Qt.Vertical)
+        spectrum_splitter.addWidget(self.create_spectrum_view(rga_plot))
+        spectrum_tables = QTabWidget()
+        spectrum_tables.addTab(self.peak_table, "Peaks")
+        spectrum_tables.addTab(self.species_table, "Species")
+        spectrum_splitter.addWidget(spectrum_tables)
+        spectrum_splitter.setSizes([600, 150])
+        self.plot_tabs.addTab(spectrum_splitter, "Spectrum")
+        self.plot_tab_builders = {
+            self.plot_tabs.addTab(self.create_waterfall_tab(), "Waterfall"): self.build_waterfall_plot,
+            self.plot_tabs.addTab(self.create_trend_tab(), "Trends"): self.build_trend_plot,
+            self.plot_tabs.addTab(self.create_signal_tab(), "Signals"): self.build_signal_plot,
+            self.plot_tabs.addTab(self.create_compare_tab(), "Compare"): self.build_compare_plot,
+        }
+        self.plot_tabs.currentChanged.connect(self.on_plot_tab_changed)
 
         layout = QVBoxLayout()
-        layout.addWidget(rga_plot)
+        layout.addWidget(self.plot_tabs)
 
         group_box = QGroupBox("RGA Plot")
         group_box.setLayout(layout)
 
         return group_box
 
+    def on_plot_tab_changed(self, index: int):
+        build_plot = self.plot_tab_builders.pop(index, None)
+        if build_plot is not None:
+            build_plot()
+
+    def create_spectrum_view(self, rga_plot):
+        """Generates the spectrum plot with its aggregation settings: the line drawn for every scan (the last cycle,
+        or the mean or median of a range of cycles) and the envelope shaded around it
+        """
+
+        self.aggregate_line_selector = QComboBox()
+        self.aggregate_line_selector.addItem("Last cycle", None)
+        self.aggregate_line_selector.addItem("Mean", "mean")
+        self.aggregate_line_selector.addItem("Median", "median")
+        self.aggregate_line_selector.currentIndexChanged.connect(self.on_aggregation_settings_changed)
+
+        self.aggregate_envelope_selector = QComboBox()
+        self.aggregate_envelope_selector.addItem("No envelope", None)
+        self.aggregate_envelope_selector.addItem("Min/Max", "minmax")
+        self.aggregate_envelope_selector.addItem("Mean ± 1 std", "std")
+        self.aggregate_envelope_selector.addItem("Percentiles", "percentiles")
+        self.aggregate_envelope_selector.currentIndexChanged.connect(self.on_aggregation_settings_changed)
+
+        self.envelope_percentiles_edit = QLineEdit("5, 95")
+        self.envelope_percentiles_edit.setPlaceholderText("Lower, upper")
+        self.envelope_percentiles_edit.setEnabled(False)
+        self.envelope_percentiles_edit.editingFinished.connect(self.on_aggregation_settings_changed)
+
+        self.aggregate_cycles_edit = QLineEdit()
+        self.aggregate_cycles_edit.setPlaceholderText("All, e.g. 100-500 or 100-")
+        self.aggregate_cycles_edit.editingFinished.connect(self.on_aggregation_settings_changed)
+
+        settings_layout = QHBoxLayout()
+        settings_layout.addWidget(QLabel("Show:"))
+        settings_layout.addWidget(self.aggregate_line_selector)
+        settings_layout.addWidget(self.aggregate_envelope_selector)
+        settings_layout.addWidget(QLabel("Percentiles:"))
+        settings_layout.addWidget(self.envelope_percentiles_edit)
+        settings_layout.addWidget(QLabel("Cycles:"))
+        settings_layout.addWidget(self.aggregate_cycles_edit, 1)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(settings_layout)
+        layout.addWidget(rga_plot)
+
+        view = QWidget()
+        view.setLayout(layout)
+        return view
+
+    def on_aggregation_settings_changed(self):
+        """Applies the line, envelope and cycle range picked above the spectrum plot, invalid entries are reset"""
+        line = self.aggregate_line_selector.currentData()
+        envelope = self.aggregate_envelope_selector.currentData()
+        self.envelope_percentiles_edit.setEnabled(envelope == "percentiles")
+
+        try:
+            lower, upper = sorted(float(text) for text in self.envelope_percentiles_edit.text().replace(";", ",").split(","))
+            if not 0 <= lower <= upper <= 100:
+                raise ValueError
+        except ValueError:
+            lower, upper = self.rga_plot.envelope_percentiles
+        self.envelope_percentiles_edit.setText(f"{lower:g}, {upper:g}")
+
+        # Cycles are numbered from 1 in the range typed, both ends included
+        start, stop = None, None
+        text = self.aggregate_cycles_edit.text().strip()
+        try:
+            if text:
+                first, _, last = text.partition("-")
+                start = max(int(first) - 1, 0)
+                stop = int(last) if last.strip() else (None if "-" in text else start + 1)
+        except ValueError:
+            start, stop = None, None
+            self.aggregate_cycles_edit.clear()
+
+        settings = (line, envelope, (start, stop), (lower, upper))
+        if settings != (self.rga_plot.aggregate_line, self.rga_plot.aggregate_envelope, self.rga_plot.aggregate_cycles, self.rga_plot.envelope_percentiles):
+            self.rga_plot.set_aggregation(line, envelope, start, stop, (lower, upper))
+
+    def create_waterfall_tab(self):
+        """Generates the Waterfall plot mode, showing every cycle of the scan picked in the selector"""
+
+        self.waterfall_selector = QComboBox()
+        self.waterfall_selector.currentIndexChanged.connect(self.on_waterfall_scan_selected)
+
+        selector_layout = QHBoxLayout()
+        selector_layout.addWidget(QLabel("Scan:"))
+        selector_layout.addWidget(self.waterfall_selector, 1)
+
+        self.waterfall_layout = QVBoxLayout()
+        self.waterfall_layout.setContentsMargins(0, 0, 0, 0)
+        self.waterfall_layout.addLayout(selector_layout)
+
+        tab = QWidget()
+        tab.setLayout(self.waterfall_layout)
+        return tab
+
+    def build_waterfall_plot(self):
+        from rgaWaterfallPlotClass import RGAWaterfallPlot
+
+        self.waterfall_plot = RGAWaterfallPlot()
+        self.waterfall_layout.addWidget(self.waterfall_plot)
+        self.on_waterfall_scan_selected(self.waterfall_selector.currentIndex())
+
+    def on_waterfall_scan_selected(self, index: int):
+        if self.waterfall_plot is not None:
+            self.waterfall_plot.set_scan(self.selector_scans[index] if index >= 0 else None)
+
+    def create_trend_tab(self):
+        """Generates the Trends plot mode, showing the intensity of chosen masses against time for every scan"""
+
+        self.trend_masses_edit = QLineEdit()  # Filled in with the default masses in build_trend_plot
+        self.trend_masses_edit.setPlaceholderText("Masses, e.g. 2, 18, 28, 32, 44")
+        self.trend_masses_edit.editingFinished.connect(self.on_trend_settings_changed)
+
+        self.trend_reducer_selector = QComboBox()
+        self.trend_reducer_selector.addItem("Peak", "peak")
+        self.trend_reducer_selector.addItem("Integral", "integral")
+        self.trend_reducer_selector.currentIndexChanged.connect(self.on_trend_settings_changed)
+
+        settings_layout = QHBoxLayout()
+        settings_layout.addWidget(QLabel("Masses (AMU):"))
+        settings_layout.addWidget(self.trend_masses_edit, 1)
+        settings_layout.addWidget(self.trend_reducer_selector)
+
+        self.trend_layout = QVBoxLayout()
+        self.trend_layout.setContentsMargins(0, 0, 0, 0)
+        self.trend_layout.addLayout(settings_layout)
+
+        tab = QWidget()
+        tab.setLayout(self.trend_layout)
+        return tab
+
+    def build_trend_plot(self):
+        from rgaTrendPlotClass import RGATrendPlot, DEFAULT_TREND_MASSES
+
+        self.trend_masses_edit.setText(", ".join(f"{mass:g}" for mass in DEFAULT_TREND_MASSES))
+        self.trend_plot = RGATrendPlot()
+        self.trend_layout.addWidget(self.trend_plot)
+        self.on_trend_settings_changed()
+        self.add_scans_to_plot(self.trend_plot)
+
+    def on_trend_settings_changed(self):
+        """Applies the masses and reducer picked in the Trends tab, invalid masses are ignored"""
+        masses = []
+        for text in self.trend_masses_edit.text().replace(";", ",").split(","):
+            try:
+                masses.append(float(text))
+            except ValueError:
+                continue
+        reducer = self.trend_reducer_selector.currentData()
+        if self.trend_plot is not None and (masses != self.trend_plot.masses or reducer != self.trend_plot.reducer):
+            self.trend_plot.set_masses(masses, reducer=reducer)
+        self.trend_masses_edit.setText(", ".join(f"{mass:g}" for mass in masses))
+
+    def create_signal_tab(self):
+        """Generates the Signals plot mode, showing an auxiliary signal or PvsT gas against time for every scan"""
+
+        self.signal_selector = QComboBox()
+        self.signal_selector.currentIndexChanged.connect(self.on_signal_selected)
+
+        selector_layout = QHBoxLayout()
+        selector_layout.addWidget(QLabel("Signal:"))
+        selector_layout.addWidget(self.signal_selector, 1)
+
+        self.signal_layout = QVBoxLayout()
+        self.signal_layout.setContentsMargins(0, 0, 0, 0)
+        self.signal_layout.addLayout(selector_layout)
+
+        tab = QWidget()
+        tab.setLayout(self.signal_layout)
+        return tab
+
+    def build_signal_plot(self):
+        from rgaSignalPlotClass import RGASignalPlot
+
+        self.signal_plot = RGASignalPlot()
+        self.signal_layout.addWidget(self.signal_plot)
+        self.on_signal_selected(self.signal_selector.currentIndex())
+        self.add_scans_to_plot(self.signal_plot)
+
+    def update_signal_selector(self):
+        """Lists the signals recorded by any of the loaded scans, keeping the current selection if possible"""
+        channels = {}
+        for scan in self.rga_scan_list.scan_files:
+            channels.update(scan.signal_channels())
+
+        current_channel = self.signal_selector.currentData()
+        self.signal_selector.blockSignals(True)
+        self.signal_selector.clear()
+        for channel, label in channels.items():
+            self.signal_selector.addItem(label, channel)
+        index = self.signal_selector.findData(current_channel) if current_channel in channels else 0
+        self.signal_selector.setCurrentIndex(index if channels else -1)
+        self.signal_selector.blockSignals(False)
+
+        if self.signal_plot is not None and self.signal_selector.currentData() != self.signal_plot.channel:
+            self.on_signal_selected(self.signal_selector.currentIndex())
+
+    def on_signal_selected(self, index: int):
+        if self.signal_plot is None:
+            return
+        if index < 0:
+            self.signal_plot.set_channel(None)
+        else:
+            self.signal_plot.set_channel(self.signal_selector.itemData(index), self.signal_selector.itemText(index))
+
+    def create_compare_tab(self):
+        """Generates the Compare plot mode, showing every scan against the reference scan picked in the selector"""
+
+        self.compare_reference_selector = QComboBox()
+        self.compare_reference_selector.currentIndexChanged.connect(self.on_compare_settings_changed)
+
+        self.compare_mode_selector = QComboBox()  # Filled in with the comparisons in build_compare_plot
+        self.compare_mode_selector.currentIndexChanged.connect(self.on_compare_settings_changed)
+
+        selector_layout = QHBoxLayout()
+        selector_layout.addWidget(QLabel("Reference:"))
+        selector_layout.addWidget(self.compare_reference_selector, 1)
+        selector_layout.addWidget(self.compare_mode_selector)
+
+        self.compare_layout = QVBoxLayout()
+        self.compare_layout.setContentsMargins(0, 0, 0, 0)
+        self.compare_layout.addLayout(selector_layout)
+
+        tab = QWidget()
+        tab.setLayout(self.compare_layout)
+        return tab
+
+    def build_compare_plot(self):
+        from rgaComparePlotClass import RGAComparePlot
+        from rgaComparison import COMPARISON_MODES
+
+        for mode, label in COMPARISON_MODES.items():
+            self.compare_mode_selector.addItem(label, mode)
+        self.compare_plot = RGAComparePlot()
+        self.compare_layout.addWidget(self.compare_plot)
+        self.on_compare_settings_changed()
+        self.add_scans_to_plot(self.compare_plot)
+
+    def on_compare_settings_changed(self):
+        """Applies the reference scan and comparison picked in the Compare tab"""
+        if self.compare_plot is None:
+            return
+        index = self.compare_reference_selector.currentIndex()
+        reference = self.selector_scans[index] if index >= 0 else None
+        mode = self.compare_mode_selector.currentData()
+        if reference is not self.compare_plot.reference or mode != self.compare_plot.mode:
+            self.compare_plot.set_comparison(reference, mode)
+
+    def create_browse_box(self):
+        """Generates the box to step through the scans of a folder (see RgaFolderBrowser), hidden until a folder is browsed"""
+        self.browse_label = QLabel()
+        self.browse_label.setWordWrap(True)
+
+        self.previous_scan_button = QPushButton("< Previous")
+        self.previous_scan_button.setShortcut(QKeySequence("Alt+Left"))
+        self.previous_scan_button.setToolTip("Previous scan of the folder (Alt+Left)")
+        self.previous_scan_button.clicked.connect(self.folder_browser.previous)
+        self.next_scan_button = QPushButton("Next >")
+        self.next_scan_button.setShortcut(QKeySequence("Alt+Right"))
+        self.next_scan_button.setToolTip("Next scan of the folder (Alt+Right)")
+        self.next_scan_button.clicked.connect(self.folder_browser.next)
+
+        self.browse_order_box = QComboBox()
+        for order, label in BROWSE_ORDERS.items():
+            self.browse_order_box.addItem(label, order)
+        self.browse_order_box.currentIndexChanged.connect(lambda: self.folder_browser.set_order(self.browse_order_box.currentData()))
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close_browsed_folder)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(self.previous_scan_button)
+        buttons_layout.addWidget(self.next_scan_button)
+        order_layout = QHBoxLayout()
+        order_layout.addWidget(self.browse_order_box, 1)
+        order_layout.addWidget(close_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.browse_label)
+        layout.addLayout(buttons_layout)
+        layout.addLayout(order_layout)
+
+        self.browse_box = QGroupBox("Browse Folder")
+        self.browse_box.setLayout(layout)
+        self.browse_box.setVisible(False)
+        return self.browse_box
+
+    def browse_folder(self):
+        """Opens a folder dialog, then steps through the scans of the folder selected from the first one in chronological order"""
+        directory = QFileDialog.getExistingDirectory(self, "Select a folder of scans", self.settings.value("browse_directory", "", type=str))
+        if not directory:
+            return
+        self.settings.setValue("browse_directory", directory)
+        self.browse_box.setVisible(True)
+        self.folder_browser.open_folder(directory, self.browse_order_box.currentData())
+
+    def close_browsed_folder(self):
+        """Stops browsing, the scan shown stays listed"""
+        self.folder_browser.close()
+        self.browsed_scan = None
+        self.browse_box.setVisible(False)
+
+    def on_browse_position_changed(self, position: int, total: int):
+        self.previous_scan_button.setEnabled(position > 0)
+        self.next_scan_button.setEnabled(0 <= position < total - 1)
+        if total == 0:
+            self.browse_label.setText("No scans in this folder")
+            return
+        self.browse_label.setText(f"{os.path.basename(self.folder_browser.current_path())}\n{position + 1} of {total}")
+
+    def on_browsed_scan_changed(self, scan: RgaScan):
+        """Lists the current scan of the browsed folder in place of the previous one"""
+        if scan is self.browsed_scan and scan in self.rga_scan_list.scan_files:
+            return
+        if self.browsed_scan is not None and self.browsed_scan in self.rga_scan_list.scan_files:
+            self.rga_scan_list.remove_scan(self.browsed_scan)
+        self.browsed_scan = scan
+        self.rga_scan_list.add_scan(scan)
+
+    def on_browsed_scan_failed(self, file_path: str, error: str):
+        position, total = self.folder_browser.position, len(self.folder_browser.file_paths)
+        self.browse_label.setText(f"{os.path.basename(file_path)} could not be loaded: {error}\n{position + 1} of {total}")
+
     def create_scan_table(self):
 
         self.list = QListWidget()
@@ -119,6 +594,8 @@ class MainWindow(QMainWindow):
             scan_colour (str): The plot colour assigned to the scan
             scan_added (RgaScan): the RgaScan object of the newly added scan
         """
+        from rgaChunkedScanFileClass import is_chunked_scan
+
         name = QLabel(scan_name)
 
         colour_icon = QWidget()
@@ -127,16 +604,20 @@ class MainWindow(QMainWindow):
 
         remove_plot_button = QPushButton("remove")
         remove_plot_button.clicked.connect(lambda: self.rga_scan_list.remove_scan(scan_added))
-        remove_plot_button.clicked.connect(lambda: self.list.takeItem(self.list.row(list_item)))
 
         toggle_visibility_button = QPushButton("Hide")
         toggle_visibility_button.setCheckable(True)
         toggle_visibility_button.setChecked(False)
         # toggle_visibility_button.clicked.connect(lambda: list_widget.setWindowOpacity(0.5))
-        toggle_visibility_button.toggled.connect(lambda checked: 
-                                                 self.rga_plot.remove_plot(scan_added) if checked
-                                                 else self.rga_plot.add_plot(scan_added)
-                                                    )
+        toggle_visibility_button.toggled.connect(lambda checked: self.set_scan_visible(scan_added, not checked))
+        self.hide_buttons[scan_added] = toggle_visibility_button
+
+        follow_button = QPushButton("Follow")
+        follow_button.setCheckable(True)
+        follow_button.setToolTip("Keep reading the cycles RGASoft appends to the file")
+        follow_button.toggled.connect(lambda checked: self.scan_follower.follow(scan_added) if checked else self.scan_follower.unfollow(scan_added))
+        if is_chunked_scan(scan_added.file_path):
+            follow_button.setEnabled(False)  # An export, RGASoft doesn't write to it
 
         top_layout = QHBoxLayout()
         top_layout.addWidget(colour_icon)
@@ -144,6 +625,7 @@ class MainWindow(QMainWindow):
 
         bottom_layout = QHBoxLayout()
         bottom_layout.addWidget(toggle_visibility_button)
+        bottom_layout.addWidget(follow_button)
         bottom_layout.addWidget(remove_plot_button)
 
         total_layout = QVBoxLayout()
@@ -156,13 +638,194 @@ class MainWindow(QMainWindow):
         list_item.setSizeHint(list_widget.sizeHint())
         self.list.addItem(list_item)
         self.list.setItemWidget(list_item, list_widget)
+        self.scan_items[scan_added] = list_item
 
     def open_rga_scan(self):
-        """Opens a file dialog to select .rgadata scan files to plot"""
-        files, _ = QFileDialog().getOpenFileNames(self, "Select file(s) to open", "", "RGASoft Scans (*.rgadata)")
-        for file in files:
-            scan = RgaScan(file)
-            self.rga_scan_list.add_scan(scan)
+        """Opens a file dialog to select .rgadata scan files (or their chunked exports) to plot"""
+        from rgaChunkedScanFileClass import CHUNKED_EXTENSION
+
+        files, _ = QFileDialog().getOpenFileNames(self, "Select file(s) to open", "", f"Scans (*.rgadata *{CHUNKED_EXTENSION});;RGASoft Scans (*.rgadata);;Chunked Scans (*{CHUNKED_EXTENSION})")
+        if not files:
+            return
+        for file_path in files:
+            self.add_recent_file(file_path)
+        self.load_scans(files)
+
+    def search_archive(self):
+        """Opens the archive search dialog and loads the scans selected in it"""
+        from rgaScanIndexClass import RgaScanIndex
+        from rgaArchiveSearchDialogClass import RGAArchiveSearchDialog
+
+        index = RgaScanIndex()
+        dialog = None
+        try:
+            dialog = RGAArchiveSearchDialog(index, self)
+            if dialog.exec() != QDialog.Accepted:
+                return
+            files = dialog.selected_paths()
+        finally:
+            index.close()
+            if dialog is not None:
+                dialog.release()
+        if not files:
+            return
+        for file_path in files:
+            self.add_recent_file(file_path)
+        self.load_scans(files)
+
+    def load_scans(self, files: list[str]):
+        """Loads scan files in the background, they are added to the plots as they finish"""
+        if self.load_progress_dialog is None:
+            self.load_progress_dialog = QProgressDialog("Loading scans...", "Cancel", 0, len(files), self)
+            self.load_progress_dialog.setWindowTitle("RGA Compare")
+            self.load_progress_dialog.setMinimumDuration(500)  # Only shows up if loading takes a while
+            self.load_progress_dialog.canceled.connect(self.scan_loader.cancel)
+        self.scan_loader.load(files)
+
+    def open_library(self):
+        """Opens a file dialog to select the reference spectra to fit the plotted cycles with,
+        either JCAMP-DX files (e.g. downloaded from the NIST Chemistry WebBook) or a library packed with cli.py
+        """
+        from rgaLibrary import SpectrumLibrary
+
+        files, _ = QFileDialog().getOpenFileNames(self, "Select library file(s)", "", "Spectrum Libraries (*.jdx *.npz)")
+        if not files:
+            return
+
+        try:
+            if len(files) == 1 and files[0].lower().endswith(".npz"):
+                library = SpectrumLibrary.load(files[0])
+            else:
+                library = SpectrumLibrary.from_jcamp_files([file for file in files if file.lower().endswith(".jdx")])
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "RGA Compare", f"The library could not be loaded:\n\n{e}")
+            return
+        self.species_table.set_library(library)
+        if library.skipped_files:
+            skipped = "\n".join(f"{os.path.basename(file_path)}: {error}" for file_path, error in library.skipped_files)
+            QMessageBox.warning(self, "RGA Compare", f"{len(library.skipped_files)} files could not be read and were left out of the library:\n\n{skipped}")
+
+    def current_session(self) -> RgaSession:
+        """Returns the session of the scans listed, their colour and visibility and the state of the plots"""
+        view_box = self.rga_plot.getPlotItem().getViewBox()
+        view_range = None if view_box.autoRangeEnabled()[0] else [list(axis_range) for axis_range in view_box.viewRange()]
+        session = RgaSession(log_mode=self.log_mode, plot_tab=self.plot_tabs.currentIndex(), view_range=view_range)
+        for scan in self.rga_scan_list.scan_files:
+            session.add_scan(scan.file_path, scan.colour, scan in self.hidden_scans)
+        return session
+
+    def save_session(self):
+        """Opens a file dialog to save the current session"""
+        file_path, _ = QFileDialog().getSaveFileName(self, "Save session", "", f"RGA Compare Sessions (*{SESSION_EXTENSION})")
+        if not file_path:
+            return
+        if not file_path.lower().endswith(SESSION_EXTENSION):
+            file_path += SESSION_EXTENSION
+
+        try:
+            self.current_session().save(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "RGA Compare", f"The session could not be saved:\n\n{e}")
+            return
+        self.add_recent_file(file_path)
+
+    def open_session(self):
+        """Opens a file dialog to select a session to restore"""
+        file_path, _ = QFileDialog().getOpenFileName(self, "Open session", "", f"RGA Compare Sessions (*{SESSION_EXTENSION})")
+        if file_path:
+            self.restore_session(file_path)
+
+    def restore_session(self, file_path: str):
+        """Replaces the scans listed by the ones of a session. The axis scale, plot tab and view range are applied
+        straight away, the scans are then loaded in the background, the most recently modified first
+        """
+        try:
+            session = RgaSession.load(file_path)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "RGA Compare", f"The session could not be opened:\n\n{e}")
+            return
+        self.add_recent_file(file_path)
+
+        if self.scan_loader.is_loading():
+            self.scan_loader.cancel()
+        for scan in list(self.rga_scan_list.scan_files):
+            self.rga_scan_list.remove_scan(scan)
+
+        (self.log_button if session.log_mode else self.lin_button).setChecked(True)
+        self.plot_tabs.setCurrentIndex(session.plot_tab)
+        self.restored_view_range = session.view_range
+        self.apply_restored_view_range()
+
+        scans = session.scans_most_recent_first()
+        self.restored_scan_states = {os.path.abspath(scan["path"]): scan for scan in scans}
+        self.load_scans([scan["path"] for scan in scans])
+
+    def apply_restored_view_range(self):
+        if self.restored_view_range is not None:
+            x_range, y_range = self.restored_view_range
+            self.rga_plot.getPlotItem().getViewBox().setRange(xRange=x_range, yRange=y_range, padding=0)
+
+    def add_recent_file(self, file_path: str):
+        """Puts a scan or session file at the top of the recent files, kept between runs"""
+        file_path = os.path.abspath(file_path)
+        recent_files = [path for path in self.recent_files() if path != file_path]
+        self.settings.setValue("recent_files", [file_path] + recent_files[: MAX_RECENT_FILES - 1])
+
+    def recent_files(self) -> list[str]:
+        recent_files = self.settings.value("recent_files", [])
+        if isinstance(recent_files, str):  # A single value isn't stored as a list by some backends
+            recent_files = [recent_files]
+        return list(recent_files or [])
+
+    def update_recent_menu(self):
+        """Lists the recent files that still exist, sessions are restored and scans added when picked"""
+        self.recent_menu.clear()
+        recent_files = [path for path in self.recent_files() if os.path.exists(path)]
+        for file_path in recent_files:
+            action = self.recent_menu.addAction(os.path.basename(file_path))
+            action.setToolTip(file_path)
+            action.triggered.connect(lambda checked=False, file_path=file_path: self.open_recent_file(file_path))
+        if not recent_files:
+            self.recent_menu.addAction("No Recent Files").setEnabled(False)
+        self.recent_menu.addSeparator()
+        self.recent_menu.addAction("Clear Recent Files").triggered.connect(lambda: self.settings.remove("recent_files"))
+
+    def open_recent_file(self, file_path: str):
+        if file_path.lower().endswith(SESSION_EXTENSION):
+            self.restore_session(file_path)
+        else:
+            self.add_recent_file(file_path)
+            self.load_scans([file_path])
+
+    def on_scan_loaded(self, scan: RgaScan):
+        """Lists a loaded scan, with the colour it had in the session being restored if any"""
+        state = self.restored_scan_states.get(scan.file_path, {})
+        self.rga_scan_list.add_scan(scan, colour=state.get("colour"))
+
+    def on_scan_load_progress(self, done: int, total: int):
+        if self.load_progress_dialog is not None:
+            self.load_progress_dialog.setMaximum(total)
+            self.load_progress_dialog.setValue(done)
+
+    def on_scan_load_failed(self, file_path: str, error: str):
+        self.load_errors.append(f"{os.path.basename(file_path)}: {error}")
+
+    def on_scan_load_finished(self):
+        """Closes the progress dialog and reports the files that couldn't be loaded"""
+        if self.load_progress_dialog is not None:
+            self.load_progress_dialog.canceled.disconnect(self.scan_loader.cancel)
+            self.load_progress_dialog.close()
+            self.load_progress_dialog.deleteLater()
+            self.load_progress_dialog = None
+
+        # The view range of a restored session, now that the scans no longer change the axis limits
+        self.apply_restored_view_range()
+        self.restored_view_range = None
+        self.restored_scan_states = {}
+
+        if self.load_errors:
+            QMessageBox.warning(self, "RGA Compare", "The following scans could not be loaded:\n\n" + "\n".join(self.load_errors))
+            self.load_errors = []
 
     def on_scan_added(self, scan_added: RgaScan):
         """Runs various plot and GUI updates when a scan is added
@@ -170,12 +833,28 @@ class MainWindow(QMainWindow):
         Args:
             scan_added (RgaScan): The RgaScan object of the newly added scan
         """
-        self.rga_plot.add_plot(scan_added)
+        for plot in self.scan_plots():
+            plot.add_plot(scan_added)
+        self.schedule_table_updates()
+        self.update_signal_selector()
+
+        self.selector_scans.append(scan_added)
+        self.waterfall_selector.addItem(scan_added.file_name)
+        self.compare_reference_selector.addItem(scan_added.file_name)
 
         scan_name = scan_added.file_identifier
         scan_colour = scan_added.colour
         scan_name = scan_added.file_name
         self.create_scan_widget(scan_name, scan_colour, scan_added)
+        if self.restored_scan_states.get(scan_added.file_path, {}).get("hidden"):
+            self.hide_buttons[scan_added].setChecked(True)
+
+    def closeEvent(self, event):
+        self.folder_browser.close()
+        if self.shared_store is not None:
+            self.scan_loader.cancel()
+            self.shared_store.close()  # Unlinks the shared memory blocks and stops the worker processes
+        super().closeEvent(event)
 
     def on_scan_removed(self, scan_removed: RgaScan):
         """Runs various plot and GUI updates when a scan is removed
@@ -183,4 +862,28 @@ class MainWindow(QMainWindow):
         Args:
             scan_removed (_type_): The RgaScan object of the newly added scan
         """
-        self.rga_plot.remove_plot(scan_removed)
+        self.scan_follower.unfollow(scan_removed)
+        self.hidden_scans.discard(scan_removed)
+        self.hide_buttons.pop(scan_removed, None)
+        list_item = self.scan_items.pop(scan_removed, None)
+        if list_item is not None:
+            self.list.takeItem(self.list.row(list_item))
+        for plot in self.scan_plots():
+            plot.remove_plot(scan_removed)
+        self.schedule_table_updates()
+        self.update_signal_selector()
+
+        if scan_removed in self.selector_scans:
+            index = self.selector_scans.index(scan_removed)
+            self.selector_scans.pop(index)
+            self.waterfall_selector.removeItem(index)
+            self.compare_reference_selector.removeItem(index)
+
+    def on_cycles_appended(self, scan: RgaScan, new_cycles: int):
+        """Redraws the latest cycle of a followed scan and its new waterfall rows, the other curves are left untouched"""
+        self.rga_plot.update_plot(scan)
+        if self.waterfall_plot is not None:
+            self.waterfall_plot.scan_changed(scan)
+        if self.compare_plot is not None:
+            self.compare_plot.scan_changed(scan)
+        self.schedule_table_updates()
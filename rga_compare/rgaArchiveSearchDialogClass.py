@@ -0,0 +1,251 @@
+import os
+from datetime import datetime
+from PySide6.QtCore import QObject, QRunnable, QSettings, QThreadPool, Signal
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+from rgaScanIndexClass import RgaScanIndex
+
+MAX_RESULTS = 1000  # Most files listed at once
+
+
+class IndexUpdateSignals(QObject):
+    """Signals of an IndexUpdateTask, QRunnable isn't a QObject so it can't emit them itself"""
+
+    progress = Signal(int, int)  # files summarized, files to summarize
+    finished = Signal(int, int, int)  # files summarized, dropped and that couldn't be read
+    failed = Signal(str)  # error message
+
+
+class IndexUpdateTask(QRunnable):
+    """Updates the index with the files of a directory on a worker thread, through its own connection to the index
+
+    Args:
+        index_path (str): Location of the index
+        directory (str): Directory searched recursively for .rgadata files
+        signals (IndexUpdateSignals): Signals used to send the progress back to the GUI thread
+    """
+
+    def __init__(self, index_path: str, directory: str, signals: IndexUpdateSignals):
+        super().__init__()
+        self.index_path = index_path
+        self.directory = directory
+        self.signals = signals
+
+    def run(self):
+        try:
+            index = RgaScanIndex(self.index_path)
+            try:
+                result = index.update(self.directory, progress=self.signals.progress.emit)
+            finally:
+                index.close()
+        except Exception as e:
+            self.signals.failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            self.signals.finished.emit(*result)
+
+
+class RGAArchiveSearchDialog(QDialog):
+    """
+    Finds scans of an archive folder by metadata and last cycle peaks through the scan index (see RgaScanIndex),
+    without opening the files. The index is brought up to date with the folder in the background
+
+    Args:
+        index (RgaScanIndex): The index searched
+        parent (QWidget): Parent widget
+    """
+
+    COLUMNS = ["File", "Folder", "Mass Range (AMU)", "Points/AMU", "Cycles", "Started"]
+
+    def __init__(self, index: RgaScanIndex, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.settings = QSettings("RGACompare", "RGACompare")  # Holds the archive folder
+        self.results = []
+        self.released = False  # Deleted once the index update running finishes, see release
+        self.thread_pool = QThreadPool()
+        self.update_signals = IndexUpdateSignals()
+        self.update_signals.progress.connect(self.on_update_progress)
+        self.update_signals.finished.connect(self.on_update_finished)
+        self.update_signals.failed.connect(self.on_update_failed)
+
+        self.setWindowTitle("Search Archive")
+        self.resize(900, 600)
+
+        self.directory_edit = QLineEdit(self.settings.value("archive_directory", "", type=str))
+        self.directory_edit.setPlaceholderText("Archive folder, every indexed file if empty")
+        self.directory_edit.editingFinished.connect(self.search)
+        browse_button = QPushButton("Browse...")
+        browse_button.clicked.connect(self.browse_directory)
+        self.update_button = QPushButton("Update Index")
+        self.update_button.clicked.connect(self.update_index)
+
+        directory_layout = QHBoxLayout()
+        directory_layout.addWidget(QLabel("Folder:"))
+        directory_layout.addWidget(self.directory_edit, 1)
+        directory_layout.addWidget(browse_button)
+        directory_layout.addWidget(self.update_button)
+
+        self.start_mass_edit = self.filter_edit("Any")
+        self.stop_mass_edit = self.filter_edit("Any")
+        self.points_per_amu_edit = self.filter_edit("Any")
+        self.min_cycles_edit = self.filter_edit("Any")
+        self.peaks_edit = self.filter_edit("e.g. 18 > 1e-9, 44 > 1e-10")
+        self.path_edit = self.filter_edit("Text in the path")
+
+        filters_layout = QHBoxLayout()
+        for label, edit in (("Start mass:", self.start_mass_edit), ("Stop mass:", self.stop_mass_edit), ("Points/AMU:", self.points_per_amu_edit), ("Min cycles:", self.min_cycles_edit)):
+            filters_layout.addWidget(QLabel(label))
+            filters_layout.addWidget(edit)
+        peaks_layout = QHBoxLayout()
+        peaks_layout.addWidget(QLabel("Last cycle peaks (Torr):"))
+        peaks_layout.addWidget(self.peaks_edit, 2)
+        peaks_layout.addWidget(QLabel("Path:"))
+        peaks_layout.addWidget(self.path_edit, 1)
+
+        self.results_table = QTableWidget(0, len(self.COLUMNS))
+        self.results_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.verticalHeader().setVisible(False)
+        self.results_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.results_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.results_table.itemDoubleClicked.connect(self.accept)
+
+        self.status_label = QLabel()
+        open_button = QPushButton("Open Selected")
+        open_button.setDefault(True)
+        open_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(self.status_label, 1)
+        buttons_layout.addWidget(open_button)
+        buttons_layout.addWidget(cancel_button)
+
+        layout = QVBoxLayout()
+        layout.addLayout(directory_layout)
+        layout.addLayout(filters_layout)
+        layout.addLayout(peaks_layout)
+        layout.addWidget(self.results_table, 1)
+        layout.addLayout(buttons_layout)
+        self.setLayout(layout)
+
+        self.search()
+
+    def filter_edit(self, placeholder: str) -> QLineEdit:
+        edit = QLineEdit()
+        edit.setPlaceholderText(placeholder)
+        edit.textChanged.connect(self.search)  # Searches only take a few ms
+        return edit
+
+    def browse_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Select the archive folder", self.directory_edit.text())
+        if directory:
+            self.directory_edit.setText(directory)
+            self.update_index()
+
+    def update_index(self):
+        """Brings the index up to date with the archive folder in the background"""
+        directory = self.directory_edit.text().strip()
+        if not directory or not os.path.isdir(directory):
+            self.status_label.setText("Pick an existing archive folder to index")
+            return
+        self.settings.setValue("archive_directory", directory)
+        self.update_button.setEnabled(False)
+        self.status_label.setText("Looking for new and modified files...")
+        self.thread_pool.start(IndexUpdateTask(self.index.index_path, directory, self.update_signals))
+
+    def on_update_progress(self, done: int, total: int):
+        self.status_label.setText(f"Indexing... {done} of {total} new or modified files")
+
+    def on_update_finished(self, summarized: int, dropped: int, failed: int):
+        self.update_button.setEnabled(True)
+        if self.released:
+            self.deleteLater()
+            return
+        if not self.isVisible():
+            return  # Closed while updating, its connection to the index is closed too
+        self.search()
+        message = f"Indexed {summarized} new or modified files, dropped {dropped}"
+        if failed:
+            message += f", {failed} couldn't be read"
+        self.status_label.setText(f"{message}. {self.status_label.text()}")
+
+    def on_update_failed(self, error: str):
+        self.update_button.setEnabled(True)
+        if self.released:
+            self.deleteLater()
+            return
+        self.status_label.setText(f"The index could not be updated: {error}")
+
+    def search_criteria(self) -> dict:
+        """Returns the criteria of RgaScanIndex.search from the filters, invalid filters are ignored"""
+        criteria = {}
+        for name, edit, convert in (
+            ("start_mass", self.start_mass_edit, float),
+            ("stop_mass", self.stop_mass_edit, float),
+            ("points_per_amu", self.points_per_amu_edit, float),
+            ("min_cycles", self.min_cycles_edit, int),
+        ):
+            try:
+                criteria[name] = convert(edit.text())
+            except ValueError:
+                continue
+
+        min_peaks = {}
+        for text in self.peaks_edit.text().replace(";", ",").split(","):
+            mass, _, height = text.partition(">")
+            try:
+                min_peaks[float(mass)] = float(height) if height.strip() else 0.0
+            except ValueError:
+                continue
+        criteria["min_peaks"] = min_peaks
+
+        criteria["path_contains"] = self.path_edit.text().strip() or None
+        directory = self.directory_edit.text().strip()
+        criteria["directory"] = directory if directory else None
+        return criteria
+
+    def search(self):
+        self.results = self.index.search(limit=MAX_RESULTS + 1, **self.search_criteria())
+        shown = self.results[:MAX_RESULTS]
+
+        self.results_table.setUpdatesEnabled(False)
+        self.results_table.setRowCount(len(shown))
+        for row, result in enumerate(shown):
+            started = datetime.fromtimestamp(result["start_time"]).strftime("%Y-%m-%d %H:%M") if result["start_time"] is not None else ""
+            mass_range = f"{result['start_mass']:g} - {result['stop_mass']:g}" if result["start_mass"] is not None else "PvsT"
+            points_per_amu = f"{result['points_per_amu']:g}" if result["points_per_amu"] is not None else ""
+            cells = (os.path.basename(result["path"]), os.path.dirname(result["path"]), mass_range, points_per_amu, f"{result['cycles']}", started)
+            for column, text in enumerate(cells):
+                self.results_table.setItem(row, column, QTableWidgetItem(text))
+        self.results_table.resizeColumnsToContents()
+        self.results_table.setUpdatesEnabled(True)
+
+        found = f"{MAX_RESULTS}+ files found, showing the first {MAX_RESULTS}" if len(self.results) > MAX_RESULTS else f"{len(shown)} files found"
+        self.status_label.setText(f"{found} ({len(self.index)} indexed)")
+
+    def release(self):
+        """Deletes the dialog once it is closed, deleting it waits for its thread pool so an index update still running finishes first"""
+        if self.update_button.isEnabled():  # Disabled from the start of an update until its result is handled
+            self.deleteLater()
+        else:
+            self.released = True
+
+    def selected_paths(self) -> list[str]:
+        """Returns the files of the selected rows, in the order they are listed"""
+        rows = sorted({index.row() for index in self.results_table.selectionModel().selectedRows()})
+        return [self.results[row]["path"] for row in rows]
@@ -0,0 +1,370 @@
+import itertools
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+from rgaScanClass import RgaScan, build_cycle_dtype
+from rgaScanCacheClass import CACHED_SETTINGS
+
+try:
+    import lz4.block
+except ImportError:  # Optional, zlib is used without it
+    lz4 = None
+
+CHUNKED_MAGIC = b"RGACHUNK"
+CHUNKED_EXTENSION = ".rgachunks"
+CHUNKED_FORMAT_VERSION = 1
+
+# Default chunk grid: cycles x points blocks of the signal columns (128 kB of float32 spectra),
+# cycle blocks of the time stamp and auxiliary signal columns
+CHUNK_CYCLES = 512
+CHUNK_POINTS = 64
+COMPRESSION_LEVEL = 1  # zlib level, the byte shuffle already makes the fastest level compress well
+MAX_CACHED_CHUNKS = 64  # Decoded chunks kept per file, e.g. for the hover going back and forth over a cycle
+
+CODECS = ("lz4", "zlib", "none")
+
+
+def default_codec() -> str:
+    """Returns the fastest codec available, lz4 if the lz4 package is installed, zlib otherwise"""
+    return "lz4" if lz4 is not None else "zlib"
+
+
+def is_chunked_scan(file_path: str) -> bool:
+    return file_path.lower().endswith(CHUNKED_EXTENSION)
+
+
+def encode_chunk(values: np.ndarray, codec: str, level: int = COMPRESSION_LEVEL) -> bytes:
+    """Compresses a chunk of a column. The bytes are shuffled first (every first byte of the values, then every second byte...),
+    which groups the slowly changing exponent bytes of the signals and the high bytes of the time stamps into long runs
+    """
+    data = np.ascontiguousarray(values).reshape(-1).view(np.uint8)
+    data = data.reshape(-1, values.dtype.itemsize).T.tobytes()
+    if codec == "lz4":
+        return lz4.block.compress(data, store_size=True)
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    return data
+
+
+def decode_chunk(buffer, codec: str, dtype: np.dtype, shape: tuple[int, ...]) -> np.ndarray:
+    """Decompresses a chunk written by encode_chunk"""
+    if codec == "lz4":
+        if lz4 is None:
+            raise ValueError("The scan was compressed with lz4, install the lz4 package to read it")
+        data = lz4.block.decompress(buffer)
+    elif codec == "zlib":
+        data = zlib.decompress(buffer)
+    else:
+        data = bytes(buffer)
+    shuffled = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(shuffled.T).view(dtype).reshape(shape)
+
+
+def write_chunked_scan(scan: RgaScan, file_path: str, codec: str | None = None, chunk_cycles: int = CHUNK_CYCLES, chunk_points: int = CHUNK_POINTS):
+    """Exports a scan to a chunked columnar file, see RgaChunkedScanFile. The scan is read one block of cycles at a time
+    (see RgaScan.iter_cycles), so a lazy scan larger than memory can be converted
+
+    Args:
+        scan (RgaScan): The scan
+        file_path (str): File to write, replaced if it exists
+        codec (str): One of CODECS, see default_codec if None
+        chunk_cycles (int): Cycles per chunk
+        chunk_points (int): Points (or PvsT gases) per chunk of the signal columns
+
+    Raises:
+        ValueError: If the codec is unknown or unavailable, or a chunk size is below 1
+    """
+    codec = codec if codec is not None else default_codec()
+    if codec not in CODECS or (codec == "lz4" and lz4 is None):
+        raise ValueError(f"Unknown or unavailable codec: {codec}, available: {', '.join(name for name in CODECS if name != 'lz4' or lz4 is not None)}")
+    if chunk_cycles < 1 or chunk_points < 1:
+        raise ValueError(f"chunk_cycles and chunk_points must be at least 1, got {chunk_cycles} and {chunk_points}")
+
+    columns = {}
+    for name, values in scan.columns.items():
+        chunks = [chunk_cycles] + [chunk_points] * (values.ndim - 1)
+        columns[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "chunks": chunks, "offsets": [], "sizes": []}
+
+    temp_path = f"{file_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    spool_path = f"{temp_path}.spool"
+    try:
+        # The cycles are read in order, so the chunks are first compressed to a spool file in row-major order of the chunk grid
+        # (every chunk of a block of cycles, then the next block), offsets are those in the spool for now
+        number_of_cycles = 0
+        with open(spool_path, "wb") as spool:
+            for batch in scan.iter_cycles(chunk=chunk_cycles):
+                number_of_cycles += len(batch)
+                for name, values in batch.columns.items():
+                    column = columns[name]
+                    point_starts = range(0, values.shape[1], chunk_points) if values.ndim == 2 else [None]
+                    for first_point in point_starts:
+                        block = values if first_point is None else values[:, first_point : first_point + chunk_points]
+                        data = encode_chunk(block, codec)
+                        column["offsets"].append(spool.tell())
+                        column["sizes"].append(len(data))
+                        spool.write(data)
+        for column in columns.values():
+            column["shape"][0] = number_of_cycles  # Fewer than the scan had if its file was truncated since
+
+        with open(temp_path, "wb") as f, open(spool_path, "rb") as spool:
+            f.write(CHUNKED_MAGIC)
+            f.write(struct.pack("<QQ", 0, 0))  # Header offset and size, written last
+
+            # Then copied column by column, every block of points over every cycle one after the other, so reading
+            # a mass or an auxiliary signal over a range of cycles reads a contiguous run of the file
+            for column in columns.values():
+                grid = [-(-length // chunk) for length, chunk in zip(column["shape"], column["chunks"])]
+                point_blocks = grid[1] if len(grid) == 2 else 1
+                offsets = column["offsets"]
+                column["offsets"] = [0] * len(offsets)
+                for point_block in range(point_blocks):
+                    for cycle_block in range(grid[0]):
+                        flat_index = cycle_block * point_blocks + point_block
+                        spool.seek(offsets[flat_index])
+                        column["offsets"][flat_index] = f.tell()
+                        f.write(spool.read(column["sizes"][flat_index]))
+
+            header = {
+                "format_version": CHUNKED_FORMAT_VERSION,
+                "codec": codec,
+                "source_path": scan.file_path,
+                "settings": {name: getattr(scan, name) for name in CACHED_SETTINGS},
+                "cycle_size": scan.cycle_dtype.itemsize,
+                "columns": columns,
+            }
+            header["settings"]["f_identifier"] = header["settings"]["f_identifier"].hex()
+            header_bytes = json.dumps(header).encode("utf-8")
+            header_offset = f.tell()
+            f.write(header_bytes)
+            f.seek(len(CHUNKED_MAGIC))
+            f.write(struct.pack("<QQ", header_offset, len(header_bytes)))
+        os.replace(temp_path, file_path)  # The file appears complete or not at all
+    finally:
+        for path in (spool_path, temp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def read_chunked_scan(file_path: str) -> RgaScan:
+    """Opens a chunked columnar file as a scan, only its header is read. The columns are ChunkedColumns,
+    which decode the chunks a selection touches when they are indexed, e.g. scan.spectra[:, 120] or scan.get_cycle(-1)
+    """
+    chunked_file = RgaChunkedScanFile(file_path)
+    # Not a lazy scan, those read their cycles from the .rgadata file: batches of iter_cycles are sliced from the columns
+    scan = RgaScan()
+    for name, value in chunked_file.header["settings"].items():
+        setattr(scan, name, value)
+    scan.f_identifier = bytes.fromhex(scan.f_identifier)
+    scan.file_path = chunked_file.file_path
+    scan.cycle_dtype = build_cycle_dtype(scan.f_version, scan.step_data_sizes, chunked_file.header["cycle_size"], scan.step_types)
+    scan.set_columns({name: chunked_file.column(name) for name in chunked_file.header["columns"]})
+    return scan
+
+
+class RgaChunkedScanFile:
+    """
+    Chunked columnar file holding the decoded columns of a scan (see RgaScan.columns), so a single mass over every cycle
+    or a single auxiliary signal can be read without reading the rest of the scan, unlike the .rgadata data block
+    which interleaves every value of a cycle
+
+    Every column is split in a grid of chunks: blocks of cycles x points (or PvsT gases) for the signal columns, blocks
+    of cycles for the others. Every chunk is compressed on its own (see encode_chunk). The file starts with a pointer to
+    a JSON header at its end (settings, and dtype, shape, chunk shape and the offset and size of every chunk of every
+    column). The chunks of a block of points over every cycle follow each other, so runs of them are read in one call
+
+    Args:
+        file_path (str): Location of the file
+
+    Raises:
+        ValueError: If the file isn't a chunked scan or was written by a newer version
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = os.path.abspath(file_path)
+        self.file = open(file_path, "rb")
+        if self.file.read(len(CHUNKED_MAGIC)) != CHUNKED_MAGIC:
+            self.file.close()
+            raise ValueError(f"Not a chunked scan file: {file_path}")
+        header_offset, header_size = struct.unpack("<QQ", self.file.read(16))
+        self.file.seek(header_offset)
+        self.header = json.loads(self.file.read(header_size).decode("utf-8"))
+        if self.header["format_version"] > CHUNKED_FORMAT_VERSION:
+            self.file.close()
+            raise ValueError(f"{os.path.basename(file_path)} was written by a newer version (format {self.header['format_version']})")
+        self.codec = self.header["codec"]
+        self.lock = threading.Lock()  # Guards the file position and the cached chunks
+        self.cached_chunks = OrderedDict()  # (column, chunk) -> decoded chunk, least recently used first
+        self.bytes_read = 0  # Compressed bytes read from the file so far
+
+    def close(self):
+        self.file.close()
+
+    def column(self, name: str) -> "ChunkedColumn":
+        column = self.header["columns"][name]
+        return ChunkedColumn(self, name, np.dtype(column["dtype"]), tuple(column["shape"]), tuple(column["chunks"]))
+
+    def chunks(self, column: "ChunkedColumn", chunk_indices: list[tuple[int, ...]]) -> dict[tuple[int, ...], np.ndarray]:
+        """Returns decoded chunks of a column, by their position in the chunk grid. The chunks that aren't cached are read
+        in runs of chunks that follow each other in the file, one read call per run
+
+        Returns:
+            dict[tuple[int, ...], np.ndarray]: Chunk position -> values, read-only
+        """
+        header = self.header["columns"][column.name]
+        decoded = {}
+        missing = []
+        with self.lock:
+            for chunk_index in chunk_indices:
+                values = self.cached_chunks.get((column.name, chunk_index))
+                if values is not None:
+                    self.cached_chunks.move_to_end((column.name, chunk_index))
+                    decoded[chunk_index] = values
+                else:
+                    flat_index = int(np.ravel_multi_index(chunk_index, column.grid))
+                    missing.append((header["offsets"][flat_index], header["sizes"][flat_index], chunk_index))
+
+            missing.sort()
+            buffers = []
+            run_start = 0
+            for i in range(1, len(missing) + 1):
+                if i == len(missing) or missing[i][0] != missing[i - 1][0] + missing[i - 1][1]:
+                    first_offset = missing[run_start][0]
+                    self.file.seek(first_offset)
+                    run = memoryview(self.file.read(missing[i - 1][0] + missing[i - 1][1] - first_offset))
+                    buffers.extend((chunk_index, run[offset - first_offset : offset - first_offset + size]) for offset, size, chunk_index in missing[run_start:i])
+                    self.bytes_read += len(run)
+                    run_start = i
+
+        for chunk_index, buffer in buffers:
+            shape = tuple(min(chunk, length - index * chunk) for index, chunk, length in zip(chunk_index, column.chunks, column.shape))
+            values = decode_chunk(buffer, self.codec, column.dtype, shape)
+            values.flags.writeable = False  # Shared by every selection that touches it
+            decoded[chunk_index] = values
+
+        with self.lock:
+            for chunk_index, _ in buffers:
+                self.cached_chunks[(column.name, chunk_index)] = decoded[chunk_index]
+            while len(self.cached_chunks) > MAX_CACHED_CHUNKS:
+                self.cached_chunks.popitem(last=False)
+        return decoded
+
+
+class ChunkedColumn(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    Read-only column of a RgaChunkedScanFile, used like an array. Indexing it (integers, slices and integer or boolean
+    arrays on every axis) decodes only the chunks the selection touches and returns an array. Unlike NumPy, index arrays
+    on both axes select their outer product (as with np.ix_). Passing it to NumPy (np.asarray, ufuncs and operators)
+    decodes the whole column
+
+    Attributes:
+        name (str): Name of the column, see RgaScan.columns
+        dtype (np.dtype): Type of the values
+        shape (tuple[int, ...]): Shape of the column, cycles first
+        chunks (tuple[int, ...]): Shape of a chunk, those at the end of every axis may be smaller
+        grid (tuple[int, ...]): Number of chunks along every axis
+    """
+
+    def __init__(self, chunked_file: RgaChunkedScanFile, name: str, dtype: np.dtype, shape: tuple[int, ...], chunks: tuple[int, ...]):
+        self.chunked_file = chunked_file
+        self.name = name
+        self.dtype = dtype
+        self.shape = shape
+        self.chunks = chunks
+        self.grid = tuple(-(-length // chunk) for length, chunk in zip(shape, chunks))
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.dtype.itemsize
+
+    def resident_nbytes(self) -> int:
+        """Returns the size of the chunks of the column its file keeps decoded (see MAX_CACHED_CHUNKS) in bytes"""
+        with self.chunked_file.lock:
+            return sum(values.nbytes for (name, _), values in self.chunked_file.cached_chunks.items() if name == self.name)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        values = self[...]
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(np.asarray(value) if isinstance(value, ChunkedColumn) else value for value in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __getitem__(self, key) -> np.ndarray:
+        key = key if isinstance(key, tuple) else (key,)
+        if any(item is Ellipsis for item in key):
+            position = next(i for i, item in enumerate(key) if item is Ellipsis)
+            key = key[:position] + (slice(None),) * (self.ndim - len(key) + 1) + key[position + 1 :]
+        if len(key) > self.ndim:
+            raise IndexError(f"too many indices for a column of {self.ndim} dimensions")
+        key = key + (slice(None),) * (self.ndim - len(key))
+
+        # Selected positions along every axis, integer indices drop their axis from the result
+        selections = []
+        shape = []
+        for item, length in zip(key, self.shape):
+            selected = np.arange(length)[item]
+            if selected.ndim == 0:
+                selections.append(selected.reshape(1))
+            else:
+                selections.append(selected)
+                shape.append(len(selected))
+
+        values = np.empty(tuple(len(selected) for selected in selections), dtype=self.dtype)
+        cycle_groups, *point_groups = [chunk_groups(selected, chunk) for selected, chunk in zip(selections, self.chunks)]
+        point_groups = list(itertools.product(*point_groups))
+        # Blocks of cycles are read a few at a time, so a selection over every cycle doesn't decode the whole column at once
+        step = max(1, MAX_CACHED_CHUNKS // 2 // max(len(point_groups), 1))
+        for first in range(0, len(cycle_groups), step):
+            groups = [(cycle_group,) + point_group for cycle_group in cycle_groups[first : first + step] for point_group in point_groups]
+            chunks = self.chunked_file.chunks(self, [tuple(chunk_index for chunk_index, _, _ in group) for group in groups])
+            for group in groups:
+                target = tuple(target for _, target, _ in group)
+                source = tuple(source for _, _, source in group)
+                if sum(isinstance(selection, np.ndarray) for selection in target) > 1:  # Several index arrays select their outer product
+                    target = np.ix_(*[as_indices(selection) for selection in target])
+                    source = np.ix_(*[as_indices(selection) for selection in source])
+                values[target] = chunks[tuple(chunk_index for chunk_index, _, _ in group)][source]
+        return values.reshape(shape) if shape else values.reshape(())[()]
+
+
+def chunk_groups(selected: np.ndarray, chunk: int) -> list[tuple[int, slice | np.ndarray, slice | np.ndarray]]:
+    """Splits the positions selected along an axis by chunk
+
+    Returns:
+        list[tuple[int, slice | np.ndarray, slice | np.ndarray]]: Chunk index, and where its values go in the selection
+            and come from in the chunk, as slices for a run of consecutive positions
+    """
+    if len(selected) == 0:
+        return []
+    chunk_indices = selected // chunk
+    if len(selected) == 1 or np.all(np.diff(selected) == 1):
+        groups = []
+        for chunk_index in range(int(chunk_indices[0]), int(chunk_indices[-1]) + 1):
+            first = max(int(selected[0]), chunk_index * chunk)
+            last = min(int(selected[-1]) + 1, (chunk_index + 1) * chunk)
+            groups.append((chunk_index, slice(first - int(selected[0]), last - int(selected[0])), slice(first - chunk_index * chunk, last - chunk_index * chunk)))
+        return groups
+    groups = []
+    for chunk_index in np.unique(chunk_indices):
+        positions = np.flatnonzero(chunk_indices == chunk_index)
+        groups.append((int(chunk_index), positions, selected[positions] - chunk_index * chunk))
+    return groups
+
+
+def as_indices(selection: slice | np.ndarray) -> np.ndarray:
+    return np.arange(selection.start, selection.stop) if isinstance(selection, slice) else selection
@@ -0,0 +1,111 @@
+import pyqtgraph as pg
+from PySide6 import QtCore
+from rgaScanClass import RgaScan
+from rgaPlotClass import apply_plot_theme
+from rgaComparison import ScanComparison, COMPARISON_MODES
+
+COMPARISON_AXIS_LABELS = {
+    "difference": ("Difference", "Torr"),
+    "ratio": ("Ratio", None),
+    "log_ratio": ("Log10 Ratio", None),
+}
+
+
+class RGAComparePlot(pg.PlotWidget):
+    """
+    Plots the difference, ratio or log ratio of the plotted cycle of every scan against the one of a reference scan,
+    on a common AMU grid so scans with different mass ranges and resolutions can be compared (see ScanComparison)
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.scan_list: list[RgaScan] = []
+        self.curves: dict[RgaScan, pg.PlotDataItem] = {}  # One curve per scan, the reference's is left empty
+        self.comparison = ScanComparison()
+        self.reference: RgaScan | None = None
+        self.mode = "difference"
+        self.log_mode = False
+
+        self.getPlotItem().setClipToView(True)
+        self.getPlotItem().setDownsampling(mode="peak", auto=True)
+
+        apply_plot_theme(self)
+        self.getPlotItem().setLabel("bottom", text="Mass", units="AMU", siPrefixEnableRanges=((0, 0), (0, 0)))
+        self.reference_line = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen("#f5e0dc", style=QtCore.Qt.DashLine))
+        self.addItem(self.reference_line, ignoreBounds=True)
+        self.update_axis()
+
+    def add_plot(self, scan: RgaScan):
+        self.scan_list.append(scan)
+        self.curves[scan] = self.getPlotItem().plot(pen=pg.mkPen(scan.colour, width=2))
+        self.comparison.set_scans(self.scan_list)
+        self.update_plot(scan)
+
+    def remove_plot(self, scan: RgaScan):
+        curve = self.curves.pop(scan, None)
+        if curve is None:
+            return
+        self.getPlotItem().removeItem(curve)
+        self.scan_list.remove(scan)
+        self.comparison.forget(scan)
+        if scan is self.reference:
+            self.set_comparison(None, self.mode)
+
+    def set_plot_visible(self, scan: RgaScan, visible: bool):
+        self.curves[scan].setVisible(visible)
+
+    def set_axis_scale(self, log_mode: bool):
+        """Only the ratio is drawn on a log axis, the difference and log ratio go negative"""
+        self.log_mode = log_mode
+        self.getPlotItem().setLogMode(y=log_mode and self.mode == "ratio")
+        self.update_axis()
+
+    def set_comparison(self, reference: RgaScan | None, mode: str):
+        """Changes the reference scan and the comparison, then redraws every scan
+
+        Args:
+            reference (RgaScan | None): The scan every other one is compared against, nothing is plotted if None
+            mode (str): "difference", "ratio" or "log_ratio", see compare_spectra
+        """
+        if mode not in COMPARISON_MODES:
+            raise ValueError(f"Unknown comparison mode {mode!r}, expected one of {list(COMPARISON_MODES)}")
+        self.reference = reference
+        if mode != self.mode:
+            self.mode = mode
+            self.set_axis_scale(self.log_mode)
+        self.replot()
+
+    def replot(self):
+        """Redraws the curve of every scan, e.g. after the reference or the mode changed"""
+        for scan in self.scan_list:
+            self.update_plot(scan)
+
+    def plotted_cycle(self, scan: RgaScan) -> int:
+        """Returns the index of the cycle compared for a scan, the one RGAPlot plots"""
+        return scan.number_of_cyles() - 1
+
+    def update_plot(self, scan: RgaScan):
+        """Updates the comparison of a single scan, the comparisons already made are reused (see ScanComparison)"""
+        reference = self.reference
+        if reference is None or scan is reference or scan.spectra.shape[1] == 0 or reference.spectra.shape[1] == 0:
+            self.curves[scan].setData([], [])
+            return
+
+        comparison = self.comparison.compare(scan, self.plotted_cycle(scan), reference, self.plotted_cycle(reference), self.mode)
+        self.curves[scan].setData(self.comparison.grid, comparison, connect="finite")
+
+    def scan_changed(self, scan: RgaScan):
+        """Recompares a scan that got new cycles, or every scan if it is the reference"""
+        self.comparison.forget(scan)
+        self.comparison.set_scans(self.scan_list)
+        if scan is self.reference:
+            self.replot()
+        elif scan in self.curves:
+            self.update_plot(scan)
+
+    def update_axis(self):
+        text, units = COMPARISON_AXIS_LABELS[self.mode]
+        self.getPlotItem().setLabel("left", text=text, units=units, siPrefixEnableRanges=((0, 0), (0, 0)))
+        # Where the scans match the reference
+        self.reference_line.setPos(1 if self.mode == "ratio" and not self.log_mode else 0)
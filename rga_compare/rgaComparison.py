@@ -0,0 +1,114 @@
+"""
+Description: Scan-to-scan comparison of spectra measured with different mass ranges and resolutions.
+    The cycles compared are resampled once onto a common AMU grid, and the comparisons against
+    a reference scan are kept, so switching back and forth between references costs nothing.
+"""
+
+from collections import OrderedDict
+import numpy as np
+from rgaScanClass import RgaScan
+
+COMPARISON_MODES = {
+    "difference": "Difference",
+    "ratio": "Ratio",
+    "log_ratio": "Log Ratio",
+}
+MAX_COMPARISONS = 1024  # Comparisons and resampled cycles kept by ScanComparison, the least recently used are dropped first
+
+
+def common_grid(scans: list[RgaScan]) -> np.ndarray:
+    """Returns the AMU grid covering the mass range of every scan at the finest resolution among them"""
+    start_mass = min(scan.startMass for scan in scans)
+    stop_mass = max(scan.stopMass for scan in scans)
+    points_per_amu = max(scan.pointsPerAmu for scan in scans)
+    return start_mass + np.arange(int(round((stop_mass - start_mass) * points_per_amu)) + 1) / points_per_amu
+
+
+def compare_spectra(spectrum: np.ndarray, reference: np.ndarray, mode: str) -> np.ndarray:
+    """Compares two spectra sampled on the same grid
+
+    Args:
+        spectrum (np.ndarray): The spectrum compared
+        reference (np.ndarray): The reference spectrum
+        mode (str): "difference" (spectrum - reference), "ratio" (spectrum / reference) or "log_ratio" (log10 of the ratio)
+
+    Returns:
+        np.ndarray: The comparison, NaN where either spectrum is NaN or where the ratio isn't defined
+    """
+    if mode == "difference":
+        return spectrum - reference
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(reference > 0, spectrum / reference, np.nan)
+        if mode == "ratio":
+            return ratio
+        if mode == "log_ratio":
+            return np.log10(np.where(ratio > 0, ratio, np.nan))
+    raise ValueError(f"Unknown comparison mode {mode!r}, expected one of {list(COMPARISON_MODES)}")
+
+
+class ScanComparison:
+    """
+    Compares the spectra of scans against a reference scan on a common AMU grid (see common_grid)
+
+    The grid is only rebuilt when a scan outside of its range or finer than it is added. Every cycle is resampled
+    onto the grid once (np.interp, NaN outside of the scan's mass range) and every comparison is memoized per
+    (scan, cycle, reference, reference cycle, mode), so changing the reference back and forth is only lookups.
+    Both memos keep the max_comparisons most recently used entries, the entries of a scan are dropped with forget
+
+    Args:
+        max_comparisons (int): Number of comparisons, and of resampled cycles, kept in memory
+    """
+
+    def __init__(self, max_comparisons: int = MAX_COMPARISONS):
+        self.grid = np.empty(0)
+        self.grid_key = None  # (start mass, stop mass, points per AMU) of the grid
+        self.resampled: OrderedDict[tuple[RgaScan, int], np.ndarray] = OrderedDict()  # (scan, cycle) -> cycle on the grid
+        self.comparisons: OrderedDict[tuple, np.ndarray] = OrderedDict()  # (scan, cycle, reference, reference cycle, mode) -> comparison
+        self.max_comparisons = max_comparisons
+
+    def set_scans(self, scans: list[RgaScan]):
+        """Fits the grid to the scans compared, the cached values stay valid unless the grid has to change"""
+        scans = [scan for scan in scans if scan.spectra.shape[1] > 0]
+        if not scans:
+            return
+
+        grid_key = (min(scan.startMass for scan in scans), max(scan.stopMass for scan in scans), max(scan.pointsPerAmu for scan in scans))
+        if self.grid_key is not None and self.grid_key[0] <= grid_key[0] and grid_key[1] <= self.grid_key[1] and grid_key[2] == self.grid_key[2]:
+            return
+        self.grid_key = grid_key
+        self.grid = common_grid(scans)
+        self.resampled.clear()
+        self.comparisons.clear()
+
+    def forget(self, scan: RgaScan):
+        """Drops the cached values of a scan, e.g. after it was removed or got new cycles"""
+        for key in [key for key in self.resampled if key[0] is scan]:
+            del self.resampled[key]
+        for key in [key for key in self.comparisons if key[0] is scan or key[2] is scan]:
+            del self.comparisons[key]
+
+    def resample(self, scan: RgaScan, cycle: int) -> np.ndarray:
+        """Returns a cycle of a scan on the grid, NaN outside of the scan's mass range"""
+        key = (scan, cycle)
+        resampled = self.resampled.get(key)
+        if resampled is None:
+            resampled = np.interp(self.grid, scan.amu_axis(), scan.get_cycle(cycle), left=np.nan, right=np.nan).astype(np.float32)
+            self.resampled[key] = resampled
+            if len(self.resampled) > self.max_comparisons:
+                self.resampled.popitem(last=False)
+        else:
+            self.resampled.move_to_end(key)
+        return resampled
+
+    def compare(self, scan: RgaScan, cycle: int, reference: RgaScan, reference_cycle: int, mode: str) -> np.ndarray:
+        """Returns the comparison of a cycle of a scan against a cycle of the reference scan on the grid, see compare_spectra"""
+        key = (scan, cycle, reference, reference_cycle, mode)
+        comparison = self.comparisons.get(key)
+        if comparison is None:
+            comparison = compare_spectra(self.resample(scan, cycle), self.resample(reference, reference_cycle), mode)
+            self.comparisons[key] = comparison
+            if len(self.comparisons) > self.max_comparisons:
+                self.comparisons.popitem(last=False)
+        else:
+            self.comparisons.move_to_end(key)
+        return comparison
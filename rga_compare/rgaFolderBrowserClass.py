@@ -0,0 +1,229 @@
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from PySide6.QtCore import QObject, QThreadPool, Signal
+from rgaScanClass import RgaScan
+from rgaScanLoaderClass import ScanLoadSignals, ScanLoadTask
+
+DEFAULT_PREFETCH = 2  # Files decoded ahead on either side of the current one
+
+# Orders the files of a browsed folder can be stepped through in
+BROWSE_ORDERS = {
+    "file_name_date": "Date in file name",
+    "start_time": "First time stamp",
+}
+
+# A date in a file name, e.g. "2026-06-17 - RGA.rgadata", "2026_06_17 1430 RGA.rgadata" or "RGA 20260617-143000.rgadata"
+FILE_NAME_DATE = re.compile(r"(?<!\d)(\d{4})[-_.]?(\d{2})[-_.]?(\d{2})(?:[ _T-]*(\d{2})[-_.:h]?(\d{2})(?:[-_.:m]?(\d{2}))?)?(?!\d)")
+
+
+def file_name_date(file_path: str) -> float | None:
+    """Returns the date (and time, if any) written in a file name as a POSIX timestamp (in s), None if there is none"""
+    for match in FILE_NAME_DATE.finditer(os.path.basename(file_path)):
+        try:
+            return datetime(*(int(value) for value in match.groups() if value is not None)).timestamp()
+        except ValueError:  # e.g. a run of digits that isn't a date
+            continue
+    return None
+
+
+def scan_start_time(file_path: str) -> float | None:
+    """Returns the start of a scan as a POSIX timestamp (in s), only the header of the file is read"""
+    from rgaChunkedScanFileClass import is_chunked_scan, read_chunked_scan
+
+    try:
+        scan = read_chunked_scan(file_path) if is_chunked_scan(file_path) else RgaScan(file_path, lazy=True)
+        return scan.start_time()
+    except Exception:
+        return None
+
+
+def sort_scan_files(file_paths: list[str], order: str) -> list[str]:
+    """Sorts scan files chronologically, see BROWSE_ORDERS. Files without a date are placed by their modification time,
+    files with the same date by name (e.g. "2026-06-17 - RGA" before "2026-06-17 - RGA120")
+    """
+    if order not in BROWSE_ORDERS:
+        raise ValueError(f"Unknown order: {order}, one of {', '.join(BROWSE_ORDERS)}")
+    date = file_name_date if order == "file_name_date" else scan_start_time
+
+    def key(file_path: str) -> tuple[float, str]:
+        timestamp = date(file_path)
+        if timestamp is None:
+            timestamp = os.path.getmtime(file_path)
+        return timestamp, os.path.basename(file_path).lower()
+
+    return sorted(file_paths, key=key)
+
+
+class RgaFolderBrowser(QObject):
+    """Steps through the scans of a folder one at a time, in chronological order. The files around the current one are
+    decoded ahead of time on a thread pool and kept in a bounded in-memory LRU, so stepping to the next or previous file
+    shows it straight away
+
+    Files are decoded fully (not memory-mapped), the LRU holds at most the files within prefetch of the current one and
+    max_bytes of scan data held in memory (see RgaScan.resident_nbytes, chunked exports only count their decoded chunks),
+    the least recently used files go first. The current file is never evicted
+
+    Args:
+        prefetch (int): Files decoded ahead on either side of the current one
+        max_bytes (int): Size cap of the decoded scans kept, set by the RGA_COMPARE_BROWSE_CACHE_MB environment variable or 1 GB otherwise
+    """
+
+    current_changed = Signal(object)  # RgaScan of the current file, once decoded
+    position_changed = Signal(int, int)  # position of the current file, number of files
+    load_failed = Signal(str, str)  # file path, error message
+
+    def __init__(self, prefetch: int = DEFAULT_PREFETCH, max_bytes: int | None = None):
+        super().__init__()
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("RGA_COMPARE_BROWSE_CACHE_MB", 1024)) * 1024**2)
+        self.prefetch = prefetch
+        self.max_bytes = max_bytes
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(2)  # The current file and the one after it, without starving the GUI
+
+        self.signals = ScanLoadSignals()
+        self.signals.loaded.connect(self.on_loaded)
+        self.signals.failed.connect(self.on_failed)
+
+        self.directory = None
+        self.order = "file_name_date"
+        self.file_paths = []
+        self.position = -1
+        self.scans = OrderedDict()  # file path -> decoded scan, least recently used first
+        self.pending = {}  # file path -> ScanLoadTask queued or running
+        self.generation = 0  # Results of tasks started before the last change of folder or order are ignored
+
+    def open_folder(self, directory: str, order: str | None = None):
+        """Lists the scans of a folder (not its subfolders) and goes to the first one
+
+        Args:
+            directory (str): The folder
+            order (str): One of BROWSE_ORDERS, the current order if None
+        """
+        from rgaChunkedScanFileClass import CHUNKED_EXTENSION
+
+        self.order = order if order is not None else self.order
+        self.directory = directory
+        file_paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith((".rgadata", CHUNKED_EXTENSION))]
+        self.reset(sort_scan_files(file_paths, self.order))
+        self.scans.clear()
+        self.go_to(0)
+
+    def set_order(self, order: str):
+        """Sorts the files again, staying on the current file. The scans already decoded are kept"""
+        if order == self.order:
+            return
+        self.order = order
+        current_path = self.current_path()
+        self.reset(sort_scan_files(self.file_paths, order))
+        if current_path is not None:
+            self.go_to(self.file_paths.index(current_path))
+
+    def reset(self, file_paths: list[str]):
+        self.thread_pool.clear()  # Removes the tasks that haven't started
+        self.pending = {}
+        self.generation += 1
+        self.file_paths = file_paths
+        self.position = -1
+
+    def close(self):
+        """Stops prefetching and drops the decoded scans"""
+        self.reset([])
+        self.scans.clear()
+        self.directory = None
+        self.position_changed.emit(-1, 0)
+
+    def current_path(self) -> str | None:
+        return self.file_paths[self.position] if 0 <= self.position < len(self.file_paths) else None
+
+    def next(self):
+        if self.position + 1 < len(self.file_paths):
+            self.go_to(self.position + 1)
+
+    def previous(self):
+        if self.position > 0:
+            self.go_to(self.position - 1)
+
+    def go_to(self, position: int):
+        """Makes a file the current one, current_changed is emitted straight away if it was already decoded,
+        otherwise once it is. The files around it are then prefetched
+
+        Args:
+            position (int): Position of the file in file_paths
+        """
+        if not self.file_paths:
+            self.position_changed.emit(-1, 0)
+            return
+        self.position = max(0, min(position, len(self.file_paths) - 1))
+        self.position_changed.emit(self.position, len(self.file_paths))
+
+        file_path = self.file_paths[self.position]
+        if file_path in self.scans:
+            self.scans.move_to_end(file_path)
+            self.current_changed.emit(self.scans[file_path])
+        else:
+            self.request(self.position, priority=1)
+        self.prefetch_neighbours()
+        self.evict()
+
+    def window(self) -> list[str]:
+        """Returns the files to keep decoded, the current one then its neighbours by distance, the next one first"""
+        positions = [self.position]
+        for distance in range(1, self.prefetch + 1):
+            positions.extend((self.position + distance, self.position - distance))
+        return [self.file_paths[position] for position in positions if 0 <= position < len(self.file_paths)]
+
+    def prefetch_neighbours(self):
+        """Queues the files around the current one that aren't decoded yet, and drops the queued files that are now too far"""
+        window = self.window()
+        for file_path, task in list(self.pending.items()):
+            if file_path not in window and self.thread_pool.tryTake(task):
+                del self.pending[file_path]
+        for file_path in window[1:]:
+            if file_path not in self.scans:
+                self.request(self.file_paths.index(file_path), priority=0)
+
+    def request(self, position: int, priority: int):
+        file_path = self.file_paths[position]
+        if file_path in self.pending:
+            return
+        task = ScanLoadTask(self.generation, position, file_path, False, self.signals)
+        task.setAutoDelete(False)  # Kept in pending, so it can be taken back off the queue
+        self.pending[file_path] = task
+        self.thread_pool.start(task, priority)
+
+    def on_loaded(self, generation: int, position: int, scan: RgaScan):
+        if generation != self.generation:
+            return
+        file_path = self.file_paths[position]
+        self.pending.pop(file_path, None)
+        if file_path not in self.window():
+            return  # Stepped too far away while it was decoded
+
+        self.scans[file_path] = scan
+        self.evict()
+        if position == self.position:
+            self.current_changed.emit(scan)
+
+    def on_failed(self, generation: int, position: int, error: str):
+        if generation != self.generation:
+            return
+        file_path = self.file_paths[position]
+        self.pending.pop(file_path, None)
+        if position == self.position:
+            self.load_failed.emit(file_path, error)
+
+    def evict(self):
+        """Drops the least recently used scans outside of the prefetch window, then inside it while their memory is over max_bytes"""
+        window = self.window()
+        current_path = self.current_path()
+        for file_path in [file_path for file_path in self.scans if file_path not in window]:
+            del self.scans[file_path]
+        total_bytes = sum(scan.resident_nbytes() for scan in self.scans.values())
+        for file_path in list(self.scans):
+            if total_bytes <= self.max_bytes:
+                break
+            if file_path != current_path:
+                total_bytes -= self.scans.pop(file_path).resident_nbytes()
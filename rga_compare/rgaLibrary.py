@@ -0,0 +1,267 @@
+"""
+Description: Reference library of electron ionization mass spectra, built from JCAMP-DX files
+    (e.g. the ones downloaded by extra/downloadMassSpectraFromNIST.py), and fitting of measured
+    spectra as non-negative mixes of the library species.
+
+    The library is packed into a single species x masses array of the cracking patterns plus an
+    index of the species having a major peak at every mass, saved as one .npz file.
+"""
+
+import os
+import numpy as np
+
+MAJOR_PEAK_FRACTION = 0.1  # Peaks at least this fraction of the base peak are indexed, see SpectrumLibrary.candidates
+NNLS_ITERATIONS = 500  # Maximum coordinate descent sweeps of nnls
+NNLS_TOLERANCE = 1e-6  # nnls stops once no value moves by more than this fraction of the largest one
+
+
+def read_jcamp(file_path: str) -> tuple[dict[str, str], np.ndarray, np.ndarray]:
+    """Reads a JCAMP-DX mass spectrum, only the first block of a compound file is read
+
+    Args:
+        file_path (str): Path of the .jdx file
+
+    Raises:
+        ValueError: If the file holds no (XY..XY) peak table
+
+    Returns:
+        tuple[dict[str, str], np.ndarray, np.ndarray]: Labelled data records (e.g. "TITLE", "CAS REGISTRY NO"), masses and intensities
+    """
+    records = {}
+    points = []
+    in_table = False
+    with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            line = line.split("$$")[0].strip()  # $$ starts a comment
+            if line.startswith("##"):
+                label, _, value = line[2:].partition("=")
+                label = label.strip().upper()
+                if label == "END":
+                    break
+                records[label] = value.strip()
+                in_table = label in ("PEAK TABLE", "XYPOINTS") and value.replace(" ", "").upper().startswith("(XY..XY)")
+            elif in_table and line:
+                for pair in line.replace(";", " ").split():
+                    x, _, y = pair.partition(",")
+                    points.append((float(x), float(y)))
+
+    if not points:
+        raise ValueError(f"{os.path.basename(file_path)} holds no (XY..XY) peak table")
+
+    masses, intensities = np.array(points).T
+    masses *= float(records.get("XFACTOR", 1))
+    intensities *= float(records.get("YFACTOR", 1))
+    return records, masses, intensities
+
+
+def nnls(design: np.ndarray, targets: np.ndarray, iterations: int = NNLS_ITERATIONS, tolerance: float = NNLS_TOLERANCE) -> np.ndarray:
+    """Solves many non-negative least squares problems sharing the same design matrix at once,
+    min |design @ x - target| with x >= 0 for every target, by coordinate descent on the normal equations
+
+    Every sweep updates one coefficient at a time for all targets together, so the cost per sweep is
+    a few (targets x coefficients) array operations however many targets there are
+
+    Args:
+        design (np.ndarray): values x coefficients design matrix
+        targets (np.ndarray): targets x values, one problem per row
+        iterations (int): Maximum number of sweeps over the coefficients
+        tolerance (float): Stops once no coefficient moves by more than this fraction of the largest one
+
+    Returns:
+        np.ndarray: targets x coefficients solutions
+    """
+    design = np.asarray(design, dtype=np.float64)
+    targets = np.atleast_2d(np.asarray(targets, dtype=np.float64))
+    gram = design.T @ design
+    projections = targets @ design
+    diagonal = np.where(gram.diagonal() > 0, gram.diagonal(), 1)
+
+    solutions = np.zeros((len(targets), design.shape[1]))
+    gradients = -projections  # gram @ x - projections, kept up to date as x changes
+    for _ in range(iterations):
+        largest_step = 0.0
+        for k in range(design.shape[1]):
+            updated = np.maximum(solutions[:, k] - gradients[:, k] / diagonal[k], 0)
+            step = updated - solutions[:, k]
+            solutions[:, k] = updated
+            gradients += step[:, None] * gram[k]
+            largest_step = max(largest_step, float(np.max(np.abs(step), initial=0)))
+        if largest_step <= tolerance * max(float(np.max(solutions, initial=0)), np.finfo(float).tiny):
+            break
+    return solutions
+
+
+class LibraryFit:
+    """
+    Decomposition of spectra into library species (see SpectrumLibrary.fit)
+
+    Attributes:
+        species (np.ndarray): Library indices of the fitted species
+        names (list[str]): Names of the fitted species
+        pressures (np.ndarray): cycles x species partial pressures, as the height of the base peak of every species (in Torr)
+        residuals (np.ndarray): cycles root-mean-square difference between the fitted and measured nominal mass heights (in Torr)
+    """
+
+    def __init__(self, species: np.ndarray, names: list[str], pressures: np.ndarray, residuals: np.ndarray):
+        self.species = species
+        self.names = names
+        self.pressures = pressures
+        self.residuals = residuals
+
+    def cycle(self, index: int) -> list[tuple[str, float]]:
+        """Returns the species found in a single cycle, highest partial pressure first
+
+        Returns:
+            list[tuple[str, float]]: (name, partial pressure) of every species with a partial pressure above 0
+        """
+        order = np.argsort(-self.pressures[index], kind="stable")
+        return [(self.names[i], float(self.pressures[index, i])) for i in order if self.pressures[index, i] > 0]
+
+
+class SpectrumLibrary:
+    """
+    Packed library of reference mass spectra
+
+    Attributes:
+        names (list[str]): Name of every species
+        cas_numbers (list[str]): CAS registry number of every species, "" if unknown
+        patterns (np.ndarray): species x masses cracking patterns at the nominal masses 0, 1, 2..., base peak scaled to 1
+        index_offsets (np.ndarray): index_species[index_offsets[m]:index_offsets[m + 1]] are the species with a major peak at mass m
+        index_species (np.ndarray): Species of every mass of the index, see index_offsets
+        skipped_files (list[tuple[str, str]]): (path, error) of the files from_jcamp_files couldn't read
+    """
+
+    def __init__(self, names: list[str], cas_numbers: list[str], patterns: np.ndarray):
+        self.names = list(names)
+        self.cas_numbers = list(cas_numbers)
+        self.patterns = np.asarray(patterns, dtype=np.float32)
+        self.skipped_files = []
+
+        # Compressed per-mass index of the major peaks, species sorted by mass
+        species, masses = np.nonzero(self.patterns >= MAJOR_PEAK_FRACTION)
+        order = np.argsort(masses, kind="stable")
+        self.index_species = species[order].astype(np.int32)
+        self.index_offsets = np.searchsorted(masses[order], np.arange(self.patterns.shape[1] + 1)).astype(np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_jcamp_files(cls, file_paths: list[str]) -> "SpectrumLibrary":
+        """Builds a library from JCAMP-DX files, the peaks are rounded to nominal masses and files
+        repeating the CAS number of an earlier one are skipped. Files that can't be read (e.g. broken
+        records of a NIST download) are skipped too and listed in skipped_files
+
+        Args:
+            file_paths (list[str]): .jdx files, directories are searched (not recursively) for .jdx files
+
+        Raises:
+            ValueError: If no spectrum could be read
+        """
+        expanded_paths = []
+        for file_path in file_paths:
+            if os.path.isdir(file_path):
+                expanded_paths.extend(sorted(os.path.join(file_path, name) for name in os.listdir(file_path) if name.lower().endswith(".jdx")))
+            else:
+                expanded_paths.append(file_path)
+
+        names, cas_numbers, spectra, skipped_files = [], [], [], []
+        for file_path in expanded_paths:
+            try:
+                records, masses, intensities = read_jcamp(file_path)
+            except (OSError, ValueError) as e:  # Also a UnicodeDecodeError
+                skipped_files.append((file_path, f"{type(e).__name__}: {e}"))
+                continue
+            cas_number = records.get("CAS REGISTRY NO", "")
+            if cas_number and cas_number in cas_numbers:
+                continue
+            names.append(records.get("TITLE") or os.path.splitext(os.path.basename(file_path))[0])
+            cas_numbers.append(cas_number)
+            spectra.append((np.round(masses).astype(int), intensities))
+
+        if not spectra:
+            raise ValueError(f"No JCAMP-DX spectra found ({len(skipped_files)} files couldn't be read)" if skipped_files else "No JCAMP-DX spectra found")
+
+        patterns = np.zeros((len(spectra), max(masses.max() for masses, _ in spectra) + 1), dtype=np.float32)
+        for row, (masses, intensities) in enumerate(spectra):
+            np.add.at(patterns[row], np.clip(masses, 0, None), intensities)
+            patterns[row] /= max(patterns[row].max(), np.finfo(np.float32).tiny)
+        library = cls(names, cas_numbers, patterns)
+        library.skipped_files = skipped_files
+        return library
+
+    @classmethod
+    def load(cls, file_path: str) -> "SpectrumLibrary":
+        """Loads a library saved with save"""
+        with np.load(file_path, allow_pickle=False) as packed:
+            library = cls.__new__(cls)
+            library.names = packed["names"].tolist()
+            library.cas_numbers = packed["cas_numbers"].tolist()
+            library.patterns = packed["patterns"]
+            library.index_offsets = packed["index_offsets"]
+            library.index_species = packed["index_species"]
+            library.skipped_files = []
+        return library
+
+    def save(self, file_path: str):
+        """Saves the packed library (patterns and index) as a single .npz file"""
+        np.savez(
+            file_path,
+            names=np.array(self.names, dtype=str),
+            cas_numbers=np.array(self.cas_numbers, dtype=str),
+            patterns=self.patterns,
+            index_offsets=self.index_offsets,
+            index_species=self.index_species,
+        )
+
+    def species_at(self, mass: int) -> np.ndarray:
+        """Returns the species with a major peak at a nominal mass"""
+        if not 0 <= mass < self.patterns.shape[1]:
+            return self.index_species[:0]
+        return self.index_species[self.index_offsets[mass] : self.index_offsets[mass + 1]]
+
+    def candidates(self, observed_masses: np.ndarray, measured_masses: np.ndarray) -> np.ndarray:
+        """Returns the species whose major peaks within the measured masses were all observed, looked up in the per-mass index
+
+        Args:
+            observed_masses (np.ndarray): Nominal masses where a peak was found
+            measured_masses (np.ndarray): Nominal masses covered by the spectra
+
+        Returns:
+            np.ndarray: Library indices of the candidate species
+        """
+        measured_masses = np.asarray(measured_masses, dtype=int)
+        measured_masses = measured_masses[(measured_masses >= 0) & (measured_masses < self.patterns.shape[1])]
+        observed = np.isin(measured_masses, observed_masses)
+
+        # Major peaks per species within the measured masses, and how many of them were observed
+        majors = np.bincount(np.concatenate([self.species_at(mass) for mass in measured_masses] + [self.index_species[:0]]), minlength=len(self))
+        found = np.bincount(np.concatenate([self.species_at(mass) for mass in measured_masses[observed]] + [self.index_species[:0]]), minlength=len(self))
+        return np.flatnonzero((majors > 0) & (found == majors))
+
+    def fit(self, nominal_masses: np.ndarray, heights: np.ndarray, species: np.ndarray | None = None) -> LibraryFit:
+        """Fits every cycle as a non-negative mix of library species, all cycles in one batched solve (see nnls)
+
+        Args:
+            nominal_masses (np.ndarray): Nominal mass of every column of heights (in AMU)
+            heights (np.ndarray): cycles x masses peak heights, e.g. MassTable.heights, NaN where no peak was found
+            species (np.ndarray): Library indices of the species to fit, the candidates (see candidates) if None
+
+        Returns:
+            LibraryFit: The partial pressures of the fitted species in every cycle
+        """
+        nominal_masses = np.asarray(nominal_masses, dtype=int)
+        heights = np.nan_to_num(np.atleast_2d(np.asarray(heights, dtype=np.float64)), nan=0.0)
+        if species is None:
+            observed_masses = nominal_masses[np.any(heights > 0, axis=0)]
+            species = self.candidates(observed_masses, nominal_masses)
+        species = np.asarray(species, dtype=int)
+
+        # Cracking patterns at the measured masses, masses beyond the library have no peaks
+        in_library = (nominal_masses >= 0) & (nominal_masses < self.patterns.shape[1])
+        design = np.zeros((len(nominal_masses), len(species)))
+        design[in_library] = self.patterns[np.ix_(species, nominal_masses[in_library])].T
+
+        pressures = nnls(design, heights) if len(species) else np.zeros((len(heights), 0))
+        residuals = np.sqrt(np.mean((pressures @ design.T - heights) ** 2, axis=1)) if heights.shape[1] else np.zeros(len(heights))
+        return LibraryFit(species, [self.names[i] for i in species], pressures, residuals)
@@ -0,0 +1,59 @@
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from rgaPlotClass import RGAPlot
+from rgaProfiler import profiled
+
+
+class RGAPeakTable(QTableWidget):
+    """
+    Lists the peaks of the cycle plotted for every visible scan of an RGAPlot, within the mass range in view,
+    from the mass table of each cycle (see RgaScan.cycle_mass_table). The table follows the plot as it is zoomed and panned.
+    """
+
+    COLUMNS = ["Scan", "m/z", "Centroid (AMU)", "Height (Torr)", "Integral (Torr AMU)"]
+
+    def __init__(self, rga_plot: RGAPlot):
+        super().__init__(0, len(self.COLUMNS))
+        self.rga_plot = rga_plot
+
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+        # Refreshes once panning/zooming settles instead of on every range change
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(50)
+        self.update_timer.timeout.connect(self.update_table)
+        self.rga_plot.getPlotItem().getViewBox().sigXRangeChanged.connect(self.update_timer.start)
+
+    def schedule_update(self):
+        """Refreshes the table shortly, e.g. after scans were added, removed, hidden or got new cycles"""
+        self.update_timer.start()
+
+    @profiled("table.peaks")
+    def update_table(self):
+        (x_min, x_max), _ = self.rga_plot.getPlotItem().getViewBox().viewRange()
+
+        rows = []
+        for scan in self.rga_plot.visible_scans():
+            mass_table = scan.cycle_mass_table(self.rga_plot.plotted_cycle(scan)) if len(scan.spectra) else None
+            if mass_table is None:
+                continue
+            for nominal_mass, centroid, height, integral in mass_table.cycle(0):
+                if x_min <= centroid <= x_max:
+                    rows.append((nominal_mass, self.rga_plot.scan_list.index(scan), scan, centroid, height, integral))
+        rows.sort(key=lambda row: row[:2])
+
+        self.setUpdatesEnabled(False)
+        self.setRowCount(len(rows))
+        for row, (nominal_mass, scan_index, scan, centroid, height, integral) in enumerate(rows):
+            scan_item = QTableWidgetItem(f"Scan {scan_index + 1}: {scan.file_name}")
+            scan_item.setForeground(QColor(scan.colour))
+            self.setItem(row, 0, scan_item)
+            for column, text in enumerate((f"{nominal_mass:g}", f"{centroid:.2f}", f"{height:.3e}", f"{integral:.3e}"), start=1):
+                self.setItem(row, column, QTableWidgetItem(text))
+        self.setUpdatesEnabled(True)
@@ -0,0 +1,161 @@
+import numpy as np
+
+BASELINE_WINDOW = 5.0  # Width of the windows the baseline is estimated over (in AMU), a few times wider than a peak
+MIN_SIGNAL_TO_NOISE = 10.0  # Smallest peak height kept, in multiples of the noise of its cycle
+
+
+class MassTable:
+    """
+    Peaks of every cycle of a spectrum, one row per cycle and one column per nominal mass (see find_peaks)
+
+    Attributes:
+        nominal_masses (np.ndarray): Nominal mass of every column (in AMU)
+        heights (np.ndarray): cycles x masses height of the highest peak of the nominal mass above the baseline (in Torr), NaN if there is no peak
+        centroids (np.ndarray): cycles x masses mass of that peak, interpolated between the points of the spectrum (in AMU), NaN if there is no peak
+        integrals (np.ndarray): cycles x masses area above the baseline over the nominal mass, m - 0.5 to m + 0.5 (in Torr * AMU)
+        baselines (np.ndarray): cycles x masses mean baseline over the nominal mass (in Torr)
+    """
+
+    def __init__(self, nominal_masses: np.ndarray, heights: np.ndarray, centroids: np.ndarray, integrals: np.ndarray, baselines: np.ndarray):
+        self.nominal_masses = nominal_masses
+        self.heights = heights
+        self.centroids = centroids
+        self.integrals = integrals
+        self.baselines = baselines
+
+    def select(self, cycles: slice) -> "MassTable":
+        """Returns the mass table of a range of cycles"""
+        return MassTable(self.nominal_masses, self.heights[cycles], self.centroids[cycles], self.integrals[cycles], self.baselines[cycles])
+
+    def cycle(self, index: int) -> list[tuple[float, float, float, float]]:
+        """Returns the peaks of a single cycle
+
+        Returns:
+            list[tuple[float, float, float, float]]: (nominal mass, centroid, height, integral) of every nominal mass with a peak
+        """
+        found = np.flatnonzero(np.isfinite(self.heights[index]))
+        return [(float(self.nominal_masses[i]), float(self.centroids[index, i]), float(self.heights[index, i]), float(self.integrals[index, i])) for i in found]
+
+
+def estimate_baseline(spectra: np.ndarray, window: int) -> np.ndarray:
+    """Estimates the baseline of every cycle as the minimum of consecutive windows of points,
+    linearly interpolated between the window centres. Peaks narrower than a window don't lift it
+
+    Args:
+        spectra (np.ndarray): cycles x points spectra
+        window (int): Number of points per window
+
+    Returns:
+        np.ndarray: cycles x points baseline
+    """
+    number_of_points = spectra.shape[1]
+    window = min(max(int(window), 1), number_of_points)
+    number_of_windows = -(-number_of_points // window)
+
+    # Partial last window padded with its own last point, so every window has the same size
+    padded = np.pad(spectra, ((0, 0), (0, number_of_windows * window - number_of_points)), mode="edge")
+    minima = padded.reshape(len(spectra), number_of_windows, window).min(axis=2)
+    if number_of_windows == 1:
+        return np.repeat(minima, number_of_points, axis=1)
+
+    # Linear interpolation between the window centres, every cycle at once
+    position = np.clip((np.arange(number_of_points) - (window - 1) / 2) / window, 0, number_of_windows - 1)
+    left = np.minimum(position.astype(int), number_of_windows - 2)
+    fraction = (position - left).astype(spectra.dtype)
+    return minima[:, left] * (1 - fraction) + minima[:, left + 1] * fraction
+
+
+def estimate_noise(spectra: np.ndarray, window: int) -> np.ndarray:
+    """Estimates the noise (standard deviation) of every cycle over consecutive windows of points, from the median
+    absolute difference between neighbouring points, which peaks a few points wide barely change
+
+    Args:
+        spectra (np.ndarray): cycles x points spectra
+        window (int): Number of points per window
+
+    Returns:
+        np.ndarray: cycles x points noise, constant over each window
+    """
+    number_of_points = spectra.shape[1]
+    window = min(max(int(window), 2), number_of_points)
+    number_of_windows = -(-number_of_points // window)
+
+    differences = np.abs(np.diff(spectra, axis=1, append=spectra[:, -1:]))
+    padded = np.pad(differences, ((0, 0), (0, number_of_windows * window - number_of_points)), mode="edge")
+    noise = np.median(padded.reshape(len(spectra), number_of_windows, window), axis=2) * (1.4826 / np.sqrt(2))
+    return np.repeat(noise, window, axis=1)[:, :number_of_points]
+
+
+def find_peaks(spectra: np.ndarray, start_mass: float, points_per_amu: int, baseline_window: float = BASELINE_WINDOW, min_signal_to_noise: float = MIN_SIGNAL_TO_NOISE) -> MassTable:
+    """Finds the peaks of every cycle of a spectrum and integrates every nominal mass, all cycles at once
+
+    1. The baseline is estimated (see estimate_baseline) and subtracted
+    2. Peaks are the local maxima higher than min_signal_to_noise times the local noise (see estimate_noise)
+    3. The highest peak of every nominal mass is kept, its centroid from a parabola through its three points
+    4. The area above the baseline is integrated over every nominal mass
+
+    Args:
+        spectra (np.ndarray): cycles x points spectra, may be memory-mapped
+        start_mass (float): Mass of the first point (in AMU)
+        points_per_amu (int): Points per AMU of the spectra
+        baseline_window (float): Width of the baseline windows (in AMU)
+        min_signal_to_noise (float): Smallest peak height kept, in multiples of the noise
+
+    Returns:
+        MassTable: The peaks and integrals of every cycle, all NaN if the spectra have fewer than 3 points
+    """
+    spectra = np.asarray(spectra, dtype=np.float32)
+    number_of_points = spectra.shape[1]
+    points_per_amu = int(points_per_amu)
+
+    # Nominal mass m covers the points from m - 0.5 to m + 0.5 AMU, padding the spectra so every nominal mass
+    # has points_per_amu points lets every mass be reduced at once along a reshaped axis
+    first_mass = int(np.round(start_mass))
+    left_padding = int(np.floor((start_mass - first_mass + 0.5) * points_per_amu + 1e-9))
+    number_of_masses = -(-(number_of_points + left_padding) // points_per_amu)
+    right_padding = number_of_masses * points_per_amu - number_of_points - left_padding
+
+    if number_of_points < 3:  # Too narrow for a peak to have neighbours on both sides, or a baseline under it
+        empty = np.full((len(spectra), number_of_masses), np.nan)
+        return MassTable(np.arange(number_of_masses) + first_mass, empty, empty.copy(), empty.copy(), empty.copy())
+
+    window = int(baseline_window * points_per_amu)
+    baseline = estimate_baseline(spectra, window)
+    signal = spectra - baseline
+
+    is_peak = np.zeros(signal.shape, dtype=bool)
+    is_peak[:, 1:-1] = (signal[:, 1:-1] > signal[:, :-2]) & (signal[:, 1:-1] >= signal[:, 2:])
+    is_peak &= signal > min_signal_to_noise * estimate_noise(spectra, window)
+
+    def by_mass(values, fill):
+        return np.pad(values, ((0, 0), (left_padding, right_padding)), constant_values=fill).reshape(len(values), number_of_masses, points_per_amu)
+
+    candidates = by_mass(np.where(is_peak, signal, -np.inf), -np.inf)
+    peak_offsets = np.argmax(candidates, axis=2)
+    heights = np.take_along_axis(candidates, peak_offsets[..., None], axis=2)[..., 0].astype(np.float64)
+    found = np.isfinite(heights)
+    heights[~found] = np.nan
+
+    # Parabola through the peak point and its neighbours for the sub-point position of the top
+    peak_indices = np.clip(np.arange(number_of_masses) * points_per_amu + peak_offsets - left_padding, 1, number_of_points - 2)
+    before, top, after = (np.take_along_axis(signal, peak_indices + shift, axis=1).astype(np.float64) for shift in (-1, 0, 1))
+    curvature = before - 2 * top + after
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shifts = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0.0)
+    centroids = np.where(found, start_mass + (peak_indices + np.clip(shifts, -0.5, 0.5)) / points_per_amu, np.nan)
+
+    integrals = by_mass(signal, 0).sum(axis=2, dtype=np.float64) / points_per_amu
+    baselines = by_mass(baseline, 0).sum(axis=2, dtype=np.float64) / np.maximum(by_mass(np.ones((1, number_of_points), dtype=np.float32), 0)[0].sum(axis=1), 1)
+
+    return MassTable(np.arange(number_of_masses) + first_mass, heights, centroids, integrals, baselines)
+
+
+def concatenate_mass_tables(tables: list[MassTable]) -> MassTable:
+    """Joins the mass tables of consecutive chunks of cycles of the same spectrum"""
+    return MassTable(
+        tables[0].nominal_masses,
+        np.concatenate([table.heights for table in tables]),
+        np.concatenate([table.centroids for table in tables]),
+        np.concatenate([table.integrals for table in tables]),
+        np.concatenate([table.baselines for table in tables]),
+    )
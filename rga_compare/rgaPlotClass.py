@@ -1,7 +1,19 @@
 import pyqtgraph as pg
 import numpy as np
 from PySide6 import QtWidgets, QtCore
-from rgaScanClass import RgaScan, RgaScanList
+from PySide6.QtGui import QColor
+from rgaScanClass import RgaScan
+from rgaStatistics import CycleAggregate
+from rgaPyramid import SpectrumPyramid
+from rgaProfiler import profiled
+
+
+def apply_plot_theme(plot_widget: pg.PlotWidget):
+    """Applies the colours shared by every plot of the application"""
+    plot_widget.setBackground("#1e1e2e")
+    plot_widget.getPlotItem().getAxis("bottom").setPen("#cdd6f4")
+    plot_widget.getPlotItem().getAxis("left").setPen("#cdd6f4")
+    plot_widget.getPlotItem().showGrid(x=True, y=True, alpha=0.1)
 
 
 class RGAPlot(pg.PlotWidget):
@@ -9,9 +21,27 @@ class RGAPlot(pg.PlotWidget):
         super().__init__()
 
         self.scan_list: list[RgaScan] = []
-
-        self.getPlotItem().setClipToView(True)  # Stops rendering points that are off-screen
-        self.getPlotItem().setDownsampling(mode="peak", auto=True)  # Reduce points when zoomed out
+        self.curves: dict[RgaScan, pg.PlotDataItem] = {}  # One persistent curve per scan
+        self.scan_extents: dict[RgaScan, tuple] = {}  # (x_min, x_max, y_min, y_max) of every scan's plotted cycle
+        self.plot_data: dict[RgaScan, tuple[np.ndarray, np.ndarray]] = {}  # (AMU axis, plotted cycle) of every scan, reused by the hover
+        self.hover_points = None  # Points shown in the hover label, see update_hover
+        self.pyramids: dict[RgaScan, SpectrumPyramid] = {}  # Min/max pyramid of every scan's plotted cycle, built once per cycle
+        self.drawn_views: dict[RgaScan, tuple[int, int, int]] = {}  # (first point, last point, block size) each curve currently holds
+
+        # Statistics of a range of cycles drawn instead of (or around) the plotted cycle, see set_aggregation
+        self.aggregate_line = None  # "mean" or "median" drawn as the line of every scan, the plotted cycle if None
+        self.aggregate_envelope = None  # "minmax", "std" (mean +/- 1 std) or "percentiles" shaded around the line, none if None
+        self.aggregate_cycles = (None, None)  # (start, stop) of the range of cycles, see RgaScan.aggregate
+        self.envelope_percentiles = (5.0, 95.0)  # Bounds of the "percentiles" envelope
+        self.envelopes: dict[RgaScan, tuple[pg.PlotDataItem, pg.PlotDataItem, pg.FillBetweenItem]] = {}  # (lower, upper, fill) of every scan that had an envelope
+        self.envelope_pyramids: dict[RgaScan, tuple[SpectrumPyramid, SpectrumPyramid] | None] = {}  # Pyramids of the lower and upper bounds of every envelope drawn
+
+        # Curves are fed only the points in view from the scan's pyramid, at about two points per pixel (see update_curve),
+        # instead of pyqtgraph clipping and downsampling the full cycles again on every view change
+        self.getPlotItem().setClipToView(False)
+        self.getPlotItem().setDownsampling(auto=False)
+        self.getPlotItem().getViewBox().sigXRangeChanged.connect(lambda *_: self.update_curves())
+        self.getPlotItem().getViewBox().sigResized.connect(lambda *_: self.update_curves())
 
         self.log_mode = False  # Set to False since plot is made to begin in Linear mode
         self.x_lim_upper = -1
@@ -24,43 +54,229 @@ class RGAPlot(pg.PlotWidget):
         self.getPlotItem().setLabel("left", text="Intensity", units="Torr", siPrefixEnableRanges=((0, 0),(0,0)))
         self.getPlotItem().setLabel("bottom", text="Mass", units="AMU", siPrefixEnableRanges=((0, 0),(0,0)))
 
+    @profiled("plot.replot")
     def replot(self):
+        """Redraws the curve of every scan, e.g. after their data changed"""
+        for scan in self.scan_list:
+            self.update_plot(scan)
 
-        # Aspect representing the characteristics of the viewbox/viewable area
-        view_box = self.getPlotItem().getViewBox()
+    def add_plot(self, scan: RgaScan):
+        """Adds a curve for a scan, or shows it again if it was hidden. Only this scan's curve is created
+        so the cost doesn't depend on how many scans are already plotted
 
-        # set up the variable for limits, apply constants so that they are always initially overwritten
-        x_lim_upper = -1
-        x_lim_lower = float("inf")
-        y_lim_upper = -1
-        y_lim_lower = float("inf")
+        Args:
+            scan (RgaScan): The scan to plot
+        """
+        if scan in self.curves:
+            self.set_plot_visible(scan, True)
+            return
+
+        self.scan_list.append(scan)
+        self.curves[scan] = self.getPlotItem().plot(pen=pg.mkPen(scan.colour, width=2))
+        self.update_plot(scan)
+
+    def remove_plot(self, scan: RgaScan):
+        """Removes the curve of a scan"""
+        curve = self.curves.pop(scan, None)
+        if curve is None:
+            return
+
+        self.getPlotItem().removeItem(curve)
+        for item in self.envelopes.pop(scan, ()):
+            self.getPlotItem().removeItem(item)
+        self.envelope_pyramids.pop(scan, None)
+        self.scan_list.remove(scan)
+        del self.scan_extents[scan]
+        del self.plot_data[scan]
+        del self.pyramids[scan]
+        self.drawn_views.pop(scan, None)
+        self.hover_points = None
+        self.update_axis_limits()
+
+    def set_plot_visible(self, scan: RgaScan, visible: bool):
+        """Hides or shows the curve of a scan without removing it"""
+        self.curves[scan].setVisible(visible)
+        self.update_envelope_visible(scan)
+        if visible:
+            self.update_curve(scan)
+        self.hover_points = None
+        self.update_axis_limits()
+
+    @profiled("plot.update_plot")
+    def update_plot(self, scan: RgaScan):
+        """Updates the curve and the cached extents of a single scan from its data"""
+        if scan.spectra.size == 0:  # e.g. a scan with only a PvsT step
+            self.curves[scan].setData([], [])
+            self.plot_data[scan] = (np.empty(0), np.empty(0))
+            self.pyramids[scan] = None
+            self.envelope_pyramids[scan] = None
+            self.update_envelope_visible(scan)
+            self.drawn_views.pop(scan, None)
+            self.scan_extents[scan] = None
+            self.hover_points = None
+            self.update_axis_limits()
+            return
+
+        aggregate = None
+        if self.aggregate_line is not None or self.aggregate_envelope is not None:
+            aggregate = scan.aggregate(*self.aggregate_cycles, quantiles=self.aggregate_quantiles())
+        if aggregate is not None and self.aggregate_line is not None:
+            cycle = aggregate.statistic(self.aggregate_line)
+        else:
+            cycle = scan.get_cycle(self.plotted_cycle(scan))
+        amu_axis = scan.amu_axis()
+        self.plot_data[scan] = (amu_axis, cycle)
+        self.pyramids[scan] = SpectrumPyramid(amu_axis, cycle)
+
+        y_max = float(np.max(cycle))
+        y_min = float(np.min(cycle, where=(cycle > 0), initial=np.inf))
+        if aggregate is not None and self.aggregate_envelope is not None:
+            lower, upper = self.envelope_bounds(aggregate)
+            self.envelope_pyramids[scan] = (SpectrumPyramid(amu_axis, lower), SpectrumPyramid(amu_axis, upper))
+            y_max = max(y_max, float(np.max(upper)))
+            y_min = min(y_min, float(np.min(lower, where=(lower > 0), initial=np.inf)))
+        else:
+            self.envelope_pyramids[scan] = None
+        self.scan_extents[scan] = (scan.startMass, scan.stopMass, y_min, y_max)
 
-        # # Clear and replot
-        # for item in self.getPlotItem().listDataItems():
-        #     self.getPlotItem().removeItem(item)
+        self.update_envelope_visible(scan)
+        self.drawn_views.pop(scan, None)
+        self.update_curve(scan)
+        self.hover_points = None
 
-        view_box.clear()
+        self.update_axis_limits()
+
+    def plotted_cycle(self, scan: RgaScan) -> int:
+        """Returns the index of the cycle plotted for a scan"""
+        return scan.number_of_cyles() - 1
+
+    def set_aggregation(self, line: str | None, envelope: str | None = None, start: int | None = None, stop: int | None = None, percentiles: tuple[float, float] = (5.0, 95.0)):
+        """Draws statistics of a range of cycles of every scan (see RgaScan.aggregate) instead of the plotted cycle
+
+        Args:
+            line (str): "mean" or "median" of the cycles drawn as the line, the plotted cycle if None
+            envelope (str): "minmax", "std" (mean +/- 1 standard deviation) or "percentiles" shaded around the line, none if None
+            start (int): First cycle of the range, negative indices count from the last cycle, the first cycle if None
+            stop (int): Cycle the range stops before, the end of the scan if None
+            percentiles (tuple[float, float]): Lower and upper bounds of the "percentiles" envelope (0 to 100)
+        """
+        self.aggregate_line = line
+        self.aggregate_envelope = envelope
+        self.aggregate_cycles = (start, stop)
+        self.envelope_percentiles = tuple(percentiles)
+        self.replot()
+
+    def aggregate_quantiles(self) -> tuple[float, ...]:
+        """Returns the quantiles the line and envelope need"""
+        quantiles = []
+        if self.aggregate_line == "median":
+            quantiles.append(0.5)
+        if self.aggregate_envelope == "percentiles":
+            quantiles.extend(percentile / 100 for percentile in self.envelope_percentiles)
+        return tuple(quantiles)
+
+    def envelope_bounds(self, aggregate: CycleAggregate) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the lower and upper bounds of the envelope of a scan"""
+        if self.aggregate_envelope == "minmax":
+            return aggregate.minimum, aggregate.maximum
+        if self.aggregate_envelope == "std":
+            return aggregate.mean - aggregate.std, aggregate.mean + aggregate.std
+        lower, upper = self.envelope_percentiles
+        return aggregate.quantiles[lower / 100], aggregate.quantiles[upper / 100]
+
+    def update_envelope_visible(self, scan: RgaScan):
+        """Shows the envelope of a scan while it has one and its curve is visible, its items are created on first use"""
+        visible = self.envelope_pyramids.get(scan) is not None and self.curves[scan].isVisible()
+        if visible and scan not in self.envelopes:
+            colour = QColor(scan.colour)
+            colour.setAlpha(90)
+            lower = self.getPlotItem().plot(pen=pg.mkPen(colour, width=1))
+            upper = self.getPlotItem().plot(pen=pg.mkPen(colour, width=1))
+            colour.setAlpha(50)
+            fill = pg.FillBetweenItem(lower, upper, brush=pg.mkBrush(colour))
+            self.getPlotItem().addItem(fill)
+            self.envelopes[scan] = (lower, upper, fill)
+        for item in self.envelopes.get(scan, ()):
+            item.setVisible(visible)
+
+    @profiled("plot.update_curves")
+    def update_curves(self):
+        """Feeds every visible curve the points of the new view"""
+        for scan in self.scan_list:
+            if self.curves[scan].isVisible():
+                self.update_curve(scan)
+
+    def update_curve(self, scan: RgaScan):
+        """Feeds a curve the points of its scan in view, from the pyramid level giving about two points per pixel,
+        so the cost of a redraw depends on the width of the plot and not on the number of points of the scans
+        """
+        pyramid = self.pyramids.get(scan)
+        if pyramid is None:
+            return
+
+        view_box = self.getPlotItem().getViewBox()
+        if view_box.autoRangeEnabled()[0]:
+            # The whole cycle, so the auto range sees the bounds of all the data and not just of the current view
+            view_first, view_last = 0, len(pyramid.y)
+        else:
+            (x_min, x_max), _ = view_box.viewRange()
+            view_first = max(int(np.floor((x_min - scan.startMass) * scan.pointsPerAmu)) - 1, 0)  # One point past each edge keeps the line going off-screen
+            view_last = min(int(np.ceil((x_max - scan.startMass) * scan.pointsPerAmu)) + 2, len(pyramid.y))
+        block = pyramid.block_size(view_last - view_first, max(int(view_box.width()), 1))
+
+        # Nothing to do while the curve already holds the points in view at the right level, e.g. when panning a little,
+        # as long as it doesn't hold many more points than the view (after zooming in at the full resolution)
+        drawn_view = self.drawn_views.get(scan)
+        if drawn_view is not None and drawn_view[2] == block and drawn_view[0] <= view_first and view_last <= drawn_view[1]:
+            if drawn_view[1] - drawn_view[0] <= 4 * (view_last - view_first):
+                return
+
+        # Half a view of points on either side, so small pans don't need new ones
+        margin = (view_last - view_first) // 2
+        first_index, last_index = max(view_first - margin, 0), min(view_last + margin, len(pyramid.y))
+        self.drawn_views[scan] = (first_index, last_index, block)
+        self.curves[scan].setData(*pyramid.get_view(first_index, last_index, block))
+
+        envelope = self.envelope_pyramids.get(scan)
+        if envelope is not None:
+            lower_curve, upper_curve, _ = self.envelopes[scan]
+            lower_x, lower_y = envelope[0].get_bound_view(first_index, last_index, block, "min")
+            if self.log_mode:
+                lower_y = np.maximum(lower_y, self.scan_extents[scan][2])  # Keeps the shading down to the smallest positive value
+            lower_curve.setData(lower_x, lower_y)
+            upper_curve.setData(*envelope[1].get_bound_view(first_index, last_index, block, "max"))
+
+    def visible_scans(self) -> list[RgaScan]:
+        return [scan for scan in self.scan_list if self.curves[scan].isVisible() and self.scan_extents[scan] is not None]
+
+    @profiled("plot.axis_limits")
+    def update_axis_limits(self):
+        """Sets the view range limits from the cached extents of the visible scans"""
+
+        # Aspect representing the characteristics of the viewbox/viewable area
+        view_box = self.getPlotItem().getViewBox()
+
+        visible_scans = self.visible_scans()
 
         # sets the view back to default conditions when all plots are removed
-        if len(self.scan_list) == 0:
+        if len(visible_scans) == 0:
             view_box.setLimits(xMin=-100, xMax=100, yMin=-100, yMax=100)
             view_box.setRange(xRange=(0, 1), yRange=(0, 1))
             return
 
-        # Plots every scan in the RgaScanList
-        for i in range(len(self.scan_list)):
-            scan = self.scan_list[i]
-            cycle = scan.get_cycle(scan.number_of_cyles() - 1)
-            self.getPlotItem().plot(scan.amu_axis(), cycle, pen=pg.mkPen(scan.colour, width=2))
-
-            y_max = np.max(cycle)
-            y_min = np.min(cycle, where=(cycle > 0), initial=np.inf)
+        # set up the variable for limits, apply constants so that they are always initially overwritten
+        x_lim_upper = -1
+        x_lim_lower = float("inf")
+        y_lim_upper = -1
+        y_lim_lower = float("inf")
 
-            # Measures the range of values for setting view range limits
-            if x_lim_upper < scan.stopMass:
-                x_lim_upper = scan.stopMass
-            if x_lim_lower > scan.startMass:
-                x_lim_lower = scan.startMass
+        # Measures the range of values for setting view range limits
+        for scan in visible_scans:
+            x_min, x_max, y_min, y_max = self.scan_extents[scan]
+            if x_lim_upper < x_max:
+                x_lim_upper = x_max
+            if x_lim_lower > x_min:
+                x_lim_lower = x_min
             if y_lim_upper < y_max:
                 y_lim_upper = y_max
             if y_lim_lower > y_min and y_min > 0:
@@ -73,18 +289,6 @@ class RGAPlot(pg.PlotWidget):
 
         self.set_axis_limits()
 
-        view_box.addItem(self.vLine)
-        view_box.addItem(self.label)
-
-    def add_plot(self, scan: RgaScan):
-
-        self.scan_list.append(scan)
-        self.replot()
-
-    def remove_plot(self, scan: RgaScan):
-        self.scan_list.remove(scan)
-        self.replot()
-
     def set_axis_limits(self):
 
         view_box = self.getPlotItem().getViewBox()
@@ -111,19 +315,19 @@ class RGAPlot(pg.PlotWidget):
     def set_axis_scale(self, log_mode: bool):
 
         self.log_mode = log_mode
-        if len([item for item in self.listDataItems() if isinstance(item, pg.PlotDataItem)]) != 0:
+        if len(self.visible_scans()) != 0:
             self.set_axis_limits()
         self.getPlotItem().setLogMode(y=log_mode)
+        if any(envelope is not None for envelope in self.envelope_pyramids.values()):
+            self.drawn_views.clear()  # The lower bounds of the envelopes are clipped in log mode
+            self.update_curves()
 
     def set_plot_theme(self, title="System Telemetry"):
         """
         Main styling method to be called on initialization or reset.
         """
 
-        self.setBackground("#1e1e2e")
-        self.plotItem.getAxis("bottom").setPen("#cdd6f4")
-        self.plotItem.getAxis("left").setPen("#cdd6f4")
-        self.plotItem.showGrid(x=True, y=True, alpha=0.1)
+        apply_plot_theme(self)
 
         # 3. Enhanced Interactivity
         self.vLine = pg.InfiniteLine(angle=90, movable=False, pen="#f5e0dc")
@@ -135,6 +339,7 @@ class RGAPlot(pg.PlotWidget):
 
         self.proxy = pg.SignalProxy(self.scene().sigMouseMoved, rateLimit=60, slot=self.update_hover)
 
+    @profiled("plot.hover")
     def update_hover(self, event):
         pos = event[0]
         if self.sceneBoundingRect().contains(pos):
@@ -148,35 +353,47 @@ class RGAPlot(pg.PlotWidget):
             elif x > self.x_lim_upper:
                 x = self.x_lim_upper
 
-            # 2. Build the HTML string for the label
-            # We can loop through the curves you stored in self.curves
-            label_html = f"<div style='background-color: rgba(30, 30, 46, 150); padding: 5px; border: 1px solid #cdd6f4;'>"
-            label_html += f"<b style='color: #f5e0dc;'>AMU: {x:.2f}</b><br>"
-
-            found_data = False
+            # Finds the point of every visible scan closest to the current mouse x, straight from the
+            # scan's mass grid (startMass + index / pointsPerAmu) instead of searching its AMU axis
+            snapped_points = []
             for i, scan in enumerate(self.scan_list):
-                cycle = scan.get_cycle(scan.number_of_cyles() - 1)
-                # Simple logic: find the y-value closest to the current mouse x
-                # This assumes x_data is sorted
-                scan_x = scan.amu_axis()
-                index = np.argmin(np.abs(scan_x - x))
-                if 0 <= index < len(cycle):
-                    y_val = cycle[index]
-                    label_html += f"<span style='color: {scan.colour};'>Scan {i+1}: {y_val:.3e}</span><br>"
-                    found_data = True
-                    # print(f"x: {x}, y:{y_val}")
-
-            label_html += "</div>"
+                if not self.curves[scan].isVisible():
+                    continue
+                scan_x, cycle = self.plot_data[scan]
+                if len(cycle) == 0:
+                    continue
+                index = int(round((x - scan.startMass) * scan.pointsPerAmu))
+                index = min(max(index, 0), len(cycle) - 1)
+                snapped_points.append((i, index))
 
             self.vLine.setPos(x)
             # 3. Update label text and position
-            if found_data:
-                # snap_x_pos = scan_x[index]
-                # self.vLine.setPos(snap_x_pos)
-                self.label.setHtml(label_html)
+            if snapped_points:
+                # The label only needs rebuilding when the mouse moves onto other data points
+                if snapped_points != self.hover_points:
+                    self.hover_points = snapped_points
+                    self.label.setHtml(self.hover_label_html(snapped_points))
                 # Position the label slightly offset from the mouse
                 self.label.setPos(x, mousePoint.y())
 
+    def hover_label_html(self, snapped_points: list[tuple[int, int]]) -> str:
+        """Builds the HTML of the hover label
+
+        Args:
+            snapped_points (list[tuple[int, int]]): (index in scan_list, index in the plotted cycle) of every point to show
+        """
+        first_scan_x, _ = self.plot_data[self.scan_list[snapped_points[0][0]]]
+        label_html = f"<div style='background-color: rgba(30, 30, 46, 150); padding: 5px; border: 1px solid #cdd6f4;'>"
+        label_html += f"<b style='color: #f5e0dc;'>AMU: {first_scan_x[snapped_points[0][1]]:.2f}</b><br>"
+
+        for i, index in snapped_points:
+            scan = self.scan_list[i]
+            y_val = self.plot_data[scan][1][index]
+            label_html += f"<span style='color: {scan.colour};'>Scan {i+1}: {y_val:.3e}</span><br>"
+
+        label_html += "</div>"
+        return label_html
+
 
 # class TempPlot(pg.PlotWidget):
 #     def __init__(self):
@@ -0,0 +1,142 @@
+"""
+Description: Lightweight instrumentation of the hot paths (file decode, replot, axis limits, hover).
+    Timed sections are summed per name, with optional counters (e.g. bytes and cycles decoded),
+    and kept as a trace that can be exported in the Chrome trace format (chrome://tracing, Perfetto).
+
+    Disabled unless the RGA_COMPARE_PROFILE environment variable is set to 1 or it is switched on at runtime
+    (e.g. from the Profiling menu), a disabled timed function only costs one attribute check per call.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+MAX_TRACE_EVENTS = 100_000  # Most recent timed sections kept for the trace export
+
+
+class NullSpan:
+    """Stands in for a Span while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, **counters: float):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """A timed section, recorded in its profiler when it ends, see Profiler.span"""
+
+    __slots__ = ("profiler", "name", "start", "counters")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.counters = {}
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns(), self.counters)
+        return False
+
+    def add(self, **counters: float):
+        """Adds to the counters of the section, e.g. span.add(bytes=..., cycles=...)"""
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+class Profiler:
+    """
+    Collects timed sections from any thread
+
+    Attributes:
+        enabled (bool): Whether sections are timed
+        sections (dict[str, dict]): "calls", "total", "min" and "max" time (in s) and summed "counters" of every section name
+        events (deque): Most recent sections as Chrome trace "complete" events
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = MAX_TRACE_EVENTS):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.sections: dict[str, dict] = {}
+        self.events = deque(maxlen=max_events)
+        self.origin_ns = time.perf_counter_ns()
+
+    def span(self, name: str) -> Span | NullSpan:
+        """Returns a context manager timing the section it wraps, e.g. with PROFILER.span("scan.decode") as span: ..."""
+        return Span(self, name) if self.enabled else NULL_SPAN
+
+    def record(self, name: str, start_ns: int, end_ns: int, counters: dict | None = None):
+        duration = (end_ns - start_ns) / 1e9
+        with self.lock:
+            section = self.sections.get(name)
+            if section is None:
+                section = self.sections[name] = {"calls": 0, "total": 0.0, "min": float("inf"), "max": 0.0, "counters": {}}
+            section["calls"] += 1
+            section["total"] += duration
+            section["min"] = min(section["min"], duration)
+            section["max"] = max(section["max"], duration)
+            for counter, value in (counters or {}).items():
+                section["counters"][counter] = section["counters"].get(counter, 0) + value
+
+            event = {"name": name, "ph": "X", "ts": (start_ns - self.origin_ns) / 1000, "dur": (end_ns - start_ns) / 1000, "pid": os.getpid(), "tid": threading.get_ident()}
+            if counters:
+                event["args"] = dict(counters)
+            self.events.append(event)
+
+    def stats(self) -> dict[str, dict]:
+        """Returns a copy of the sections (see self.sections)"""
+        with self.lock:
+            return {name: dict(section, counters=dict(section["counters"])) for name, section in self.sections.items()}
+
+    def reset(self):
+        with self.lock:
+            self.sections.clear()
+            self.events.clear()
+
+    def export_trace(self, file_path: str):
+        """Writes the recorded sections as a Chrome trace (JSON object format), loadable in chrome://tracing or Perfetto"""
+        with self.lock:
+            events = list(self.events)
+        thread_names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.ident, "args": {"name": thread.name}} for thread in threading.enumerate()]
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": thread_names + events, "displayTimeUnit": "ms"}, f)
+
+
+PROFILER = Profiler(enabled=os.environ.get("RGA_COMPARE_PROFILE", "0") not in ("", "0"))
+
+
+def profiled(name: str, counters: Callable[..., dict] | None = None):
+    """Decorator timing every call of a function as a section of PROFILER
+
+    Args:
+        name (str): Name of the section
+        counters (Callable): Called with the result then the arguments of the function, returns the counters of the call
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            result = function(*args, **kwargs)
+            PROFILER.record(name, start, time.perf_counter_ns(), counters(result, *args, **kwargs) if counters is not None else None)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,64 @@
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from rgaProfiler import Profiler, PROFILER
+
+# Counters shown as a rate of their section, with their unit
+COUNTER_RATES = {
+    "bytes": ("MB/s", 1e-6),
+    "cycles": ("cycles/s", 1),
+}
+
+
+class RGAProfilerPanel(QTableWidget):
+    """
+    Shows the time spent in every instrumented section (see rgaProfiler), refreshed while the panel is shown
+
+    Args:
+        profiler (Profiler): The profiler shown
+    """
+
+    COLUMNS = ["Section", "Calls", "Total (ms)", "Mean (ms)", "Max (ms)", "Throughput"]
+
+    def __init__(self, profiler: Profiler = PROFILER):
+        super().__init__(0, len(self.COLUMNS))
+        self.profiler = profiler
+
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(500)
+        self.refresh_timer.timeout.connect(self.update_table)
+
+    def showEvent(self, event):
+        self.update_table()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def update_table(self):
+        stats = self.profiler.stats()
+        self.setUpdatesEnabled(False)
+        self.setRowCount(len(stats))
+        for row, name in enumerate(sorted(stats, key=lambda name: -stats[name]["total"])):
+            section = stats[name]
+            rates = []
+            for counter, (unit, scale) in COUNTER_RATES.items():
+                if counter in section["counters"] and section["total"] > 0:
+                    rates.append(f"{section['counters'][counter] / section['total'] * scale:,.1f} {unit}")
+            cells = (
+                name,
+                f"{section['calls']}",
+                f"{section['total'] * 1e3:.1f}",
+                f"{section['total'] / section['calls'] * 1e3:.3f}",
+                f"{section['max'] * 1e3:.3f}",
+                ", ".join(rates),
+            )
+            for column, text in enumerate(cells):
+                self.setItem(row, column, QTableWidgetItem(text))
+        self.setUpdatesEnabled(True)
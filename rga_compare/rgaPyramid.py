@@ -0,0 +1,309 @@
+import numpy as np
+
+REDUCERS = {
+    "max": np.max,
+    "min": np.min,
+    "mean": np.mean,
+}
+
+
+def decimate(values: np.ndarray, block: int, axis: int = 0, reducer: str = "max") -> np.ndarray:
+    """Reduces every block of consecutive values along an axis to a single value,
+    a trailing partial block is reduced on its own
+
+    Args:
+        values (np.ndarray): The values to decimate
+        block (int): Number of values per block
+        axis (int): Axis to decimate along
+        reducer (str): "max", "min" or "mean"
+
+    Returns:
+        np.ndarray: The decimated values, ceil(n / block) long along the axis
+    """
+    values = np.moveaxis(np.asarray(values), axis, 0)
+    if block <= 1:
+        return np.moveaxis(np.array(values), 0, axis)
+
+    reduce = REDUCERS[reducer]
+    full_blocks = len(values) // block
+    blocks = values[: full_blocks * block].reshape((full_blocks, block) + values.shape[1:])
+    decimated = reduce(blocks, axis=1)
+    if len(values) % block:
+        remainder = reduce(values[full_blocks * block :], axis=0, keepdims=True)
+        decimated = np.concatenate([decimated, remainder])
+    return np.moveaxis(decimated, 0, axis)
+
+
+def next_power_of_two(value: float) -> int:
+    return 1 << max(0, int(np.ceil(np.log2(max(value, 1)))))
+
+
+class CyclePyramid:
+    """
+    Decimated copies of the cycles x points spectra of a scan at power-of-two numbers of cycles per row,
+    for drawing every cycle of a long scan as an image
+
+    Only the levels with at most max_rows rows are kept in memory, built in a single chunked pass over the spectra.
+    Finer views are decimated on the fly from the full resolution cycles they cover, see get_tile. Images wider than
+    the view are min/max decimated along the points as well, see get_image.
+
+    Args:
+        spectra (np.ndarray): cycles x points spectra, may be memory-mapped
+        reducer (str): "max", "min" or "mean", how cycles are combined into a row
+        max_rows (int): Maximum number of rows of the finest level kept in memory
+        chunk_rows (int): Number of cycles read at a time while building the pyramid
+    """
+
+    def __init__(self, spectra: np.ndarray, reducer: str = "max", max_rows: int = 2048, chunk_rows: int = 4096):
+        self.reducer = reducer
+        self.max_rows = max_rows
+        self.chunk_rows = chunk_rows
+        self.build(spectra)
+
+    def build(self, spectra: np.ndarray):
+        self.spectra = spectra
+        self.number_of_cycles = len(spectra)
+        self.point_cache = (None, None)  # (level, points per block) -> the whole level min/max decimated along the points
+
+        # Finest level kept in memory
+        self.base_block = next_power_of_two(self.number_of_cycles / self.max_rows)
+        if self.base_block == 1:
+            base = np.asarray(spectra)
+        else:
+            chunk_rows = max(self.chunk_rows // self.base_block, 1) * self.base_block  # Chunks hold whole blocks
+            chunks = [decimate(spectra[start : start + chunk_rows], self.base_block, reducer=self.reducer) for start in range(0, self.number_of_cycles, chunk_rows)]
+            base = np.concatenate(chunks) if chunks else np.empty((0, spectra.shape[1]), dtype=spectra.dtype)
+
+        # Coarser levels, each halving the number of rows of the previous one
+        self.levels = {self.base_block: base}
+        block = self.base_block
+        while len(self.levels[block]) > 1:
+            self.levels[block * 2] = decimate(self.levels[block], 2, reducer=self.reducer)
+            block *= 2
+
+    def extend(self, spectra: np.ndarray):
+        """Takes in the cycles appended to the spectra since the pyramid was built, e.g. of a followed scan.
+        Only the rows covering the new cycles are decimated again, unless the finest level kept in memory
+        would grow past max_rows, then the pyramid is built again at the next block size
+
+        Args:
+            spectra (np.ndarray): cycles x points spectra, starting with the cycles already in the pyramid
+        """
+        previous_cycles = self.number_of_cycles
+        if len(spectra) <= previous_cycles:
+            self.spectra = spectra
+            return
+        if next_power_of_two(len(spectra) / self.max_rows) != self.base_block:
+            self.build(spectra)
+            return
+
+        self.spectra = spectra
+        self.number_of_cycles = len(spectra)
+        self.point_cache = (None, None)
+
+        # The last row may only have covered part of its block, it is decimated again with the new cycles
+        block = self.base_block
+        row = previous_cycles // block
+        self.levels[block] = np.concatenate([self.levels[block][:row], decimate(spectra[row * block :], block, reducer=self.reducer)])
+        while len(self.levels[block]) > 1:
+            row //= 2
+            coarser = self.levels.get(block * 2, self.levels[block][:0])
+            self.levels[block * 2] = np.concatenate([coarser[:row], decimate(self.levels[block][row * 2 :], 2, reducer=self.reducer)])
+            block *= 2
+
+    def get_tile(self, first_cycle: int, last_cycle: int, rows: int) -> tuple[np.ndarray, int, int]:
+        """Returns the cycles in a range decimated to about the given number of rows
+
+        Args:
+            first_cycle (int): First cycle of the range
+            last_cycle (int): Last cycle of the range (exclusive)
+            rows (int): Number of rows wanted, e.g. the height of the view in pixels
+
+        Returns:
+            tuple[np.ndarray, int, int]: rows x points image, cycle of the first row and number of cycles per row
+        """
+        first_cycle = min(max(first_cycle, 0), self.number_of_cycles)
+        last_cycle = min(max(last_cycle, first_cycle), self.number_of_cycles)
+
+        # Largest power-of-two block that still gives at least the wanted number of rows
+        wanted_block = max((last_cycle - first_cycle) / max(rows, 1), 1)
+        block = 1 << int(np.floor(np.log2(wanted_block)))
+
+        if block >= self.base_block:
+            block = min(block, max(self.levels))
+            first_row = first_cycle // block
+            last_row = -(-last_cycle // block)
+            return self.levels[block][first_row:last_row], first_row * block, block
+
+        # Zoomed in past the finest level kept in memory, only the cycles in view are read
+        first_cycle = (first_cycle // block) * block
+        tile = decimate(self.spectra[first_cycle:last_cycle], block, reducer=self.reducer)
+        return tile, first_cycle, block
+
+    def get_image(self, first_cycle: int, last_cycle: int, rows: int, first_point: int, last_point: int, columns: int) -> tuple[np.ndarray, int, int, int, int]:
+        """Returns the cycles and points in a range decimated to about the given numbers of rows and columns,
+        see get_tile and decimate_points. The level last drawn is kept min/max decimated along the points,
+        so panning at the same zoom only slices it
+
+        Args:
+            first_cycle (int): First cycle of the range
+            last_cycle (int): Last cycle of the range (exclusive)
+            rows (int): Number of rows wanted, e.g. the height of the view in pixels
+            first_point (int): First point of the range
+            last_point (int): Last point of the range (exclusive)
+            columns (int): Number of columns wanted, e.g. the width of the view in pixels
+
+        Returns:
+            tuple[np.ndarray, int, int, int, int]: rows x columns image, cycle of the first row, number of cycles per row,
+                point of the first column and number of points per pair of columns (1 if every point is a column)
+        """
+        tile, first_cycle, block = self.get_tile(first_cycle, last_cycle, rows)
+        number_of_points = tile.shape[1]
+        first_point = min(max(first_point, 0), number_of_points)
+        last_point = min(max(last_point, first_point), number_of_points)
+        point_block = point_block_size(last_point - first_point, columns)
+        if block < self.base_block or point_block == 1:
+            image, first_point = decimate_points(tile, first_point, last_point, point_block)
+            return image, first_cycle, block, first_point, point_block
+
+        key = (block, point_block)
+        if self.point_cache[0] != key:
+            self.point_cache = (key, decimate_points(self.levels[block], 0, number_of_points, point_block)[0])
+        first_row = first_cycle // block
+        first_block = first_point // point_block
+        last_block = -(-last_point // point_block)
+        image = self.point_cache[1][first_row : first_row + len(tile), 2 * first_block : 2 * last_block]
+        return image, first_cycle, block, first_block * point_block, point_block
+
+
+def point_block_size(points: int, columns: int) -> int:
+    """Returns the number of points per block giving about the given number of columns once every block
+    is drawn as two columns (see decimate_points), 1 if there are no more points than columns
+
+    Args:
+        points (int): Number of points in view
+        columns (int): Number of columns wanted, e.g. the width of the view in pixels
+    """
+    wanted_block = max(points / max(columns // 2, 1), 1)
+    return 1 << int(np.floor(np.log2(wanted_block)))
+
+
+def decimate_points(tile: np.ndarray, first_point: int, last_point: int, block: int) -> tuple[np.ndarray, int]:
+    """Crops the rows of an image to a range of points and min/max decimates them along the points.
+    Every block of points becomes two columns, its minimum then its maximum, so narrow peaks and the baseline
+    between them both stay visible. Blocks start at multiples of their size, so they don't shift while panning
+
+    Args:
+        tile (np.ndarray): rows x points image, see CyclePyramid.get_tile
+        first_point (int): First point of the range
+        last_point (int): Last point of the range (exclusive)
+        block (int): Number of points per block, a power of two, see point_block_size. The points are returned as they are if 1
+
+    Returns:
+        tuple[np.ndarray, int]: rows x columns image and point of the first column
+    """
+    number_of_points = tile.shape[1]
+    first_point = min(max(first_point, 0), number_of_points)
+    last_point = min(max(last_point, first_point), number_of_points)
+    if block == 1 or last_point == first_point:
+        return tile[:, first_point:last_point], first_point
+
+    first_point = (first_point // block) * block
+    points = tile[:, first_point:last_point]
+    if points.shape[1] % block:  # The last block is padded with its last point, which changes neither its minimum nor maximum
+        points = np.concatenate([points, np.repeat(points[:, -1:], block - points.shape[1] % block, axis=1)], axis=1)
+
+    # Halves the blocks pairwise, much faster than reducing short blocks along the last axis
+    minima = np.minimum(points[:, 0::2], points[:, 1::2])
+    maxima = np.maximum(points[:, 0::2], points[:, 1::2])
+    for _ in range(int(np.log2(block)) - 1):
+        minima = np.minimum(minima[:, 0::2], minima[:, 1::2])
+        maxima = np.maximum(maxima[:, 0::2], maxima[:, 1::2])
+    return np.stack((minima, maxima), axis=2).reshape(len(tile), -1), first_point
+
+
+class SpectrumPyramid:
+    """
+    Min/max envelopes of a spectrum at power-of-two numbers of points per block, for drawing dense spectra
+    with about two points per pixel whatever the zoom
+
+    Blocks start at multiples of their size on the scan's mass grid (startMass + index / pointsPerAmu), so a block
+    always covers the same masses and the envelope doesn't shift while panning. Every level is built once,
+    in O(n) total, and get_view only slices the level matching the view (see block_size).
+
+    Args:
+        x (np.ndarray): Mass of every point, see RgaScan.amu_axis
+        y (np.ndarray): Intensity of every point
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+
+        # Block size -> (minima, maxima) of every block, each level built from the previous one
+        self.levels: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        minima, maxima = self.y, self.y
+        block = 1
+        while len(minima) > 1:
+            block *= 2
+            minima = decimate(minima, 2, reducer="min")
+            maxima = decimate(maxima, 2, reducer="max")
+            self.levels[block] = (minima, maxima)
+
+    def block_size(self, points: int, pixels: int) -> int:
+        """Returns the number of points per block of the level giving about two points per pixel
+
+        Args:
+            points (int): Number of points of the spectrum in view
+            pixels (int): Width of the view in pixels
+        """
+        wanted_block = max(points / max(pixels, 1), 1)
+        return min(1 << int(np.floor(np.log2(wanted_block))), max(self.levels, default=1))
+
+    def get_view(self, first_index: int, last_index: int, block: int) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the points in an index range at a level of the pyramid, see block_size
+
+        Args:
+            first_index (int): First point of the range
+            last_index (int): Last point of the range (exclusive)
+            block (int): Number of points per block of the level, 1 for the spectrum itself
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: x and y of the points to draw, every block is drawn as
+                its minimum then its maximum at the mass of its first point
+        """
+        first_index = min(max(first_index, 0), len(self.y))
+        last_index = min(max(last_index, first_index), len(self.y))
+        if block == 1:
+            return self.x[first_index:last_index], self.y[first_index:last_index]
+
+        first_block = first_index // block
+        last_block = -(-last_index // block)
+        minima, maxima = self.levels[block]
+        x = np.repeat(self.x[first_block * block : last_block * block : block], 2)
+        y = np.column_stack((minima[first_block:last_block], maxima[first_block:last_block])).reshape(-1)
+        return x, y
+
+    def get_bound_view(self, first_index: int, last_index: int, block: int, bound: str) -> tuple[np.ndarray, np.ndarray]:
+        """Returns one side of the points in an index range at a level of the pyramid, e.g. to draw an edge of an envelope
+
+        Args:
+            first_index (int): First point of the range
+            last_index (int): Last point of the range (exclusive)
+            block (int): Number of points per block of the level, 1 for the spectrum itself
+            bound (str): "min" or "max", the side of every block drawn
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: x and y of the points to draw, every block is drawn as its minimum
+                or maximum at the mass of its first point
+        """
+        if block == 1:
+            return self.get_view(first_index, last_index, block)
+
+        first_index = min(max(first_index, 0), len(self.y))
+        last_index = min(max(last_index, first_index), len(self.y))
+        first_block = first_index // block
+        last_block = -(-last_index // block)
+        minima, maxima = self.levels[block]
+        values = minima if bound == "min" else maxima
+        return self.x[first_block * block : last_block * block : block], values[first_block:last_block]
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import numpy as np
+from rgaScanClass import DECODER_VERSION, RgaScan, build_cycle_dtype
+from rgaProfiler import profiled
+
+CACHE_MAGIC = b"RGACACHE"
+CACHE_EXTENSION = ".rgacache"
+CACHE_ALIGNMENT = 64  # Every column starts on a 64 byte boundary of the cache file
+
+# Settings stored in the cache along with the columns of the scan, as attribute names of RgaScan
+CACHED_SETTINGS = ("f_identifier", "f_version", "is_single_precision", "pointsPerAmu", "scanRate", "startMass", "stopMass", "json_settings", "file_name", "file_path", "data_location", "step_data_sizes", "step_types", "step_settings")
+
+
+def default_cache_dir() -> str:
+    """Returns the cache location, set by the RGA_COMPARE_CACHE_DIR environment variable or the user's cache directory otherwise"""
+    if "RGA_COMPARE_CACHE_DIR" in os.environ:
+        return os.environ["RGA_COMPARE_CACHE_DIR"]
+    if sys.platform == "win32":
+        base_path = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        return os.path.join(base_path, "RGACompare", "cache")
+    base_path = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base_path, "rga_compare")
+
+
+class RgaScanCache:
+    """
+    Persistent on-disk cache of decoded RgaScans, so reopening a scan doesn't parse the .rgadata file again
+
+    Every entry is a single file holding a small JSON header (settings, column dtypes/shapes/offsets) followed by
+    the raw decoded arrays, which are memory-mapped back when the entry is loaded. Entries are keyed by the file path,
+    size, modification time and DECODER_VERSION, so any change to the file or decoder invalidates them. The least
+    recently used entries are evicted once the cache grows past its size cap.
+
+    Args:
+        cache_dir (str): Location of the cache entries, see default_cache_dir if None
+        max_size_bytes (int): Size cap of the cache, set by the RGA_COMPARE_CACHE_SIZE_MB environment variable or 2 GB otherwise
+    """
+
+    def __init__(self, cache_dir: str | None = None, max_size_bytes: int | None = None):
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        if max_size_bytes is None:
+            max_size_bytes = int(float(os.environ.get("RGA_COMPARE_CACHE_SIZE_MB", 2048)) * 1024**2)
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @profiled("cache.load")
+    def load(self, file_path: str) -> RgaScan:
+        """Returns the scan of a .rgadata file from the cache, decoding and caching it first if needed
+
+        A file that isn't cached yet is opened lazily and decoded into its cache entry one batch of cycles
+        at a time, so it is never held in memory as a whole
+
+        Args:
+            file_path (str): file location
+
+        Returns:
+            RgaScan: The scan, its arrays are memory-mapped from the cache entry
+        """
+        entry_path = self.entry_path(file_path)
+        scan = self.read_entry(entry_path)
+        if scan is None:
+            scan = RgaScan(file_path, lazy=True)
+            try:
+                self.store(scan, entry_path)
+            except OSError:  # Unwritable cache directory, full disk... the scan opens without being cached
+                return scan
+            scan = self.read_entry(entry_path) or scan  # The lazy scan if the entry was evicted straight away
+        return scan
+
+    def entry_path(self, file_path: str) -> str:
+        """Returns the location of the cache entry for the current state of a .rgadata file
+
+        The name of the entry is made of a hash of the file path followed by a hash of its size, modification time
+        and the decoder version, so entries of older versions of the same file can be found and removed
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        path_key = hashlib.sha1(os.path.normcase(file_path).encode("utf-8")).hexdigest()[:16]
+        state_key = hashlib.sha1(f"{stat.st_size}|{stat.st_mtime_ns}|{DECODER_VERSION}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{path_key}-{state_key}{CACHE_EXTENSION}")
+
+    def read_entry(self, entry_path: str) -> RgaScan | None:
+        """Rebuilds a scan from a cache entry, returns None if there is no valid entry. A damaged entry (e.g. cut short
+        by a crash or a full disk) is removed, so the file is decoded and cached again
+        """
+        try:
+            with open(entry_path, "rb") as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    raise ValueError("not a cache entry")
+                header_size = struct.unpack("<I", f.read(4))[0]
+                header = json.loads(f.read(header_size).decode("utf-8"))
+            if header["decoder_version"] != DECODER_VERSION:
+                return None
+
+            sizes = {}
+            for name, column in header["columns"].items():
+                sizes[name] = np.dtype(column["dtype"]).itemsize * int(np.prod(column["shape"]))
+            entry_size = max((column["offset"] + sizes[name] for name, column in header["columns"].items()), default=0)
+            if os.path.getsize(entry_path) < entry_size:
+                raise ValueError(f"cache entry is {os.path.getsize(entry_path)} bytes, its header needs {entry_size}")
+
+            data = np.memmap(entry_path, dtype=np.uint8, mode="r")
+            columns = {}
+            for name, column in header["columns"].items():
+                columns[name] = data[column["offset"] : column["offset"] + sizes[name]].view(np.dtype(column["dtype"])).reshape(column["shape"])
+
+            scan = RgaScan(lazy=True)
+            for name, value in header["settings"].items():
+                setattr(scan, name, value)
+            scan.f_identifier = bytes.fromhex(scan.f_identifier)
+            scan.cycle_dtype = build_cycle_dtype(scan.f_version, scan.step_data_sizes, header["cycle_size"], scan.step_types)
+            scan.set_columns(columns)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            remove_entry(entry_path)
+            return None
+
+        os.utime(entry_path)  # Marks the entry as recently used for the LRU eviction
+        return scan
+
+    def store(self, scan: RgaScan, entry_path: str):
+        """Writes a scan to a cache entry, replacing the entries of older versions of the same file.
+        The columns are written one batch of cycles at a time (see RgaScan.iter_cycles), a lazy scan is read from its file once
+
+        Raises:
+            OSError: If the entry couldn't be written, nothing is left in the cache then
+        """
+        settings = {name: getattr(scan, name) for name in CACHED_SETTINGS}
+        settings["f_identifier"] = settings["f_identifier"].hex()
+        relative_offsets = {}
+        offset = 0
+        for name, values in scan.columns.items():
+            relative_offsets[name] = offset
+            offset = align(offset + values.nbytes)
+
+        # The columns follow the header, whose size depends on the offsets written in it
+        data_offset = 0
+        while True:
+            columns = {}
+            for name, values in scan.columns.items():
+                columns[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": data_offset + relative_offsets[name]}
+            header = {"decoder_version": DECODER_VERSION, "settings": settings, "cycle_size": scan.cycle_dtype.itemsize, "columns": columns}
+            header_bytes = json.dumps(header).encode("utf-8")
+            header_end = align(len(CACHE_MAGIC) + 4 + len(header_bytes))
+            if header_end <= data_offset:
+                break
+            data_offset = header_end
+
+        temp_path = f"{entry_path}.{os.getpid()}-{threading.get_ident()}.tmp"  # Unique per writer, scans may be loaded concurrently
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(CACHE_MAGIC)
+                f.write(struct.pack("<I", len(header_bytes)))
+                f.write(header_bytes)
+                number_of_cycles = 0
+                for batch in scan.iter_cycles():
+                    for name, values in batch.columns.items():
+                        f.seek(columns[name]["offset"] + number_of_cycles * values[:1].nbytes)
+                        f.write(np.ascontiguousarray(values).tobytes())
+                    number_of_cycles += len(batch)
+            if number_of_cycles != len(scan.cycle_time_stamps()):  # The file was truncated while it was read
+                raise OSError(f"{scan.file_path} ended after {number_of_cycles} cycles while it was cached")
+            os.replace(temp_path, entry_path)  # Entries appear complete or not at all
+        finally:
+            remove_entry(temp_path)  # Left over if writing failed, e.g. on a full disk
+
+        self.remove_stale_entries(entry_path)
+        self.evict(keep=entry_path)
+
+    def remove_stale_entries(self, entry_path: str):
+        """Removes the entries of the same file with another size, modification time or decoder version"""
+        path_key = os.path.basename(entry_path).split("-")[0]
+        for name in os.listdir(self.cache_dir):
+            other_path = os.path.join(self.cache_dir, name)
+            if name.startswith(path_key + "-") and other_path != entry_path:
+                remove_entry(other_path)
+
+    def evict(self, keep: str | None = None):
+        """Removes the least recently used entries until the cache fits its size cap
+
+        Args:
+            keep (str): Location of an entry that is never evicted, e.g. the one just written
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(CACHE_EXTENSION):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:  # Removed by another writer in the meantime
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            entry_path = os.path.join(self.cache_dir, name)
+            if entry_path != keep and remove_entry(entry_path):
+                total_size -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(CACHE_EXTENSION):
+                remove_entry(os.path.join(self.cache_dir, name))
+
+
+def align(offset: int) -> int:
+    return -(-offset // CACHE_ALIGNMENT) * CACHE_ALIGNMENT
+
+
+def remove_entry(entry_path: str) -> bool:
+    """Removes a cache entry, returns False if it couldn't be (e.g. still memory-mapped on Windows)"""
+    try:
+        os.remove(entry_path)
+    except OSError:
+        return False
+    return True
@@ -16,10 +16,16 @@
 # python <directory>\dataFileReader.py "<data_directory>\<file_name>.rgadata"
 
 import os
+import mmap
 import struct
 import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterator
 import numpy as np
-from PySide6.QtCore import QObject, Signal
+from rgaPeaks import MassTable, concatenate_mass_tables, find_peaks
+from rgaStatistics import CycleAggregate, SpectrumAggregator
+from rgaProfiler import profiled
 
 
 def read_int(fd):
@@ -54,16 +60,202 @@ def read_boolean(fd):
 
 SKIP_STEP2_DATA = False
 
+MASS_TABLE_CHUNK = 4096  # Cycles searched for peaks at a time, bounds the memory used by mass_table
+ITER_CYCLES_CHUNK = 1024  # Cycles per batch of RgaScan.iter_cycles by default
+AGGREGATE_CHUNK = 512  # Cycles aggregated at a time, see RgaScan.aggregate
+MAX_AGGREGATES = 8  # Aggregates of cycle ranges kept per scan
+
+# Bump whenever the decoded scan data changes, so decoded scans cached on disk are invalidated
+DECODER_VERSION = 4
+
+# Kinds of scan steps
+SPECTRUM_STEP = "spectrum"  # Analog/Histogram scan
+PVST_STEP = "pvst"  # PvsT scan
+UNKNOWN_STEP = "unknown"  # Only its time stamp is decoded
+
+# Auxiliary signals stored at the start of every cycle (file version > 17)
+AUX_SIGNALS_DTYPE = np.dtype(
+    [
+        ("total_pressure", "<f4"),
+        ("rtd_temperature", "<f4"),
+        ("flange_temperature", "<f4"),
+        ("analog_Vin", "<f4"),
+        ("analog_Iin", "<f4"),
+        ("gpio_in", "<i4"),
+    ]
+)
+
+# Names of the auxiliary signals, used in the signal plot
+AUX_SIGNAL_NAMES = {
+    "total_pressure": "Total pressure (Torr)",
+    "rtd_temperature": "RTD temperature (°C)",
+    "flange_temperature": "Flange temperature (°C)",
+    "analog_Vin": "Analog Vin",
+    "analog_Iin": "Analog Iin",
+    "gpio_in": "GPIO input",
+}
+AUX_SIGNAL_MISSING = -1000.0  # Value RGASoft writes for an auxiliary signal that isn't measured
+
+
+def active_step_settings(json_settings: dict | None, number_of_steps: int) -> list[dict]:
+    """Returns the settings JSON "cfgs" entry of every active scan step, empty dicts where unknown"""
+    cfgs = [cfg for cfg in (json_settings or {}).get("cfgs", []) if not cfg.get("disabled", False)]
+    return [cfgs[step] if step < len(cfgs) else {} for step in range(number_of_steps)]
+
+
+def scan_step_types(step_settings: list[dict]) -> list[str]:
+    """Finds the kind of every scan step from its settings, a PvsT step is the one with a list of gases.
+    Steps without settings follow the RGASoft sample code: an Analog/Histogram scan then a PvsT scan
+    """
+    step_types = []
+    for step, cfg in enumerate(step_settings):
+        if "gases" in cfg:
+            step_types.append(PVST_STEP)
+        elif cfg:
+            step_types.append(SPECTRUM_STEP)
+        else:
+            step_types.append([SPECTRUM_STEP, PVST_STEP][step] if step < 2 else UNKNOWN_STEP)
+    return step_types
+
+
+def build_cycle_dtype(file_version: int, step_data_sizes: list[int], single_cycle_data_size: int, step_types: list[str] | None = None) -> np.dtype:
+    """Builds a structured dtype describing the byte layout of a single scan cycle
+
+    A cycle is made of the auxiliary signals (file version > 17) followed by the data of every step,
+    each step starting with its int64 time stamp:
+        Analog/Histogram scan - QVector of float (uint32 size + float values)
+        PvsT scan - N gases: N float values (N matches the "gases" list of the settings JSON)
+        Unknown steps are kept as raw bytes
+
+    Args:
+        file_version (int): Version of the .rgadata file
+        step_data_sizes (list[int]): Data size of the individual steps, from the metadata vector
+        single_cycle_data_size (int): Size of a single cycle, from the metadata vector
+        step_types (list[str]): Kind of every step (see scan_step_types), an Analog/Histogram scan then a PvsT scan if None
+
+    Raises:
+        ValueError: If the layout does not add up to the cycle size given in the metadata
+
+    Returns:
+        np.dtype: Packed structured dtype of one cycle
+    """
+    fields = []
+    if file_version > 17:
+        fields.append(("aux", AUX_SIGNALS_DTYPE))
+
+    if step_types is None:
+        step_types = scan_step_types([{}] * len(step_data_sizes))
+
+    for step, step_data_size in enumerate(step_data_sizes):
+        if step_types[step] == SPECTRUM_STEP:  # Analog/Histogram scan step
+            number_of_points = (step_data_size - 12) // 4
+            step_fields = [("time_stamp", "<i8"), ("vsize", "<u4"), ("signals", "<f4", (number_of_points,))]
+        elif step_types[step] == PVST_STEP:  # PvsT scan step
+            number_of_gases = (step_data_size - 8) // 4
+            step_fields = [("time_stamp", "<i8"), ("signals", "<f4", (number_of_gases,))]
+        else:
+            step_fields = [("time_stamp", "<i8"), ("payload", f"V{step_data_size - 8}")]
+        fields.append((f"step{step}", np.dtype(step_fields)))
+
+    cycle_dtype = np.dtype(fields)
+    if cycle_dtype.itemsize != single_cycle_data_size:
+        raise ValueError(f"Unsupported cycle layout: expected {single_cycle_data_size} bytes per cycle, got {cycle_dtype.itemsize}")
+
+    return cycle_dtype
+
+
+def map_data_block(file_path: str, cycle_dtype: np.dtype, data_location: int, number_of_cycles: int) -> np.ndarray:
+    """Memory-maps the data block of a .rgadata file as an array of cycle records (see build_cycle_dtype).
+    Nothing is read from disk until the records are accessed
+
+    Args:
+        file_path (str): Location of the .rgadata file
+        cycle_dtype (np.dtype): Structured dtype of a single cycle
+        data_location (int): Offset of the data block in the file
+        number_of_cycles (int): Number of complete cycles in the data block
+
+    Returns:
+        np.ndarray: Read-only memory-mapped array of cycle records
+    """
+    if number_of_cycles == 0:
+        return np.empty(0, dtype=cycle_dtype)  # np.memmap can't map an empty region
+
+    return np.memmap(file_path, dtype=cycle_dtype, mode="r", offset=data_location, shape=(number_of_cycles,))
+
+
+def is_memory_mapped(values: np.ndarray) -> bool:
+    """Returns whether an array is a view of a memory-mapped file, e.g. a column of a lazy or cached scan"""
+    base = values
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return True
+        base = base.base
+    return isinstance(base, mmap.mmap)
+
+
+def read_cycle_records(f, cycle_dtype: np.dtype, data_location: int, cycles: range) -> np.ndarray:
+    """Reads and decodes a range of cycles of a data block (see build_cycle_dtype).
+    Consecutive cycles are read in a single call, otherwise only the selected cycles are read
+
+    Args:
+        f (BinaryIO): The .rgadata file, opened in binary mode
+        cycle_dtype (np.dtype): Structured dtype of a single cycle
+        data_location (int): Offset of the data block in the file
+        cycles (range): Cycles to read, with a positive step
+
+    Returns:
+        np.ndarray: Cycle records, fewer than requested if the file ends early
+    """
+    cycle_size = cycle_dtype.itemsize
+    if cycles.step == 1:
+        f.seek(data_location + cycles.start * cycle_size)
+        buffer = f.read(len(cycles) * cycle_size)
+    else:
+        buffer = bytearray(len(cycles) * cycle_size)
+        view = memoryview(buffer)
+        for i, cycle in enumerate(cycles):
+            f.seek(data_location + cycle * cycle_size)
+            if f.readinto(view[i * cycle_size : (i + 1) * cycle_size]) < cycle_size:
+                buffer = buffer[: i * cycle_size]
+                break
+    return np.frombuffer(buffer, dtype=cycle_dtype, count=len(buffer) // cycle_size)
+
+
+class CycleBatch:
+    """
+    A batch of consecutive (or evenly spaced) cycles of a scan, see RgaScan.iter_cycles
+
+    Attributes:
+        cycles (np.ndarray): Index of every cycle of the batch in the scan
+        columns (dict[str, np.ndarray]): The columns of the batch, named as RgaScan.columns
+        time_stamps (np.ndarray): Time stamp (in ms from the start of the scan) of the first step of every cycle
+        spectra (np.ndarray): cycles x points spectra of the (first) Analog/Histogram step, no points if there is none
+        pvst (np.ndarray): cycles x gases signals of the (first) PvsT step, no gases if there is none
+        aux (dict[str, np.ndarray]): Auxiliary signals recorded in the scan (file version > 17), raw values
+    """
+
+    def __init__(self, cycles: np.ndarray, columns: dict[str, np.ndarray], spectrum_step: int | None, pvst_step: int | None):
+        self.cycles = cycles
+        self.columns = columns
+        self.time_stamps = columns.get("step0_time_stamp", np.empty(0, dtype=np.int64))
+        self.spectra = columns[f"step{spectrum_step}_signals"] if spectrum_step is not None else np.empty((len(cycles), 0), dtype=np.float32)
+        self.pvst = columns[f"step{pvst_step}_signals"] if pvst_step is not None else np.empty((len(cycles), 0), dtype=np.float32)
+        self.aux = {name: columns[name] for name in AUX_SIGNALS_DTYPE.names if name in columns}
+
+    def __len__(self) -> int:
+        return len(self.cycles)
+
 
 class RgaScan:
     """
     Class for handling the RGASoft scan data files
 
     Args:
-        filename (string): file location
+        filename (string): file location, an empty scan is created if None
+        lazy (bool): Memory-maps the data block instead of reading it, so only the cycles actually used are read from disk
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path=None, lazy=False):
         self.file_identifier = None
         self.file_version = None
         self.is_single_precision = None
@@ -75,9 +267,27 @@ class RgaScan:
         self.scanRate = None
         self.startMass = None
         self.stopMass = None
+        self.json_settings = None
+
+        # Data block layout
+        self.lazy = lazy
+        self.data_location = None
+        self.step_data_sizes = None
+        self.cycle_dtype = None
+        self.number_of_steps = None
+        self.step_types = None  # Kind of every scan step, see scan_step_types
+        self.step_settings = None  # Settings JSON "cfgs" entry of every scan step
 
         # Scan Data
-        self.time_stamps = None
+        # Every decoded value is kept in a table of typed columns, one per step field and auxiliary signal:
+        #   "<aux signal>", "step<N>_time_stamp" and "step<N>_signals" (cycles x points/gases)
+        # The attributes below are aliases to the columns
+        self.columns: dict[str, np.ndarray] = {}
+        self._column_buffers: dict[str, np.ndarray] = {}  # Growable buffers behind the columns of a followed scan, see append_scan_data
+        self._time_stamps = None
+        self._mass_table = None  # Peaks of the cycles searched so far, see mass_table
+        self._cycle_mass_table = None  # (cycle, peaks) of the last cycle searched on its own, see cycle_mass_table
+        self._aggregates = OrderedDict()  # Statistics of the cycle ranges aggregated most recently, see aggregate
         self.spectra = None
         self.pvst = None
         self.total_pressures = None
@@ -89,9 +299,12 @@ class RgaScan:
 
         self.colour = None  # Unique colour for gui purpouses
         self.file_name = None
+        self.file_path = None
 
-        self.load_scan_data(file_path)
+        if file_path is not None:
+            self.load_scan_data(file_path)
 
+    @profiled("scan.decode", counters=lambda _, scan, *args: {"bytes": len(scan.cycle_time_stamps()) * scan.cycle_dtype.itemsize, "cycles": len(scan.cycle_time_stamps())})
     def load_scan_data(self, file_path: str):
         """
         Loads in the entirety of the scan data and metadata for the RGASoft .rgadata filetype.
@@ -103,9 +316,9 @@ class RgaScan:
         Args:
             filename (string): file location
         """
+        self.file_path = os.path.abspath(file_path)
         self.file_name = os.path.basename(file_path)
         self.file_name = self.file_name.rstrip(".rgadata")
-        print(self.file_name)
         with open(file_path, "rb") as f:
             # File description - 32-byte string
             self.f_identifier = f.read(32)
@@ -148,91 +361,195 @@ class RgaScan:
             json_string = bytes.decode("utf-8")
             json_settings = json.loads(json_string)
             # print(json.dumps(json_settings, indent=4))
+            self.json_settings = json_settings
+
+            self.step_settings = active_step_settings(json_settings, len(step_data_sizes))
+            self.step_types = scan_step_types(self.step_settings)
+
+            # Mass range of the (first) Analog/Histogram scan step
+            spectrum_settings = next((cfg for cfg, step_type in zip(self.step_settings, self.step_types) if step_type == SPECTRUM_STEP), {})
+            self.pointsPerAmu = spectrum_settings.get("pointsPerAmu")
+            self.scanRate = spectrum_settings.get("scanRate")
+            self.startMass = spectrum_settings.get("startMass")
+            self.stopMass = spectrum_settings.get("stopMass")
+
+            # Every cycle has the same byte layout, so the whole data block is decoded in one shot
+            # as an array of structured records instead of value by value
+            cycle_dtype = build_cycle_dtype(self.f_version, step_data_sizes, single_cycle_data_size, self.step_types)
+            file_size = os.fstat(f.fileno()).st_size
+            number_of_cycles = max(0, min(number_of_cycles, (file_size - data_location) // cycle_dtype.itemsize))
+            self.data_location = data_location
+            self.step_data_sizes = step_data_sizes
+            self.cycle_dtype = cycle_dtype
+
+            if self.lazy:
+                records = map_data_block(file_path, cycle_dtype, data_location, number_of_cycles)
+            else:
+                # Skip to the scan data
+                f.seek(data_location)
+                bytes = f.read(number_of_cycles * cycle_dtype.itemsize)
+                records = np.frombuffer(bytes, dtype=cycle_dtype, count=number_of_cycles)
+
+        self.set_scan_data(records)
+
+    def set_scan_data(self, records: np.ndarray):
+        """Splits the decoded cycle records (see build_cycle_dtype) into the table of typed columns.
+        The columns are contiguous copies so the raw data block can be freed, or zero-copy views
+        into the memory-mapped data block for a lazy scan
+
+        Args:
+            records (np.ndarray): Structured array holding one record per cycle
+        """
+        columns = self.record_columns(records)
+        if not self.lazy:
+            columns = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        self._column_buffers = {}
+        self.set_columns(columns)
+
+    def record_columns(self, records: np.ndarray) -> dict[str, np.ndarray]:
+        """Returns the columns (see self.columns) of decoded cycle records, as views into the records"""
+        columns = {}
+
+        # Auxiliary signals
+        if "aux" in records.dtype.names:
+            for name in AUX_SIGNALS_DTYPE.names:
+                columns[name] = records["aux"][name]
+
+        # Step data
+        for step, step_type in enumerate(self.step_types):
+            if SKIP_STEP2_DATA and step > 0:
+                break
+            columns[f"step{step}_time_stamp"] = records[f"step{step}"]["time_stamp"]
+            if step_type != UNKNOWN_STEP:
+                columns[f"step{step}_signals"] = records[f"step{step}"]["signals"]
+        return columns
+
+    @profiled("scan.decode_new_cycles", counters=lambda new_cycles, scan: {"bytes": new_cycles * scan.cycle_dtype.itemsize, "cycles": new_cycles})
+    def read_new_cycles(self) -> int:
+        """Decodes the complete cycles appended to the file since it was last read, to follow a scan
+        RGASoft is still writing. Only the new bytes are read, from the offset of the first new cycle,
+        and a partially written cycle is left for the next call
+
+        A lazy scan maps the longer data block again (nothing is copied), otherwise the new cycles are
+        appended to the columns, see append_scan_data
+
+        Returns:
+            int: Number of new cycles
+        """
+        cycle_size = self.cycle_dtype.itemsize
+        number_of_cycles = len(self.cycle_time_stamps())
+        with open(self.file_path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            complete_cycles = max(0, (file_size - self.data_location) // cycle_size)
+            if complete_cycles <= number_of_cycles:
+                return 0
+
+            if self.lazy:
+                self.set_scan_data(map_data_block(self.file_path, self.cycle_dtype, self.data_location, complete_cycles))
+                return complete_cycles - number_of_cycles
+
+            f.seek(self.data_location + number_of_cycles * cycle_size)
+            bytes = f.read((complete_cycles - number_of_cycles) * cycle_size)
+
+        records = np.frombuffer(bytes, dtype=self.cycle_dtype, count=len(bytes) // cycle_size)
+        self.append_scan_data(records)
+        return len(records)
+
+    def append_scan_data(self, records: np.ndarray):
+        """Appends decoded cycle records to the columns. Every column lives in a buffer with spare rows
+        whose capacity doubles when full, so appending a few cycles copies only those cycles
+        (amortized constant time per cycle) instead of reallocating the whole scan
+
+        Args:
+            records (np.ndarray): Structured array holding one record per new cycle
+        """
+        new_columns = self.record_columns(records)
+        number_of_cycles = len(self.cycle_time_stamps())
+        total_cycles = number_of_cycles + len(records)
+
+        columns = {}
+        for name, values in new_columns.items():
+            buffer = self._column_buffers.get(name)
+            if buffer is None or len(buffer) < total_cycles:
+                capacity = max(2 * total_cycles, 64)
+                grown = np.empty((capacity,) + values.shape[1:], dtype=values.dtype)
+                if name in self.columns:
+                    grown[:number_of_cycles] = self.columns[name][:number_of_cycles]
+                buffer = self._column_buffers[name] = grown
+            buffer[number_of_cycles:total_cycles] = values
+            columns[name] = buffer[:total_cycles]
+        self.set_columns(columns)
+
+    def set_columns(self, columns: dict[str, np.ndarray]):
+        """Populates the scan data attributes from a table of columns (see self.columns)
+
+        Args:
+            columns (dict[str, np.ndarray]): The columns, step_types must already be set
+        """
+        self.columns = columns
+        self.number_of_steps = sum(1 for name in columns if name.endswith("_time_stamp"))
+        self._time_stamps = None  # Gathered on first use, see time_stamps
+        number_of_cycles = len(columns["step0_time_stamp"]) if "step0_time_stamp" in columns else 0
+
+        # Analog/Histogram scan step
+        spectrum_step = self.first_step(SPECTRUM_STEP)
+        if spectrum_step is not None:
+            self.spectra = columns[f"step{spectrum_step}_signals"]
+        else:
+            self.spectra = np.empty((number_of_cycles, 0), dtype=np.float32)
+
+        # PvsT scan step
+        pvst_step = self.first_step(PVST_STEP)
+        if pvst_step is not None:
+            self.pvst = columns[f"step{pvst_step}_signals"]
+        else:
+            self.pvst = np.empty((0, 0), dtype=np.float32)
+
+        # Auxiliary signals
+        aux = {name: columns.get(name, np.empty(0, dtype=AUX_SIGNALS_DTYPE[name])) for name in AUX_SIGNALS_DTYPE.names}
+        self.total_pressures = aux["total_pressure"]
+        self.rtd_temperatures = aux["rtd_temperature"]
+        self.flange_temperatures = aux["flange_temperature"]
+        self.analog_Vin_signals = aux["analog_Vin"]
+        self.analog_Iin_signals = aux["analog_Iin"]
+        self.gpio_in_signals = aux["gpio_in"]
+
+    def first_step(self, step_type: str) -> int | None:
+        """Returns the index of the first decoded step of a kind, None if there is none"""
+        for step in range(self.number_of_steps):
+            if self.step_types[step] == step_type and f"step{step}_signals" in self.columns:
+                return step
+        return None
+
+    def nbytes(self) -> int:
+        """Returns the size of the decoded scan data in bytes"""
+        return sum(values.nbytes for values in self.columns.values())
+
+    def resident_nbytes(self) -> int:
+        """Returns the size of the scan data held in memory in bytes. Unlike nbytes, memory-mapped columns count
+        nothing (the OS pages them in and out) and columns read on demand, e.g. a ChunkedColumn, only count what they keep decoded
+        """
+        total = 0
+        for values in self.columns.values():
+            if not isinstance(values, np.ndarray):
+                total += values.resident_nbytes()
+            elif not is_memory_mapped(values):
+                total += values.nbytes
+        return total
+
+    @property
+    def time_stamps(self) -> np.ndarray:
+        """Time stamps (in ms) of every step, in the order they appear in the file.
+        Gathered from the columns on first use, since it touches every cycle of a memory-mapped scan
+        """
+        if self._time_stamps is None and self.number_of_steps is not None:
+            time_stamps = [self.columns[f"step{step}_time_stamp"] for step in range(self.number_of_steps)]
+            self._time_stamps = np.stack(time_stamps, axis=1).reshape(-1) if time_stamps else np.empty(0, dtype=np.int64)
+        return self._time_stamps
 
-            self.pointsPerAmu = json_settings["cfgs"][0]["pointsPerAmu"]
-            self.scanRate = json_settings["cfgs"][0]["scanRate"]
-            self.startMass = json_settings["cfgs"][0]["startMass"]
-            self.stopMass = json_settings["cfgs"][0]["stopMass"]
-
-            # Skip to the scan data
-            f.seek(data_location)
-
-            self.time_stamps = []
-            self.spectra = []
-            self.pvst = []
-            self.total_pressures = []
-            self.rtd_temperatures = []
-            self.flange_temperatures = []
-            self.analog_Vin_signals = []
-            self.analog_Iin_signals = []
-            self.gpio_in_signals = []
-            for cycle in range(number_of_cycles):
-
-                # Auxiliary signals
-                if self.f_version > 17:
-                    # Total pressure
-                    total_pressure = read_float(f)
-                    self.total_pressures.append(total_pressure)
-
-                    # RTD temperature
-                    rtd_t = read_float(f)
-                    self.rtd_temperatures.append(rtd_t)
-
-                    # Flange temperature
-                    flange_t = read_float(f)
-                    self.flange_temperatures.append(flange_t)
-
-                    # Analog Vin
-                    analog_Vin = read_float(f)
-                    self.analog_Vin_signals.append(analog_Vin)
-
-                    # Analog Iin
-                    analog_Iin = read_float(f)
-                    self.analog_Iin_signals.append(analog_Iin)
-
-                    # GPIO input
-                    gpio_in = read_int(f)
-                    self.gpio_in_signals.append(gpio_in)
-
-                # Step data
-                for step in range(len(step_data_sizes)):
-                    # print('Step ', step + 1)
-                    # Time stamp
-                    time_stamp = read_int64(f)  # in ms
-                    # print('Time stamp =', time_stamp, 'ms')
-                    self.time_stamps.append(time_stamp)
-
-                    if step == 0:  # Analog/Histogram scan step
-                        # Signal intensities - QVector of float
-                        vsize = read_uint(f)  # vsize = ((stop_mass - start_mass) / points_per_amu) + 1
-                        # print('vsize (number of data points) =', vsize)
-                        bytes = f.read(vsize * 4)
-                        scan_signals = []
-                        scan_signals = [struct.unpack("f", bytes[4 * i : 4 * i + 4])[0] for i in range(vsize)]
-                        self.spectra.append(scan_signals)
-                        # print('Spectrum signals =', scan_signals)
-                    elif step == 1:  # PvsT scan step
-                        # Extract the number of gases from JSON
-                        json_step2 = json_settings["cfgs"][1]
-                        json_gases = json_step2["gases"]
-                        n_gases = len(json_gases)
-                        # print('PvsT number of gases =', n_gases)
-                        # print('PvsT gases =', json_gases)
-                        # Signal intensities - N gases: N float values
-                        scan_signals = []
-                        bytes = f.read(n_gases * 4)
-                        scan_signals = [struct.unpack("f", bytes[4 * i : 4 * i + 4])[0] for i in range(n_gases)]
-                        self.pvst.append(scan_signals)
-                        # print('PvsT signals =', scan_signals)
-
-                    if SKIP_STEP2_DATA:
-                        # Skip next step's data
-                        second_step_data_size = step_data_sizes[1]
-                        f.seek(second_step_data_size, 1)  # skip N bytes from the current file position
-                        break
-
-            # Makes scan spectra into np array for easier usage
-            self.spectra = np.asarray(self.spectra)
+    @time_stamps.setter
+    def time_stamps(self, time_stamps: np.ndarray):
+        self._time_stamps = time_stamps
 
     def amu_axis(self) -> np.ndarray:
         """Creates the x axis data for an AMU vs. y Plot
@@ -249,66 +566,248 @@ class RgaScan:
         return len(self.spectra) - 1
 
     def get_cycle(self, index: int) -> np.ndarray:
+        """Returns a copy of the spectrum of a single cycle, only that cycle is read for a lazy scan"""
         return np.array(self.spectra[index])
 
-    # def torr_axis(self, index: int):
-    #     """Returns the torr_array of a specific index, """
+    def iter_cycles(self, start: int | None = None, stop: int | None = None, step: int = 1, chunk: int = ITER_CYCLES_CHUNK) -> Iterator[CycleBatch]:
+        """Yields the cycles of the scan in batches, so a whole scan can be processed in bounded memory,
+        e.g. for statistics over acquisitions larger than RAM:
 
+            scan = RgaScan(file_path, lazy=True)  # Only the header is read
+            for batch in scan.iter_cycles(chunk=4096):
+                maxima = np.maximum(maxima, batch.spectra.max(axis=0))
 
-class RgaScanList(QObject):
+        A lazy scan reads its data block sequentially from the file, one batch at a time, so at most one batch
+        is held in memory. The batches of a scan decoded in memory are views into its columns (not copies)
 
-    scan_added = Signal(object)
-    scan_removed = Signal(object)
+        Args:
+            start (int): First cycle, negative indices count from the last cycle, the first cycle if None
+            stop (int): Cycle the iteration stops before, the end of the scan if None
+            step (int): Cycles between two yielded cycles, at least 1
+            chunk (int): Cycles per batch, the last batch may be shorter
 
-    def __init__(self):
-        super().__init__()
+        Raises:
+            ValueError: If step or chunk is below 1
 
-        self.scan_files = []
+        Yields:
+            CycleBatch: The next batch of cycles, the cycles decoded when the iteration started are yielded
+        """
+        if step < 1 or chunk < 1:
+            raise ValueError(f"step and chunk must be at least 1, got {step} and {chunk}")
+        cycles = range(len(self.cycle_time_stamps()))[start:stop:step]
+        spectrum_step = self.first_step(SPECTRUM_STEP)
+        pvst_step = self.first_step(PVST_STEP)
+
+        if not self.lazy:
+            for first in range(0, len(cycles), chunk):
+                batch_cycles = cycles[first : first + chunk]
+                selection = slice(batch_cycles.start, batch_cycles.stop, batch_cycles.step)
+                yield CycleBatch(np.asarray(batch_cycles), {name: values[selection] for name, values in self.columns.items()}, spectrum_step, pvst_step)
+            return
+
+        with open(self.file_path, "rb") as f:
+            for first in range(0, len(cycles), chunk):
+                batch_cycles = cycles[first : first + chunk]
+                records = read_cycle_records(f, self.cycle_dtype, self.data_location, batch_cycles)
+                if len(records) == 0:
+                    return
+                yield CycleBatch(np.asarray(batch_cycles[: len(records)]), self.record_columns(records), spectrum_step, pvst_step)
+                if len(records) < len(batch_cycles):  # The file was truncated
+                    return
+
+    def cycle_time_stamps(self) -> np.ndarray:
+        """Returns the time stamp (in ms from the start of the scan) of the first step of every cycle"""
+        return self.columns.get("step0_time_stamp", np.empty(0, dtype=np.int64))
+
+    def signal_channels(self) -> dict[str, str]:
+        """Returns the auxiliary signals and PvsT gases recorded in the scan, see signal
 
-        self.plot_colours = [
-            "#1f77b4",  # blue
-            "#ff7f0e",  # orange
-            "#2ca02c",  # green
-            "#d62728",  # red
-            "#9467bd",  # purple
-            "#8c564b",  # brown
-            "#e377c2",  # pink
-            "#7f7f7f",  # gray
-            "#bcbd22",  # olive
-            "#17becf",  # cyan
-            "#aec7e8",  # light blue
-            "#ffbb78",  # light orange
-        ]
-        self.available_plot_colours = self.plot_colours.copy()
+        Returns:
+            dict[str, str]: Channel -> display name, PvsT gases are "pvst:<mass>" channels
+        """
+        channels = {name: label for name, label in AUX_SIGNAL_NAMES.items() if name in self.columns}
+        for step in range(self.number_of_steps or 0):
+            if self.step_types[step] == PVST_STEP and f"step{step}_signals" in self.columns:
+                for mass, name in self.pvst_gases(step):
+                    channels[f"pvst:{mass:g}"] = f"PvsT m/z {mass:g} - {name} (Torr)"
+        return channels
+
+    def pvst_gases(self, step: int) -> list[tuple[float, str]]:
+        """Returns the (mass, name) of every gas recorded by a PvsT step, in the order of its signals"""
+        number_of_gases = self.columns[f"step{step}_signals"].shape[1]
+        gases = self.step_settings[step].get("gases", []) if self.step_settings else []
+        if len(gases) != number_of_gases:
+            gases = [gas for gas in gases if not gas.get("disabled", False)]
+        if len(gases) != number_of_gases:
+            return [(float(i + 1), f"Gas {i + 1}") for i in range(number_of_gases)]
+        return [(float(gas["mass"]), gas.get("name", "")) for gas in gases]
+
+    def signal(self, channel: str) -> tuple[np.ndarray, np.ndarray]:
+        """Returns an auxiliary signal or a PvsT gas over every cycle, see signal_channels
 
-    def add_scan(self, scan: RgaScan):
-        """Adds a scan to the internal list and emits a signal to update Plot and GUI elements
+        Args:
+            channel (str): The channel, e.g. "total_pressure" or "pvst:28"
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Time stamps (in ms from the start of the scan) and values, NaN where not measured
+        """
+        if channel in AUX_SIGNAL_NAMES:
+            values = np.asarray(self.columns[channel], dtype=np.float64)
+            if channel != "gpio_in":
+                values = np.where(values <= AUX_SIGNAL_MISSING, np.nan, values)
+            return self.cycle_time_stamps(), values
+
+        mass = float(channel.split(":")[1])
+        for step in range(self.number_of_steps):
+            if self.step_types[step] == PVST_STEP and f"step{step}_signals" in self.columns:
+                for i, (gas_mass, _) in enumerate(self.pvst_gases(step)):
+                    if gas_mass == mass:
+                        return self.columns[f"step{step}_time_stamp"], np.asarray(self.columns[f"step{step}_signals"][:, i], dtype=np.float64)
+        raise KeyError(f"Channel not recorded in the scan: {channel}")
+
+    def start_time(self) -> float | None:
+        """Returns the start of the scan as a POSIX timestamp (in s), from the schedule in the settings JSON
+
+        Returns:
+            float | None: The start time, None if the settings don't have one
+        """
+        try:
+            start_time = self.json_settings["schedule"]["scanStartTime"]
+        except (KeyError, TypeError):
+            return None
+        return datetime.fromisoformat(start_time.replace("Z", "+00:00")).timestamp()
+
+    def mass_trend(self, masses: list[float], window: float = 0.5, reducer: str = "peak", cycles: slice | None = None) -> np.ndarray:
+        """Extracts the intensity of masses over every cycle of the scan
+
+        The columns of every mass window are gathered from the spectra in a single pass, then reduced per
+        window with ufunc.reduceat, so nothing loops over the cycles in Python
 
         Args:
-            scan (RgaScan): The RgaScan object of the newly added scan
+            masses (list[float]): Masses to extract (in AMU)
+            window (float): Half width of the window around each mass (in AMU)
+            reducer (str): "peak" for the highest intensity in the window, "integral" for the area under the window (Torr * AMU)
+            cycles (slice): Cycles to extract, e.g. slice(-1, None) for the last one, every cycle if None
+
+        Returns:
+            np.ndarray: cycles x masses intensities, NaN for masses outside of the scanned range
+        """
+        spectra = self.spectra if cycles is None else self.spectra[cycles]
+        number_of_points = spectra.shape[1]
+        trends = np.full((len(spectra), len(masses)), np.nan)
+        if spectra.size == 0:
+            return trends
+
+        # Index range of the points in every window, a small tolerance keeps points right on the window edge
+        first_indices = np.ceil((np.asarray(masses, dtype=float) - window - self.startMass) * self.pointsPerAmu - 1e-6).astype(int)
+        last_indices = np.floor((np.asarray(masses, dtype=float) + window - self.startMass) * self.pointsPerAmu + 1e-6).astype(int)
+        first_indices = np.maximum(first_indices, 0)
+        last_indices = np.minimum(last_indices, number_of_points - 1)
+        in_range = first_indices <= last_indices
+        if not np.any(in_range):
+            return trends
+
+        # Windows laid out one after the other, so each one is a segment for reduceat
+        window_columns = np.concatenate([np.arange(first, last + 1) for first, last in zip(first_indices[in_range], last_indices[in_range])])
+        segment_starts = np.concatenate([[0], np.cumsum(last_indices[in_range] - first_indices[in_range] + 1)[:-1]])
+        window_values = np.asarray(spectra[:, window_columns], dtype=np.float64)
+
+        if reducer == "peak":
+            trends[:, in_range] = np.maximum.reduceat(window_values, segment_starts, axis=1)
+        elif reducer == "integral":
+            trends[:, in_range] = np.add.reduceat(window_values, segment_starts, axis=1) / self.pointsPerAmu
+        else:
+            raise ValueError(f"Unknown reducer: {reducer}")
+        return trends
+
+    @profiled("scan.mass_table")
+    def mass_table(self) -> MassTable | None:
+        """Returns the peaks and nominal mass integrals of every cycle, see rgaPeaks.find_peaks
+
+        The cycles are searched in chunks the first time, then only the cycles appended since
+        (e.g. while following the file), the cycles already searched never change
+
+        Returns:
+            MassTable | None: The mass table, None if the scan has no Analog/Histogram step
         """
-        # Repopulates available plot colours if ever exausted
-        if not self.available_plot_colours:
-            self.available_plot_colours = self.plot_colours.copy()
+        if self.spectra.shape[1] == 0:
+            return None
+
+        number_of_cycles = len(self.spectra)
+        tables = [] if self._mass_table is None else [self._mass_table]
+        first_cycle = 0 if self._mass_table is None else len(self._mass_table.heights)
+        if self._mass_table is not None and first_cycle == number_of_cycles:
+            return self._mass_table
+
+        for batch in self.iter_cycles(first_cycle, number_of_cycles, chunk=MASS_TABLE_CHUNK):
+            tables.append(find_peaks(batch.spectra, self.startMass, self.pointsPerAmu))
+        if not tables:  # No cycles at all
+            tables.append(find_peaks(self.spectra[:0], self.startMass, self.pointsPerAmu))
+        self._mass_table = concatenate_mass_tables(tables)
+        return self._mass_table
+
+    def cycle_mass_table(self, index: int) -> MassTable | None:
+        """Returns the peaks of a single cycle, taken from mass_table if it was already built,
+        otherwise only that cycle is searched, e.g. to show the plotted cycle without searching the whole scan
 
-        # Allocates a colour to the new scan
-        gui_colour = self.available_plot_colours.pop(0)
-        scan.colour = gui_colour
+        Returns:
+            MassTable | None: Mass table of the cycle, None if the scan has no Analog/Histogram step
+        """
+        if self.spectra.shape[1] == 0:
+            return None
+        index = range(len(self.spectra))[index]  # Negative indices count from the last cycle
 
-        self.scan_files.append(scan)
-        self.scan_added.emit(scan)  # Emits signal to update Plot and GUI
+        if self._mass_table is not None and index < len(self._mass_table.heights):
+            return self._mass_table.select(slice(index, index + 1))
+        if self._cycle_mass_table is None or self._cycle_mass_table[0] != index:
+            self._cycle_mass_table = (index, find_peaks(self.spectra[index : index + 1], self.startMass, self.pointsPerAmu))
+        return self._cycle_mass_table[1]
 
-    def remove_scan(self, scan: RgaScan):
+    @profiled("scan.aggregate")
+    def aggregate(self, start: int | None = None, stop: int | None = None, quantiles: tuple[float, ...] = (0.5,)) -> CycleAggregate | None:
+        """Returns point by point statistics (mean, standard deviation, min, max and quantiles) of the spectra
+        of a range of cycles, computed in bounded memory over chunks of cycles (see rgaStatistics.SpectrumAggregator)
 
-        self.available_plot_colours.insert(0, scan.colour)  # Frees up colour by adding back to pool for reassignment
-        self.scan_files.remove(scan)
-        self.scan_removed.emit(scan)  # Emits signal to update Plot and GUI
+        The most recent ranges are cached. A range running to the end of the scan only aggregates the cycles
+        appended since it was last computed, e.g. while following the file
 
-    def get_scan(self, index: int) -> RgaScan:
-        return self.scan_files[index]
+        Args:
+            start (int): First cycle, negative indices count from the last cycle, the first cycle if None
+            stop (int): Cycle the range stops before, the end of the scan if None
+            quantiles (tuple[float, ...]): Quantiles to compute (0 to 1), e.g. (0.05, 0.5, 0.95)
 
-    def number_of_scans(self) -> int:
-        return len(self.scan_files)
+        Returns:
+            CycleAggregate | None: The statistics, None if the scan has no Analog/Histogram step or the range is empty
+        """
+        if self.spectra.shape[1] == 0:
+            return None
+        number_of_cycles = len(self.spectra)
+        cycles = range(number_of_cycles)[start:stop]
+        open_ended = stop is None and (start is None or start >= 0)  # Keeps its first cycle as cycles are appended
+        key = (cycles.start, None if open_ended else cycles.stop, tuple(quantiles))
+
+        aggregator, aggregate = self._aggregates.get(key, (None, None))
+        if aggregate is not None and aggregate.last_cycle == cycles.stop:
+            self._aggregates.move_to_end(key)
+            return aggregate
+
+        if aggregator is None:
+            aggregator = SpectrumAggregator(self.spectra.shape[1], quantiles)
+            first_cycle = cycles.start
+        else:
+            first_cycle = aggregate.last_cycle
+        for batch in self.iter_cycles(first_cycle, cycles.stop, chunk=AGGREGATE_CHUNK):
+            aggregator.add(batch.spectra)
+        aggregate = aggregator.result(cycles.start, cycles.stop)
+        if aggregate is None:
+            return None
+
+        # Only ranges that can still grow keep their aggregator, the others just their result
+        self._aggregates[key] = (aggregator if open_ended else None, aggregate)
+        self._aggregates.move_to_end(key)
+        while len(self._aggregates) > MAX_AGGREGATES:
+            self._aggregates.popitem(last=False)
+        return aggregate
 
-    def __len__(self) -> int:
-        return len(self.scan_files)
+    # def torr_axis(self, index: int):
+    #     """Returns the torr_array of a specific index, """
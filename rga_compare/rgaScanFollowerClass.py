@@ -0,0 +1,73 @@
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+from rgaScanClass import RgaScan
+
+
+class RgaScanFollower(QObject):
+    """Follows .rgadata files that RGASoft is still writing, the cycles appended to a followed scan's file
+    are decoded as they come in (see RgaScan.read_new_cycles)
+
+    Changes are picked up from a QFileSystemWatcher, and by polling since the watcher doesn't report every
+    append on all platforms (e.g. network drives, or a file kept open by the writer)
+
+    Args:
+        poll_interval (int): Time between two checks of the followed files (in ms)
+    """
+
+    cycles_appended = Signal(object, int)  # RgaScan, number of new cycles
+
+    def __init__(self, poll_interval: int = 1000):
+        super().__init__()
+
+        self.scans: dict[str, list[RgaScan]] = {}  # Followed scans by file path
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(poll_interval)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def follow(self, scan: RgaScan):
+        """Starts following a scan, the cycles written since it was loaded are read right away"""
+        if self.is_following(scan):
+            return
+
+        self.scans.setdefault(scan.file_path, []).append(scan)
+        self.watcher.addPath(scan.file_path)
+        self.poll_timer.start()
+        self.read_new_cycles(scan)
+
+    def unfollow(self, scan: RgaScan):
+        if not self.is_following(scan):
+            return
+
+        self.scans[scan.file_path].remove(scan)
+        if not self.scans[scan.file_path]:
+            del self.scans[scan.file_path]
+            self.watcher.removePath(scan.file_path)
+        if not self.scans:
+            self.poll_timer.stop()
+
+    def is_following(self, scan: RgaScan) -> bool:
+        return scan in self.scans.get(scan.file_path, [])
+
+    def on_file_changed(self, file_path: str):
+        # Some writers replace the file, which drops it from the watcher
+        if file_path not in self.watcher.files():
+            self.watcher.addPath(file_path)
+
+        for scan in list(self.scans.get(file_path, [])):
+            self.read_new_cycles(scan)
+
+    def poll(self):
+        for scans in list(self.scans.values()):
+            for scan in list(scans):
+                self.read_new_cycles(scan)
+
+    def read_new_cycles(self, scan: RgaScan):
+        try:
+            new_cycles = scan.read_new_cycles()
+        except OSError:
+            return  # e.g. the file is briefly locked by RGASoft, tried again on the next change
+        if new_cycles:
+            self.cycles_appended.emit(scan, new_cycles)
@@ -0,0 +1,265 @@
+import contextlib
+import multiprocessing
+import os
+import sqlite3
+import sys
+import numpy as np
+from rgaScanClass import RgaScan
+
+# Bump whenever the indexed summaries change, so older indexes are rebuilt
+INDEX_VERSION = 1
+
+INDEX_BATCH = 256  # Files summarized between two commits of the index, an interrupted update keeps the files done
+MIN_FILES_PER_WORKER = 8  # Fewer changed files than this per worker are summarized without starting a pool
+
+# Header fields indexed for every file, as SQLite column -> type
+SCAN_COLUMNS = {
+    "path": "TEXT",
+    "size": "INTEGER",
+    "mtime_ns": "INTEGER",
+    "error": "TEXT",
+    "file_version": "INTEGER",
+    "points_per_amu": "REAL",
+    "scan_rate": "REAL",
+    "start_mass": "REAL",
+    "stop_mass": "REAL",
+    "cycles": "INTEGER",
+    "step_types": "TEXT",
+    "start_time": "REAL",
+    "duration": "REAL",
+}
+
+
+def default_index_path() -> str:
+    """Returns the index location, set by the RGA_COMPARE_INDEX environment variable or the user's data directory otherwise"""
+    if "RGA_COMPARE_INDEX" in os.environ:
+        return os.environ["RGA_COMPARE_INDEX"]
+    if sys.platform == "win32":
+        base_path = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "RGACompare")
+    else:
+        base_path = os.path.join(os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share")), "rga_compare")
+    return os.path.join(base_path, "scan_index.sqlite")
+
+
+def find_scan_files(directory: str) -> list[str]:
+    """Returns every .rgadata file under a directory, sorted by path"""
+    file_paths = []
+    for root, _, file_names in os.walk(directory):
+        file_paths.extend(os.path.join(root, file_name) for file_name in file_names if file_name.lower().endswith(".rgadata"))
+    return sorted(file_paths)
+
+
+def index_file(file_path: str) -> tuple[dict, list[tuple[float, float]]]:
+    """Summarizes a .rgadata file for the index, runs in the worker processes. Only the header and the last cycle are read.
+    A file that can't be read gets a summary with only its error filled in
+
+    Returns:
+        tuple[dict, list[tuple[float, float]]]: Header fields (see SCAN_COLUMNS) and (nominal mass, height) of every peak of the last cycle
+    """
+    stat = os.stat(file_path)
+    summary = {"path": os.path.abspath(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "error": None}
+    try:
+        scan = RgaScan(file_path, lazy=True)
+        time_stamps = scan.cycle_time_stamps()
+        summary.update(
+            file_version=scan.f_version,
+            points_per_amu=scan.pointsPerAmu,
+            scan_rate=scan.scanRate,
+            start_mass=scan.startMass,
+            stop_mass=scan.stopMass,
+            cycles=len(time_stamps),
+            step_types=",".join(scan.step_types),
+            start_time=scan.start_time(),
+            duration=float(time_stamps[-1] - time_stamps[0]) / 1000 if len(time_stamps) else None,
+        )
+        mass_table = scan.cycle_mass_table(-1) if len(time_stamps) else None
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+        return summary, []
+
+    peaks = []
+    if mass_table is not None:
+        heights = mass_table.heights[0]
+        found = np.flatnonzero(np.isfinite(heights))
+        peaks = [(float(mass_table.nominal_masses[i]), float(heights[i])) for i in found]
+    return summary, peaks
+
+
+class RgaScanIndex:
+    """
+    SQLite index of the .rgadata files of an archive, so they can be searched by metadata (mass range, points per AMU,
+    scan rate, cycle count, file version, step types) and by the peaks of their last cycle without being opened
+
+    Every file gets one row of header fields, read without decoding the data block, and one row per nominal mass peak
+    of its last cycle. Files are only summarized again when their size or modification time changed, see update
+
+    Args:
+        index_path (str): Location of the SQLite database, see default_index_path if None
+    """
+
+    def __init__(self, index_path: str | None = None):
+        self.index_path = index_path if index_path is not None else default_index_path()
+        if self.index_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.index_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if self.index_path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")  # Searches aren't blocked while an update is written
+        self.create_tables()
+
+    def create_tables(self):
+        """Creates the tables, dropping those of an older index version"""
+        with self.connection:
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS peaks")
+                self.connection.execute("DROP TABLE IF EXISTS scans")
+            columns = ", ".join(f"{name} {column_type}" for name, column_type in SCAN_COLUMNS.items() if name != "path")
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS scans (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, {columns})")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS peaks (scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE, mass REAL NOT NULL, height REAL NOT NULL, PRIMARY KEY (scan_id, mass)) WITHOUT ROWID")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS peaks_by_height ON peaks (mass, height)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS scans_by_mass_range ON scans (start_mass, stop_mass)")
+            self.connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+
+    def update(self, directory: str, workers: int | None = None, progress=None) -> tuple[int, int, int]:
+        """Brings the index up to date with the .rgadata files under a directory: new and modified files are summarized
+        (see index_file), in a pool of worker processes when there are many, and files that are gone are dropped
+
+        Args:
+            directory (str): Directory searched recursively for .rgadata files
+            workers (int): Number of worker processes, one per core if None
+            progress (Callable[[int, int], None]): Called with the number of files summarized and to summarize
+
+        Returns:
+            tuple[int, int, int]: Number of files summarized, files dropped and files that couldn't be read
+        """
+        directory = os.path.abspath(directory)
+        indexed = {path: (size, mtime_ns) for path, size, mtime_ns in self.connection.execute("SELECT path, size, mtime_ns FROM scans WHERE path LIKE ? ESCAPE '\\'", (like_prefix(directory),))}
+
+        changed = []
+        found = set()
+        for file_path in find_scan_files(directory):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            found.add(file_path)
+            if indexed.get(file_path) != (stat.st_size, stat.st_mtime_ns):
+                changed.append(file_path)
+
+        gone = [path for path in indexed if path not in found]
+        with self.connection:
+            self.connection.executemany("DELETE FROM scans WHERE path = ?", [(path,) for path in gone])
+
+        workers = workers or os.cpu_count() or 1
+        use_pool = workers > 1 and len(changed) >= workers * MIN_FILES_PER_WORKER
+        failed = 0
+        # Spawned workers, forking a process running Qt threads isn't safe
+        with multiprocessing.get_context("spawn").Pool(workers) if use_pool else contextlib.nullcontext() as pool:
+            summaries = pool.imap_unordered(index_file, changed, chunksize=16) if use_pool else map(index_file, changed)
+            batch = []
+            for done, (summary, peaks) in enumerate(summaries, start=1):
+                failed += summary["error"] is not None
+                batch.append((summary, peaks))
+                if len(batch) == INDEX_BATCH or done == len(changed):
+                    self.store(batch)
+                    batch = []
+                    if progress is not None:
+                        progress(done, len(changed))
+        return len(changed), len(gone), failed
+
+    def store(self, summaries: list[tuple[dict, list[tuple[float, float]]]]):
+        """Writes file summaries (see index_file) in a single transaction, replacing those of the same files"""
+        names = list(SCAN_COLUMNS)
+        with self.connection:
+            for summary, peaks in summaries:
+                self.connection.execute("DELETE FROM scans WHERE path = ?", (summary["path"],))
+                cursor = self.connection.execute(f"INSERT INTO scans ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", [summary.get(name) for name in names])
+                self.connection.executemany("INSERT INTO peaks (scan_id, mass, height) VALUES (?, ?, ?)", [(cursor.lastrowid, mass, height) for mass, height in peaks])
+
+    def search(
+        self,
+        start_mass: float | None = None,
+        stop_mass: float | None = None,
+        points_per_amu: float | None = None,
+        scan_rate: float | None = None,
+        file_version: int | None = None,
+        min_cycles: int | None = None,
+        step_type: str | None = None,
+        min_peaks: dict[float, float] | None = None,
+        path_contains: str | None = None,
+        directory: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Returns the indexed files matching every criterion given, files that couldn't be read are left out
+
+        Args:
+            start_mass (float): Start of the mass range (in AMU)
+            stop_mass (float): End of the mass range (in AMU)
+            points_per_amu (float): Points per AMU of the Analog/Histogram step
+            scan_rate (float): Scan rate of the Analog/Histogram step
+            file_version (int): Version of the .rgadata file
+            min_cycles (int): Least number of cycles
+            step_type (str): Kind of step the scan must have, e.g. "pvst" (see rgaScanClass.scan_step_types)
+            min_peaks (dict[float, float]): Nominal mass -> least peak height of the last cycle (in Torr)
+            path_contains (str): Text the path must contain (case insensitive)
+            directory (str): Directory the files must be under
+            limit (int): Most files returned
+
+        Returns:
+            list[dict]: Header fields of every file (see SCAN_COLUMNS) and its last cycle "peaks" (mass -> height), sorted by path
+        """
+        conditions = ["error IS NULL"]
+        parameters = []
+        for column, value in (("start_mass", start_mass), ("stop_mass", stop_mass), ("points_per_amu", points_per_amu), ("scan_rate", scan_rate), ("file_version", file_version)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if min_cycles is not None:
+            conditions.append("cycles >= ?")
+            parameters.append(min_cycles)
+        if step_type is not None:
+            conditions.append("(',' || step_types || ',') LIKE ?")
+            parameters.append(f"%,{step_type},%")
+        for mass, height in (min_peaks or {}).items():
+            conditions.append("id IN (SELECT scan_id FROM peaks WHERE mass = ? AND height >= ?)")
+            parameters.extend((mass, height))
+        if path_contains:
+            conditions.append("path LIKE ? ESCAPE '\\'")
+            parameters.append(f"%{escape_like(path_contains)}%")
+        if directory is not None:
+            conditions.append("path LIKE ? ESCAPE '\\'")
+            parameters.append(like_prefix(os.path.abspath(directory)))
+
+        query = f"SELECT id, {', '.join(SCAN_COLUMNS)} FROM scans WHERE {' AND '.join(conditions)} ORDER BY path"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        rows = self.connection.execute(query, parameters).fetchall()
+
+        results = {}
+        for row in rows:
+            results[row[0]] = dict(zip(SCAN_COLUMNS, row[1:]), peaks={})
+        if results:
+            # Peaks of the files found, in chunks to stay under SQLite's limit on query parameters
+            scan_ids = list(results)
+            for first in range(0, len(scan_ids), 500):
+                chunk = scan_ids[first : first + 500]
+                for scan_id, mass, height in self.connection.execute(f"SELECT scan_id, mass, height FROM peaks WHERE scan_id IN ({', '.join('?' * len(chunk))})", chunk):
+                    results[scan_id]["peaks"][mass] = height
+        return list(results.values())
+
+
+def escape_like(text: str) -> str:
+    """Escapes the wildcards of a LIKE pattern, see search"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_prefix(directory: str) -> str:
+    """Returns the LIKE pattern matching the paths under a directory"""
+    return escape_like(os.path.join(directory, "")) + "%"
@@ -0,0 +1,77 @@
+from typing import TYPE_CHECKING
+from PySide6.QtCore import QObject, Signal
+from rgaScanClass import RgaScan
+
+if TYPE_CHECKING:  # Imports multiprocessing, only used with RGA_COMPARE_SHARED_MEMORY set
+    from rgaSharedScanStoreClass import RgaSharedScanStore
+
+
+class RgaScanList(QObject):
+
+    scan_added = Signal(object)
+    scan_removed = Signal(object)
+
+    def __init__(self, store: "RgaSharedScanStore | None" = None):
+        super().__init__()
+
+        self.scan_files = []
+        self.store = store  # Shared memory store the scans may come from, their block is released when they are removed
+
+        self.plot_colours = [
+            "#1f77b4",  # blue
+            "#ff7f0e",  # orange
+            "#2ca02c",  # green
+            "#d62728",  # red
+            "#9467bd",  # purple
+            "#8c564b",  # brown
+            "#e377c2",  # pink
+            "#7f7f7f",  # gray
+            "#bcbd22",  # olive
+            "#17becf",  # cyan
+            "#aec7e8",  # light blue
+            "#ffbb78",  # light orange
+        ]
+        self.available_plot_colours = self.plot_colours.copy()
+
+    def add_scan(self, scan: RgaScan, colour: str | None = None):
+        """Adds a scan to the internal list and emits a signal to update Plot and GUI elements
+
+        Args:
+            scan (RgaScan): The RgaScan object of the newly added scan
+            colour (str): Plot colour to give the scan, e.g. restored from a session, the next available one if None
+        """
+        # Repopulates available plot colours if ever exausted
+        if not self.available_plot_colours:
+            self.available_plot_colours = self.plot_colours.copy()
+
+        # Allocates a colour to the new scan
+        if colour is not None:
+            if colour in self.available_plot_colours:
+                self.available_plot_colours.remove(colour)
+            gui_colour = colour
+        else:
+            gui_colour = self.available_plot_colours.pop(0)
+        scan.colour = gui_colour
+
+        self.scan_files.append(scan)
+        self.scan_added.emit(scan)  # Emits signal to update Plot and GUI
+
+    def remove_scan(self, scan: RgaScan):
+
+        self.scan_files.remove(scan)
+        # Frees up colour by adding back to pool for reassignment, unless it isn't one of the plot colours (e.g. restored
+        # from a session), is already in the pool or another scan still uses it (restored or given out again after the pool ran out)
+        if scan.colour in self.plot_colours and scan.colour not in self.available_plot_colours and all(other.colour != scan.colour for other in self.scan_files):
+            self.available_plot_colours.insert(0, scan.colour)
+        self.scan_removed.emit(scan)  # Emits signal to update Plot and GUI
+        if self.store is not None:
+            self.store.release(scan)
+
+    def get_scan(self, index: int) -> RgaScan:
+        return self.scan_files[index]
+
+    def number_of_scans(self) -> int:
+        return len(self.scan_files)
+
+    def __len__(self) -> int:
+        return len(self.scan_files)
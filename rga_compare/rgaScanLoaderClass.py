@@ -0,0 +1,148 @@
+from typing import TYPE_CHECKING
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from rgaScanClass import RgaScan
+from rgaScanCacheClass import RgaScanCache
+
+if TYPE_CHECKING:  # Imports multiprocessing, only used with RGA_COMPARE_SHARED_MEMORY set
+    from rgaSharedScanStoreClass import RgaSharedScanStore
+
+
+class ScanLoadSignals(QObject):
+    """Signals of a ScanLoadTask, QRunnable isn't a QObject so it can't emit them itself"""
+
+    loaded = Signal(int, int, object)  # batch, index, scan
+    failed = Signal(int, int, str)  # batch, index, error message
+
+
+class ScanLoadTask(QRunnable):
+    """Parses a single .rgadata file (or opens a chunked export, see rgaChunkedScanFileClass) on a QThreadPool worker thread
+
+    Args:
+        batch (int): Batch the file belongs to, results of cancelled batches are ignored
+        index (int): Position of the file in the batch
+        file_path (str): file location
+        lazy (bool): Opens the scan in lazy (memory-mapped) mode
+        signals (ScanLoadSignals): Signals used to send the result back to the GUI thread
+        cache (RgaScanCache): Cache of decoded scans to load the file through, if any
+        store (RgaSharedScanStore): Shared memory store to decode the file into, if any, takes precedence over the cache
+    """
+
+    def __init__(self, batch: int, index: int, file_path: str, lazy: bool, signals: ScanLoadSignals, cache: RgaScanCache | None = None, store: "RgaSharedScanStore | None" = None):
+        super().__init__()
+        self.batch = batch
+        self.index = index
+        self.file_path = file_path
+        self.lazy = lazy
+        self.signals = signals
+        self.cache = cache
+        self.store = store
+
+    def run(self):
+        from rgaChunkedScanFileClass import is_chunked_scan, read_chunked_scan  # Imported with the first scan, not at startup
+
+        try:
+            if is_chunked_scan(self.file_path):
+                scan = read_chunked_scan(self.file_path)  # Already compact and read a chunk at a time, it isn't cached
+            elif self.store is not None:
+                scan = self.store.load(self.file_path)
+            elif self.cache is not None:
+                scan = self.cache.load(self.file_path)
+            else:
+                scan = RgaScan(self.file_path, lazy=self.lazy)
+        except Exception as e:
+            self.signals.failed.emit(self.batch, self.index, f"{type(e).__name__}: {e}")
+        else:
+            self.signals.loaded.emit(self.batch, self.index, scan)
+
+
+class RgaScanLoader(QObject):
+    """Loads .rgadata files concurrently on a thread pool and hands the finished scans back to the GUI thread
+    in the order the files were given, a file that fails to load is reported and skipped
+
+    Args:
+        lazy (bool): Opens the scans in lazy (memory-mapped) mode
+        cache (RgaScanCache): Cache of decoded scans to load the files through, if any
+        store (RgaSharedScanStore): Shared memory store to decode the files into, if any, takes precedence over the cache
+    """
+
+    scan_loaded = Signal(object)  # RgaScan, emitted in the order the files were given
+    load_failed = Signal(str, str)  # file path, error message
+    progress = Signal(int, int)  # files done, total files
+    finished = Signal()
+
+    def __init__(self, lazy: bool = True, cache: RgaScanCache | None = None, store: "RgaSharedScanStore | None" = None):
+        super().__init__()
+
+        self.lazy = lazy
+        self.cache = cache
+        self.store = store
+        self.thread_pool = QThreadPool()
+
+        self.signals = ScanLoadSignals()
+        self.signals.loaded.connect(self.on_loaded)
+        self.signals.failed.connect(self.on_failed)
+
+        self.batch = 0
+        self.file_paths = []
+        self.results = {}  # index -> RgaScan, or None if it failed, waiting for the earlier files to finish
+        self.next_index = 0  # index of the next file to hand over
+        self.done = 0
+
+    def load(self, file_paths: list[str]):
+        """Queues files for loading, files queued while a batch is running are added to that batch
+
+        Args:
+            file_paths (list[str]): Locations of the .rgadata files to load
+        """
+        for file_path in file_paths:
+            index = len(self.file_paths)
+            self.file_paths.append(file_path)
+            self.thread_pool.start(ScanLoadTask(self.batch, index, file_path, self.lazy, self.signals, self.cache, self.store))
+        self.progress.emit(self.done, len(self.file_paths))
+        if not self.is_loading():  # Nothing queued, e.g. a session without scans
+            self.reset()
+            self.finished.emit()
+
+    def cancel(self):
+        """Drops the files not loaded yet, scans already handed over are kept"""
+        self.thread_pool.clear()  # Removes the tasks that haven't started
+        self.reset()
+        self.finished.emit()
+
+    def is_loading(self) -> bool:
+        return self.next_index < len(self.file_paths)
+
+    def reset(self):
+        self.batch += 1  # Results of tasks still running are ignored from now on
+        self.file_paths = []
+        self.results = {}
+        self.next_index = 0
+        self.done = 0
+
+    def on_loaded(self, batch: int, index: int, scan: RgaScan):
+        if batch == self.batch:
+            self.store_result(index, scan)
+
+    def on_failed(self, batch: int, index: int, error: str):
+        if batch == self.batch:
+            self.load_failed.emit(self.file_paths[index], error)
+            self.store_result(index, None)
+
+    def store_result(self, index: int, scan: RgaScan | None):
+        self.results[index] = scan
+        self.done += 1
+
+        # Hands over every scan whose predecessors are all done
+        batch = self.batch
+        while self.next_index in self.results:
+            scan = self.results.pop(self.next_index)
+            self.next_index += 1
+            if scan is not None:
+                self.scan_loaded.emit(scan)
+            if batch != self.batch:  # Cancelled by a receiver of scan_loaded
+                return
+
+        self.progress.emit(self.done, len(self.file_paths))
+        if not self.is_loading():
+            self.reset()
+            self.finished.emit()
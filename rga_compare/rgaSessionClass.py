@@ -0,0 +1,83 @@
+import json
+import os
+
+SESSION_VERSION = 1
+SESSION_EXTENSION = ".rgasession"
+
+
+class RgaSession:
+    """
+    A saved working set: the loaded scans with their colour and hidden state, the axis scale, the plot tab
+    and the view range of the spectrum plot, stored as a small JSON file
+
+    Scans are stored with their absolute path and their path relative to the session file, so a folder holding
+    both the session and its scans can be moved as a whole
+
+    Attributes:
+        scans (list[dict]): "path", "colour" and "hidden" of every scan, in the order they were listed
+        log_mode (bool): Logarithmic intensity axis
+        plot_tab (int): Index of the plot tab shown
+        view_range (list | None): [[x_min, x_max], [y_min, y_max]] of the spectrum plot, None if it was auto-ranging
+    """
+
+    def __init__(self, scans: list[dict] | None = None, log_mode: bool = False, plot_tab: int = 0, view_range: list | None = None):
+        self.scans = scans if scans is not None else []
+        self.log_mode = log_mode
+        self.plot_tab = plot_tab
+        self.view_range = view_range
+
+    def add_scan(self, file_path: str, colour: str | None = None, hidden: bool = False):
+        self.scans.append({"path": os.path.abspath(file_path), "colour": colour, "hidden": hidden})
+
+    def save(self, file_path: str):
+        session_dir = os.path.dirname(os.path.abspath(file_path))
+        scans = []
+        for scan in self.scans:
+            try:
+                relative_path = os.path.relpath(scan["path"], session_dir)
+            except ValueError:  # e.g. on another drive on Windows
+                relative_path = None
+            scans.append(dict(scan, relative_path=relative_path))
+
+        session = {"version": SESSION_VERSION, "scans": scans, "log_mode": self.log_mode, "plot_tab": self.plot_tab, "view_range": self.view_range}
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(session, f, indent=4)
+        os.replace(temp_path, file_path)  # Never leaves a half written session behind
+
+    @classmethod
+    def load(cls, file_path: str) -> "RgaSession":
+        """Reads a session file, scans that moved along with the session file are found through their relative path
+
+        Raises:
+            ValueError: If the file isn't a session file of a supported version
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            try:
+                session = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{os.path.basename(file_path)} is not a session file: {e}") from e
+        if not isinstance(session, dict) or session.get("version") != SESSION_VERSION:
+            raise ValueError(f"{os.path.basename(file_path)} is not a version {SESSION_VERSION} session file")
+
+        session_dir = os.path.dirname(os.path.abspath(file_path))
+        scans = []
+        for scan in session.get("scans", []):
+            path = scan["path"]
+            relative_path = scan.get("relative_path")
+            if not os.path.exists(path) and relative_path is not None and os.path.exists(os.path.join(session_dir, relative_path)):
+                path = os.path.normpath(os.path.join(session_dir, relative_path))
+            scans.append({"path": path, "colour": scan.get("colour"), "hidden": bool(scan.get("hidden", False))})
+
+        return cls(scans, bool(session.get("log_mode", False)), int(session.get("plot_tab", 0)), session.get("view_range"))
+
+    def scans_most_recent_first(self) -> list[dict]:
+        """Returns the scans ordered by the modification time of their file, newest first, missing files last"""
+
+        def modification_time(scan: dict) -> float:
+            try:
+                return os.path.getmtime(scan["path"])
+            except OSError:
+                return float("-inf")
+
+        return sorted(self.scans, key=modification_time, reverse=True)
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from rgaScanClass import RgaScan, build_cycle_dtype
+from rgaScanCacheClass import CACHED_SETTINGS, align
+
+
+def segment_layout(scan: RgaScan) -> tuple[dict[str, dict], int]:
+    """Lays out the columns of a scan one after the other in a block, each one aligned as in the cache entries
+
+    Returns:
+        tuple[dict[str, dict], int]: "dtype", "shape" and "offset" of every column, and the size of the block
+    """
+    columns = {}
+    offset = 0
+    for name, values in scan.columns.items():
+        columns[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+        offset = align(offset + values.nbytes)
+    return columns, offset
+
+
+def column_array(segment: shared_memory.SharedMemory, column: dict) -> np.ndarray:
+    """Returns a column of a block as an array backed by the block, the block can't be closed while the array is in use"""
+    dtype = np.dtype(column["dtype"])
+    values = np.frombuffer(segment.buf, dtype=dtype, count=int(np.prod(column["shape"])), offset=column["offset"])
+    return values.reshape(column["shape"])
+
+
+def create_segment(scan: RgaScan) -> dict:
+    """Copies the columns of a scan into a new shared memory block, the block is left open for others to attach to
+
+    Returns:
+        dict: Descriptor of the block, see RgaSharedScanStore
+    """
+    columns, size = segment_layout(scan)
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        for name, values in scan.columns.items():
+            target = column_array(segment, columns[name])
+            target[...] = values
+            del target  # The block can't be closed while an array uses it
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    segment.close()
+    settings = {name: getattr(scan, name) for name in CACHED_SETTINGS}
+    return {"name": segment.name, "size": size, "settings": settings, "cycle_size": scan.cycle_dtype.itemsize, "columns": columns}
+
+
+def decode_to_shared_memory(file_path: str) -> dict:
+    """Decodes a .rgadata file straight into a new shared memory block, runs in the worker processes of a store.
+    The data block is memory-mapped, so the values are copied once, from the file to the block
+
+    Returns:
+        dict: Descriptor of the block, see RgaSharedScanStore
+    """
+    return create_segment(RgaScan(file_path, lazy=True))
+
+
+def segment_columns(segment: shared_memory.SharedMemory, descriptor: dict) -> dict[str, np.ndarray]:
+    """Returns the columns of a block as read-only arrays backed by the block (nothing is copied)"""
+    columns = {}
+    for name, column in descriptor["columns"].items():
+        values = column_array(segment, column)
+        values.flags.writeable = False
+        columns[name] = values
+    return columns
+
+
+class RgaSharedScanStore:
+    """
+    Keeps decoded scans in shared memory blocks, so several windows or processes use the same copy of a scan
+    and a scan decoded in a worker process isn't pickled back to the process using it
+
+    Every block holds the columns of one scan (see RgaScan.columns) and is described by a small picklable dict
+    (block name and size, settings and the dtype, shape and offset of every column), which any process can attach
+    to with attach. Blocks are reference counted per store: the block is unlinked when the last scan
+    attached to it is released (e.g. removed from an RgaScanList), by the store that created it
+
+    Args:
+        workers (int): Number of worker processes decoding the files, one per core if None
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers
+        self.pool = None  # Started on first use, see load
+        self.lock = threading.Lock()  # Scans are loaded from several threads, see RgaScanLoader
+        self.segments: dict[str, dict] = {}  # Block name -> "segment", "descriptor", "users" and "owned" (unlinked by this store)
+        self.scan_segments: dict[RgaScan, str] = {}  # Block name of every scan attached
+        self.unlinked = []  # Blocks unlinked while arrays still use them, closed once they don't
+
+    def load(self, file_path: str) -> RgaScan:
+        """Decodes a .rgadata file in a worker process, straight into shared memory (see decode_to_shared_memory)
+
+        Returns:
+            RgaScan: The scan, its columns are backed by the block
+        """
+        with self.lock:
+            if self.pool is None:
+                # Forking a process running Qt threads isn't safe
+                self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            pool = self.pool
+        descriptor = pool.submit(decode_to_shared_memory, file_path).result()
+        return self.attach(descriptor, owned=True)
+
+    def publish(self, scan: RgaScan) -> dict:
+        """Moves the columns of a scan decoded in this process to a shared memory block, so other processes
+        can attach to it. The scan then uses the block and its private copy is freed
+
+        Returns:
+            dict: Descriptor of the block
+        """
+        with self.lock:
+            if scan in self.scan_segments:
+                return self.segments[self.scan_segments[scan]]["descriptor"]
+        descriptor = create_segment(scan)
+        shared_scan = self.attach(descriptor, owned=True)
+        with self.lock:
+            self.scan_segments[scan] = self.scan_segments.pop(shared_scan)
+        scan.lazy = False
+        scan._column_buffers = {}
+        scan.set_columns(shared_scan.columns)
+        return descriptor
+
+    def attach(self, descriptor: dict, owned: bool = False) -> RgaScan:
+        """Rebuilds a scan from a shared memory block, counted as a user of the block until released
+
+        Args:
+            descriptor (dict): Descriptor of the block, e.g. returned by publish in another process
+            owned (bool): Whether this store unlinks the block once it has no users, otherwise the creator does
+
+        Returns:
+            RgaScan: The scan, its columns are read-only arrays backed by the block
+        """
+        with self.lock:
+            entry = self.segments.get(descriptor["name"])
+            if entry is None:
+                segment = shared_memory.SharedMemory(name=descriptor["name"])
+                if not owned and os.name == "posix":
+                    # Attaching registers the block with this process' resource tracker, which would unlink it on exit
+                    resource_tracker.unregister(segment._name, "shared_memory")
+                entry = self.segments[descriptor["name"]] = {"segment": segment, "descriptor": descriptor, "users": 0, "owned": owned}
+            entry["users"] += 1
+
+            scan = RgaScan()
+            for name, value in descriptor["settings"].items():
+                setattr(scan, name, value)
+            scan.cycle_dtype = build_cycle_dtype(scan.f_version, scan.step_data_sizes, descriptor["cycle_size"], scan.step_types)
+            scan.set_columns(segment_columns(entry["segment"], descriptor))
+            self.scan_segments[scan] = descriptor["name"]
+        return scan
+
+    def release(self, scan: RgaScan):
+        """Drops a user of the block of a scan, the last user unlinks the block. Scans not attached are ignored
+
+        The scan is left empty, so the block can be closed as soon as nothing else uses its arrays
+        """
+        with self.lock:
+            name = self.scan_segments.pop(scan, None)
+            if name is None:
+                return
+            scan.set_columns({})
+            entry = self.segments[name]
+            entry["users"] -= 1
+            if entry["users"] > 0:
+                return
+            del self.segments[name]
+            if entry["owned"]:
+                # Registered again first, a consumer process sharing this resource tracker may have unregistered it (see attach)
+                resource_tracker.register(entry["segment"]._name, "shared_memory")
+                entry["segment"].unlink()  # The memory itself is freed once every process has closed the block
+            self.unlinked.append(entry["segment"])
+            self.close_unlinked()
+
+    def close_unlinked(self):
+        """Closes the unlinked blocks no array uses anymore"""
+        still_used = []
+        for segment in self.unlinked:
+            try:
+                segment.close()
+            except BufferError:  # Arrays of the scan are still around
+                still_used.append(segment)
+        self.unlinked = still_used
+
+    def close(self):
+        """Releases every scan and stops the worker processes"""
+        for scan in list(self.scan_segments):
+            self.release(scan)
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+                self.pool = None
+
+    def __contains__(self, scan: RgaScan) -> bool:
+        return scan in self.scan_segments
@@ -0,0 +1,69 @@
+import pyqtgraph as pg
+import numpy as np
+from rgaScanClass import RgaScan
+from rgaPlotClass import apply_plot_theme
+
+
+class RGASignalPlot(pg.PlotWidget):
+    """
+    Plots an auxiliary signal (total pressure, temperatures, analog/GPIO inputs) or a PvsT gas against time
+    for every scan that recorded it, see RgaScan.signal_channels
+    """
+
+    def __init__(self):
+        super().__init__(axisItems={"bottom": pg.DateAxisItem()})
+
+        self.scan_list: list[RgaScan] = []
+        self.curves: dict[RgaScan, pg.PlotDataItem] = {}
+        self.channel = None
+
+        self.getPlotItem().setClipToView(True)
+        self.getPlotItem().setDownsampling(mode="peak", auto=True)
+
+        apply_plot_theme(self)
+        self.getPlotItem().setLabel("bottom", text="Time")
+
+    def set_channel(self, channel: str | None, label: str = ""):
+        """Shows another channel for every scan
+
+        Args:
+            channel (str): The channel, see RgaScan.signal_channels
+            label (str): Name of the channel for the axis label
+        """
+        self.channel = channel
+        self.getPlotItem().setLabel("left", text=label)
+        for scan in self.scan_list:
+            self.update_plot(scan)
+
+    def add_plot(self, scan: RgaScan):
+        self.scan_list.append(scan)
+        self.curves[scan] = self.getPlotItem().plot(pen=pg.mkPen(scan.colour, width=2))
+        self.update_plot(scan)
+
+    def remove_plot(self, scan: RgaScan):
+        curve = self.curves.pop(scan, None)
+        if curve is None:
+            return
+        self.getPlotItem().removeItem(curve)
+        self.scan_list.remove(scan)
+
+    def set_plot_visible(self, scan: RgaScan, visible: bool):
+        self.curves[scan].setVisible(visible)
+
+    def set_axis_scale(self, log_mode: bool):
+        self.getPlotItem().setLogMode(y=log_mode)
+
+    def update_plot(self, scan: RgaScan):
+        """Redraws the channel of a single scan, empty if the scan didn't record it"""
+        if self.channel is None or self.channel not in scan.signal_channels():
+            self.curves[scan].setData([], [])
+            return
+
+        time_stamps, values = scan.signal(self.channel)
+        time_stamps = time_stamps / 1000
+        start_time = scan.start_time()
+        if start_time is not None:
+            time_stamps = time_stamps + start_time
+
+        valid = np.isfinite(values)
+        self.curves[scan].setData(time_stamps[valid], values[valid])
@@ -0,0 +1,63 @@
+from typing import TYPE_CHECKING
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from rgaPlotClass import RGAPlot
+
+if TYPE_CHECKING:  # Imported once a library is opened, see MainWindow.open_library
+    from rgaLibrary import SpectrumLibrary
+
+
+class RGASpeciesTable(QTableWidget):
+    """
+    Lists the library species making up the cycle plotted for every visible scan of an RGAPlot, fitted
+    from the nominal mass peak heights of the cycle (see SpectrumLibrary.fit). Empty until a library is set.
+    """
+
+    COLUMNS = ["Scan", "Species", "Partial Pressure (Torr)", "Fit Residual (Torr)"]
+
+    def __init__(self, rga_plot: RGAPlot):
+        super().__init__(0, len(self.COLUMNS))
+        self.rga_plot = rga_plot
+        self.library = None
+
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+        # Several changes in a row (e.g. many scans added at once) only refit once
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(50)
+        self.update_timer.timeout.connect(self.update_table)
+
+    def set_library(self, library: "SpectrumLibrary | None"):
+        self.library = library
+        self.schedule_update()
+
+    def schedule_update(self):
+        """Refits the table shortly, e.g. after scans were added, removed, hidden or got new cycles"""
+        self.update_timer.start()
+
+    def update_table(self):
+        rows = []
+        if self.library is not None:
+            for scan in self.rga_plot.visible_scans():
+                mass_table = scan.cycle_mass_table(self.rga_plot.plotted_cycle(scan)) if len(scan.spectra) else None
+                if mass_table is None:
+                    continue
+                fit = self.library.fit(mass_table.nominal_masses, mass_table.heights)
+                for name, pressure in fit.cycle(0):
+                    rows.append((self.rga_plot.scan_list.index(scan), scan, name, pressure, fit.residuals[0]))
+
+        self.setUpdatesEnabled(False)
+        self.setRowCount(len(rows))
+        for row, (scan_index, scan, name, pressure, residual) in enumerate(rows):
+            scan_item = QTableWidgetItem(f"Scan {scan_index + 1}: {scan.file_name}")
+            scan_item.setForeground(QColor(scan.colour))
+            self.setItem(row, 0, scan_item)
+            for column, text in enumerate((name, f"{pressure:.3e}", f"{residual:.3e}"), start=1):
+                self.setItem(row, column, QTableWidgetItem(text))
+        self.setUpdatesEnabled(True)
@@ -0,0 +1,185 @@
+"""
+Description: Statistics of the spectra of a range of cycles, point by point (mean, standard deviation, min, max
+    and quantiles), computed in a single pass over chunks of cycles so memory doesn't grow with the number of
+    cycles, see RgaScan.aggregate
+"""
+
+import numpy as np
+
+STATISTICS = ("mean", "std", "min", "max", "median")  # Statistics of a CycleAggregate besides its other quantiles
+
+# Quantiles of long ranges are estimated from a histogram of every point over signed log-spaced bins, ~3.7 % wide
+# at 64 bins per decade, for magnitudes between QUANTILE_LOWEST and QUANTILE_HIGHEST (in Torr) of either sign,
+# since the noise around the baseline of a spectrum reads as negative intensities as often as positive ones
+EXACT_QUANTILE_CYCLES = 1024  # Ranges up to this many cycles get exact quantiles
+QUANTILE_BINS_PER_DECADE = 64
+QUANTILE_LOWEST = 1e-16
+QUANTILE_HIGHEST = 1.0
+QUANTILE_BINS = int(round(np.log10(QUANTILE_HIGHEST / QUANTILE_LOWEST) * QUANTILE_BINS_PER_DECADE))  # Bins per sign
+ZERO_BIN = QUANTILE_BINS + 1  # Magnitudes below QUANTILE_LOWEST
+HISTOGRAM_BINS = 2 * QUANTILE_BINS + 3
+
+
+class CycleAggregate:
+    """
+    Point by point statistics of the spectra of a range of cycles, see SpectrumAggregator
+
+    Attributes:
+        first_cycle (int): First cycle of the range
+        last_cycle (int): Last cycle of the range (exclusive)
+        count (int): Number of cycles
+        mean (np.ndarray): Mean of every point
+        std (np.ndarray): Standard deviation of every point
+        minimum (np.ndarray): Minimum of every point
+        maximum (np.ndarray): Maximum of every point
+        quantiles (dict[float, np.ndarray]): Quantile (0 to 1) -> value of every point
+        exact_quantiles (bool): Whether the quantiles are exact, otherwise estimated from a histogram
+    """
+
+    def __init__(self, first_cycle: int, last_cycle: int, count: int, mean: np.ndarray, std: np.ndarray, minimum: np.ndarray, maximum: np.ndarray, quantiles: dict[float, np.ndarray], exact_quantiles: bool):
+        self.first_cycle = first_cycle
+        self.last_cycle = last_cycle
+        self.count = count
+        self.mean = mean
+        self.std = std
+        self.minimum = minimum
+        self.maximum = maximum
+        self.quantiles = quantiles
+        self.exact_quantiles = exact_quantiles
+
+    def statistic(self, name: str) -> np.ndarray:
+        """Returns a statistic of every point by name, one of STATISTICS
+
+        Raises:
+            KeyError: If it wasn't computed, e.g. "median" without the 0.5 quantile
+        """
+        if name == "median":
+            return self.quantiles[0.5]
+        return {"mean": self.mean, "std": self.std, "min": self.minimum, "max": self.maximum}[name]
+
+
+def quantile_bins(values: np.ndarray) -> np.ndarray:
+    """Returns the histogram bin of every value, the bins are in increasing order of value: 0 at or below -QUANTILE_HIGHEST,
+    1 to QUANTILE_BINS for negative values, ZERO_BIN for magnitudes up to QUANTILE_LOWEST, ZERO_BIN + 1 to ZERO_BIN + QUANTILE_BINS
+    for positive values and HISTOGRAM_BINS - 1 at or above QUANTILE_HIGHEST
+    """
+    magnitudes = np.abs(values)
+    logs = np.log10(np.clip(magnitudes, QUANTILE_LOWEST, QUANTILE_HIGHEST))
+    steps = np.clip(np.floor((logs - np.log10(QUANTILE_LOWEST)) * QUANTILE_BINS_PER_DECADE).astype(np.int64), 0, QUANTILE_BINS - 1)
+    bins = np.where(values > 0, ZERO_BIN + 1 + steps, QUANTILE_BINS - steps)
+    bins[magnitudes <= QUANTILE_LOWEST] = ZERO_BIN
+    bins[values >= QUANTILE_HIGHEST] = HISTOGRAM_BINS - 1
+    bins[values <= -QUANTILE_HIGHEST] = 0
+    return bins
+
+
+def bin_values(bins: np.ndarray, fractions: np.ndarray) -> np.ndarray:
+    """Returns the values at fractions (0 to 1, from the lowest to the highest value) of histogram bins (see quantile_bins),
+    interpolated log-linearly in the signed bins and linearly in ZERO_BIN. The bins beyond QUANTILE_HIGHEST give NaN
+    """
+    positive_steps = bins - (ZERO_BIN + 1) + fractions
+    negative_steps = QUANTILE_BINS - bins + 1 - fractions  # The lowest value of a negative bin has the highest magnitude
+    with np.errstate(over="ignore"):
+        positive = 10 ** (np.log10(QUANTILE_LOWEST) + positive_steps / QUANTILE_BINS_PER_DECADE)
+        negative = -(10 ** (np.log10(QUANTILE_LOWEST) + negative_steps / QUANTILE_BINS_PER_DECADE))
+    values = np.where(bins > ZERO_BIN, positive, negative)
+    values = np.where(bins == ZERO_BIN, QUANTILE_LOWEST * (2 * fractions - 1), values)
+    return np.where((bins == 0) | (bins == HISTOGRAM_BINS - 1), np.nan, values)
+
+
+class SpectrumAggregator:
+    """
+    Accumulates point by point statistics of spectra added a chunk of cycles at a time
+
+    The mean and standard deviation are updated with Welford's algorithm, a whole chunk at a time (Chan et al.'s
+    combination of the chunk's mean and sum of squared deviations with the running ones), which stays accurate
+    over long ranges unlike summing squares. Quantiles are exact while at most exact_cycles cycles were added,
+    which are kept, then estimated from a histogram of every point (see quantile_bins), so the memory used
+    is bounded by number_of_points x (exact_cycles + HISTOGRAM_BINS)
+
+    Args:
+        number_of_points (int): Points per spectrum
+        quantiles (tuple[float, ...]): Quantiles to compute (0 to 1), e.g. 0.5 for the median
+        exact_cycles (int): Most cycles kept for exact quantiles
+    """
+
+    def __init__(self, number_of_points: int, quantiles: tuple[float, ...] = (0.5,), exact_cycles: int = EXACT_QUANTILE_CYCLES):
+        self.quantiles = tuple(quantiles)
+        self.exact_cycles = exact_cycles
+        self.count = 0
+        self.mean = np.zeros(number_of_points)
+        self.m2 = np.zeros(number_of_points)  # Sum of squared deviations from the mean
+        self.minimum = np.full(number_of_points, np.inf)
+        self.maximum = np.full(number_of_points, -np.inf)
+        self.kept_spectra = []  # Cycles added so far, while exact quantiles are possible
+        self.histogram = None  # points x bins counts, once there are too many cycles for exact quantiles
+
+    def add(self, spectra: np.ndarray):
+        """Adds a chunk of cycles
+
+        Args:
+            spectra (np.ndarray): cycles x points spectra
+        """
+        values = np.asarray(spectra, dtype=np.float64)
+        number_of_cycles = len(values)
+        if number_of_cycles == 0:
+            return
+
+        chunk_mean = values.mean(axis=0)
+        chunk_m2 = np.square(values - chunk_mean).sum(axis=0)
+        total = self.count + number_of_cycles
+        delta = chunk_mean - self.mean
+        self.mean += delta * (number_of_cycles / total)
+        self.m2 += chunk_m2 + np.square(delta) * (self.count * number_of_cycles / total)
+        self.count = total
+        np.minimum(self.minimum, values.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, values.max(axis=0), out=self.maximum)
+
+        if not self.quantiles:
+            return
+        if self.histogram is None and self.count <= self.exact_cycles:
+            self.kept_spectra.append(np.array(spectra))
+            return
+        if self.histogram is None:
+            self.histogram = np.zeros((len(self.mean), HISTOGRAM_BINS), dtype=np.int32)  # Twice the bins of an unsigned histogram in the same memory
+            for kept in self.kept_spectra:
+                self.add_to_histogram(kept)
+            self.kept_spectra = []
+        self.add_to_histogram(values)
+
+    def add_to_histogram(self, values: np.ndarray):
+        number_of_points = self.histogram.shape[0]
+        bins = quantile_bins(values) + np.arange(number_of_points) * self.histogram.shape[1]
+        self.histogram += np.bincount(bins.ravel(), minlength=self.histogram.size).reshape(self.histogram.shape)
+
+    def histogram_quantile(self, quantile: float) -> np.ndarray:
+        """Estimates a quantile of every point from the histogram, the values of a bin are taken as evenly spread over it"""
+        rank = quantile * (self.count - 1)  # Same definition as np.quantile's default (linear)
+        cumulative = np.cumsum(self.histogram, axis=1)
+        bins = np.argmax(cumulative > rank, axis=1)
+        points = np.arange(len(bins))
+        counts = self.histogram[points, bins]
+        before = cumulative[points, bins] - counts
+        fractions = np.clip((rank - before + 0.5) / counts, 0, 1)
+        values = bin_values(bins, fractions)
+        values = np.where(bins == 0, self.minimum, values)
+        values = np.where(bins == HISTOGRAM_BINS - 1, self.maximum, values)
+        return np.clip(values, self.minimum, self.maximum)
+
+    def result(self, first_cycle: int, last_cycle: int) -> CycleAggregate | None:
+        """Returns the statistics of the cycles added so far, None if there are none
+
+        Args:
+            first_cycle (int): First cycle of the range the cycles came from
+            last_cycle (int): Last cycle of the range (exclusive)
+        """
+        if self.count == 0:
+            return None
+
+        if self.histogram is None and self.quantiles:
+            kept = np.concatenate(self.kept_spectra)
+            quantiles = dict(zip(self.quantiles, np.quantile(kept, self.quantiles, axis=0)))
+        else:
+            quantiles = {quantile: self.histogram_quantile(quantile) for quantile in self.quantiles}
+        std = np.sqrt(self.m2 / self.count)
+        return CycleAggregate(first_cycle, last_cycle, self.count, self.mean.copy(), std, self.minimum.copy(), self.maximum.copy(), quantiles, self.histogram is None)
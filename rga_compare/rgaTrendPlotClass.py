@@ -0,0 +1,113 @@
+import pyqtgraph as pg
+import numpy as np
+from PySide6 import QtCore
+from rgaScanClass import RgaScan
+from rgaPlotClass import apply_plot_theme
+
+DEFAULT_TREND_MASSES = [2, 18, 28, 32, 44]  # Masses tracked when the plot is created (in AMU)
+
+# Line style of each tracked mass, in the order the masses are given (the colour is the scan's)
+MASS_PEN_STYLES = [
+    QtCore.Qt.SolidLine,
+    QtCore.Qt.DashLine,
+    QtCore.Qt.DotLine,
+    QtCore.Qt.DashDotLine,
+    QtCore.Qt.DashDotDotLine,
+]
+
+
+class RGATrendPlot(pg.PlotWidget):
+    """
+    Plots the intensity of chosen masses against time over every cycle of every scan, see RgaScan.mass_trend.
+    Scans are aligned on the absolute time of their cycles, so consecutive files line up into one trend.
+    """
+
+    def __init__(self):
+        super().__init__(axisItems={"bottom": pg.DateAxisItem()})
+
+        self.scan_list: list[RgaScan] = []
+        self.curves: dict[RgaScan, list[pg.PlotDataItem]] = {}  # One curve per tracked mass for every scan
+
+        self.masses = list(DEFAULT_TREND_MASSES)
+        self.window = 0.5
+        self.reducer = "peak"
+
+        self.getPlotItem().setClipToView(True)
+        self.getPlotItem().setDownsampling(mode="peak", auto=True)
+
+        apply_plot_theme(self)
+        self.getPlotItem().setLabel("left", text="Intensity", units="Torr", siPrefixEnableRanges=((0, 0), (0, 0)))
+        self.getPlotItem().setLabel("bottom", text="Time")
+        self.legend = self.getPlotItem().addLegend(offset=(10, 10))
+        self.update_legend()
+
+    def set_masses(self, masses: list[float], reducer: str = "peak", window: float = 0.5):
+        """Changes the tracked masses and recomputes the trends of every scan
+
+        Args:
+            masses (list[float]): Masses to track (in AMU)
+            reducer (str): "peak" or "integral", see RgaScan.mass_trend
+            window (float): Half width of the window around each mass (in AMU)
+        """
+        self.masses = list(masses)
+        self.reducer = reducer
+        self.window = window
+
+        for scan in self.scan_list:
+            visible = self.curves[scan][0].isVisible() if self.curves[scan] else True
+            self.remove_curves(scan)
+            self.create_curves(scan, visible)
+            self.update_plot(scan)
+        self.update_legend()
+
+    def add_plot(self, scan: RgaScan):
+        self.scan_list.append(scan)
+        self.create_curves(scan)
+        self.update_plot(scan)
+
+    def remove_plot(self, scan: RgaScan):
+        if scan not in self.curves:
+            return
+        self.remove_curves(scan)
+        del self.curves[scan]
+        self.scan_list.remove(scan)
+
+    def set_plot_visible(self, scan: RgaScan, visible: bool):
+        for curve in self.curves[scan]:
+            curve.setVisible(visible)
+
+    def set_axis_scale(self, log_mode: bool):
+        self.getPlotItem().setLogMode(y=log_mode)
+
+    def update_plot(self, scan: RgaScan):
+        """Recomputes the trends of a single scan, all masses at once"""
+        trends = scan.mass_trend(self.masses, window=self.window, reducer=self.reducer)
+
+        time_stamps = scan.cycle_time_stamps() / 1000
+        start_time = scan.start_time()
+        if start_time is not None:
+            time_stamps = time_stamps + start_time
+
+        for i, curve in enumerate(self.curves[scan]):
+            valid = np.isfinite(trends[:, i])
+            curve.setData(time_stamps[valid], trends[valid, i])
+
+    def create_curves(self, scan: RgaScan, visible: bool = True):
+        self.curves[scan] = []
+        for i in range(len(self.masses)):
+            pen = pg.mkPen(scan.colour, width=2, style=MASS_PEN_STYLES[i % len(MASS_PEN_STYLES)])
+            curve = self.getPlotItem().plot(pen=pen)
+            curve.setVisible(visible)
+            self.curves[scan].append(curve)
+
+    def remove_curves(self, scan: RgaScan):
+        for curve in self.curves[scan]:
+            self.getPlotItem().removeItem(curve)
+        self.curves[scan] = []
+
+    def update_legend(self):
+        """Lists the line style of every tracked mass, the colours are the ones of the scans"""
+        self.legend.clear()
+        for i, mass in enumerate(self.masses):
+            sample = pg.PlotDataItem(pen=pg.mkPen("#cdd6f4", width=2, style=MASS_PEN_STYLES[i % len(MASS_PEN_STYLES)]))
+            self.legend.addItem(sample, f"m/z {mass:g}")
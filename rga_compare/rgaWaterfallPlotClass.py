@@ -0,0 +1,122 @@
+import pyqtgraph as pg
+import numpy as np
+from PySide6 import QtCore
+from rgaScanClass import RgaScan
+from rgaPlotClass import apply_plot_theme
+from rgaPyramid import CyclePyramid
+
+
+class RGAWaterfallPlot(pg.PlotWidget):
+    """
+    Shows every cycle of a single scan as an image (AMU x cycle) with a log colour scale, to see how the
+    peaks evolve over a long acquisition. The image is fed from a CyclePyramid of the scan so that only about
+    one row per pixel of the view is drawn, full resolution cycles are only read when zoomed in on them. The points
+    in view are min/max decimated to about one column per pixel.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.scan: RgaScan | None = None
+        self.pyramid: CyclePyramid | None = None
+        self.log_floor = None  # Smallest intensity shown, zero and negative intensities are clipped to it
+
+        apply_plot_theme(self)
+        self.getPlotItem().setLabel("left", text="Cycle")
+        self.getPlotItem().setLabel("bottom", text="Mass", units="AMU", siPrefixEnableRanges=((0, 0), (0, 0)))
+
+        colour_map = pg.colormap.get("viridis")
+        self.image = pg.ImageItem(axisOrder="row-major")
+        self.image.setColorMap(colour_map)
+        self.addItem(self.image)
+
+        self.colour_bar = pg.ColorBarItem(colorMap=colour_map, label="log10(Intensity / Torr)", interactive=True)
+        self.colour_bar.setImageItem(self.image, insert_in=self.getPlotItem())
+
+        # Fetches the tile for the new view once panning/zooming settles instead of on every range change
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(30)
+        self.update_timer.timeout.connect(self.update_image)
+        self.getPlotItem().getViewBox().sigRangeChanged.connect(self.update_timer.start)
+        self.getPlotItem().getViewBox().sigResized.connect(self.update_timer.start)
+
+    def set_scan(self, scan: RgaScan | None):
+        """Shows the cycles of a scan, the pyramid is only built once the plot is visible"""
+        self.scan = scan
+        self.pyramid = None
+        if scan is None:
+            self.image.clear()
+        elif self.isVisible():
+            self.build_pyramid()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.scan is not None and self.pyramid is None:
+            self.build_pyramid()
+
+    def build_pyramid(self):
+        scan = self.scan
+        if scan.spectra.size == 0:
+            self.image.clear()
+            return
+
+        self.pyramid = CyclePyramid(scan.spectra, reducer="max")
+
+        # Colour levels from the coarsest level holding a few rows, which covers every cycle
+        overview = next(level for block, level in sorted(self.pyramid.levels.items()) if len(level) <= 64)
+        positive = overview[overview > 0]
+        if len(positive):
+            self.log_floor = float(np.min(positive))
+            levels = np.log10(np.percentile(positive, [1, 99.9]))
+        else:
+            self.log_floor = 1e-14
+            levels = (-14, -13)
+        self.colour_bar.setLevels(tuple(levels))
+
+        x_step = 1 / scan.pointsPerAmu
+        view_box = self.getPlotItem().getViewBox()
+        view_box.setLimits(xMin=scan.startMass - x_step, xMax=scan.stopMass + x_step, yMin=0, yMax=len(scan.spectra))
+        view_box.setRange(xRange=(scan.startMass, scan.stopMass), yRange=(0, len(scan.spectra)), padding=0)
+        self.update_image()
+
+    def scan_changed(self, scan: RgaScan):
+        """Takes in the cycles appended to a followed scan, a view reaching the last cycle keeps following it"""
+        if scan is not self.scan:
+            return
+        if self.pyramid is None:  # No cycles yet, or not shown yet
+            if self.isVisible():
+                self.build_pyramid()
+            return
+        previous_cycles = self.pyramid.number_of_cycles
+        self.pyramid.extend(scan.spectra)
+
+        view_box = self.getPlotItem().getViewBox()
+        view_box.setLimits(yMax=len(scan.spectra))
+        _, (y_min, y_max) = view_box.viewRange()
+        if y_max >= previous_cycles:
+            view_box.setYRange(y_min, len(scan.spectra), padding=0)  # Redrawn through sigRangeChanged
+        else:
+            self.update_image()
+
+    def update_image(self):
+        """Draws the cycles and points in view, decimated to about one row and one column per pixel"""
+        if self.pyramid is None:
+            return
+
+        scan = self.scan
+        view_box = self.getPlotItem().getViewBox()
+        (x_min, x_max), (y_min, y_max) = view_box.viewRange()
+        rows = max(int(view_box.height()), 1)
+        columns = max(int(view_box.width()), 1)
+        first_point = int(np.floor((x_min - scan.startMass) * scan.pointsPerAmu))
+        last_point = int(np.ceil((x_max - scan.startMass) * scan.pointsPerAmu)) + 1
+        tile, first_cycle, block, first_point, point_block = self.pyramid.get_image(int(np.floor(y_min)), int(np.ceil(y_max)), rows, first_point, last_point, columns)
+        if tile.size == 0:
+            return
+
+        x_step = 1 / scan.pointsPerAmu
+        height = min(first_cycle + len(tile) * block, len(scan.spectra)) - first_cycle
+        width = tile.shape[1] * x_step if point_block == 1 else tile.shape[1] // 2 * point_block * x_step
+        self.image.setImage(np.log10(np.maximum(tile, self.log_floor)), autoLevels=False, levels=self.colour_bar.levels())
+        self.image.setRect(QtCore.QRectF(scan.startMass + first_point * x_step - x_step / 2, first_cycle, width, height))
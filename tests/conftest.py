@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of rga_compare are imported by name, as when running main.py from its directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rga_compare"))
@@ -0,0 +1,97 @@
+import glob
+import os
+import numpy as np
+import pytest
+from rgaChunkedScanFileClass import CODECS, ChunkedColumn, is_chunked_scan, lz4, read_chunked_scan, write_chunked_scan
+from rgaScanClass import RgaScan
+
+SAMPLE_SCANS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans", "*.rgadata")))
+SAMPLE_SCAN = SAMPLE_SCANS[0]
+AVAILABLE_CODECS = [codec for codec in CODECS if codec != "lz4" or lz4 is not None]
+
+
+def export(tmp_path, file_path: str, **kwargs) -> tuple[RgaScan, RgaScan]:
+    scan = RgaScan(file_path, lazy=True)
+    chunked_path = str(tmp_path / "scan.rgachunks")
+    write_chunked_scan(scan, chunked_path, **kwargs)
+    return RgaScan(file_path), read_chunked_scan(chunked_path)
+
+
+@pytest.mark.parametrize("file_path", SAMPLE_SCANS, ids=os.path.basename)
+@pytest.mark.parametrize("codec", AVAILABLE_CODECS)
+def test_round_trip(tmp_path, file_path: str, codec: str):
+    expected, scan = export(tmp_path, file_path, codec=codec, chunk_cycles=4, chunk_points=7)
+    assert is_chunked_scan(scan.file_path) and not is_chunked_scan(file_path)
+    assert scan.columns.keys() == expected.columns.keys()
+    for name, values in expected.columns.items():
+        column = scan.columns[name]
+        assert isinstance(column, ChunkedColumn)
+        assert column.shape == values.shape and column.dtype == values.dtype
+        np.testing.assert_array_equal(np.asarray(column), values, err_msg=name)
+    for name in ("f_version", "pointsPerAmu", "startMass", "stopMass", "step_types", "f_identifier"):
+        assert getattr(scan, name) == getattr(expected, name), name
+    np.testing.assert_array_equal(scan.mass_trend([2, 18, 28]), expected.mass_trend([2, 18, 28]))
+    np.testing.assert_array_equal(scan.get_cycle(-1), expected.get_cycle(-1))
+
+
+@pytest.mark.parametrize("chunk_cycles, chunk_points", [(1, 1), (3, 1000), (1000, 5), (512, 64)])
+def test_indexing(tmp_path, chunk_cycles: int, chunk_points: int):
+    expected, scan = export(tmp_path, SAMPLE_SCAN, chunk_cycles=chunk_cycles, chunk_points=chunk_points)
+    spectra, column = expected.spectra, scan.spectra
+    cycles, points = spectra.shape
+    rng = np.random.default_rng(0)
+    cycle_indices = rng.integers(-cycles, cycles, 9)
+    point_indices = rng.integers(0, points, 40)
+    point_mask = rng.random(points) < 0.2
+
+    for key in [
+        5,
+        -1,
+        (3, 17),
+        (-2, -3),
+        slice(None),
+        Ellipsis,
+        (Ellipsis, 120),
+        (slice(2, None, 3), slice(None, None, -5)),
+        (slice(None, None, -1), 400),
+        (cycle_indices,),
+        (slice(1, 10), point_indices),
+        (cycle_indices, 7),
+        (slice(None), point_mask),
+        (np.arange(cycles) % 2 == 0, slice(100, 300)),
+        (np.array([], dtype=int), slice(None)),
+    ]:
+        np.testing.assert_array_equal(column[key], spectra[key], err_msg=str(key))
+
+    # Index arrays on both axes select their outer product, unlike NumPy
+    np.testing.assert_array_equal(column[cycle_indices, point_indices], spectra[np.ix_(cycle_indices, point_indices)])
+
+    assert column[3, 17] == spectra[3, 17]
+    np.testing.assert_array_equal(column * 2, spectra * 2)
+    with pytest.raises(IndexError):
+        column[0, 0, 0]
+    with pytest.raises(IndexError):
+        column[cycles]
+
+    time_stamps = scan.columns["step0_time_stamp"]
+    np.testing.assert_array_equal(time_stamps[cycle_indices], expected.cycle_time_stamps()[cycle_indices])
+    assert time_stamps[-1] == expected.cycle_time_stamps()[-1]
+
+
+def test_reads_only_touched_chunks(tmp_path):
+    expected, scan = export(tmp_path, SAMPLE_SCAN, chunk_cycles=8, chunk_points=16)
+    chunked_file = scan.spectra.chunked_file
+    np.testing.assert_array_equal(scan.spectra[:, 20], expected.spectra[:, 20])
+    assert len(chunked_file.cached_chunks) == -(-len(expected.spectra) // 8)  # One block of points over every block of cycles
+    assert scan.spectra.resident_nbytes() == sum(values.nbytes for values in chunked_file.cached_chunks.values())
+    assert scan.columns["step0_time_stamp"].resident_nbytes() == 0
+
+
+def test_invalid_arguments(tmp_path):
+    scan = RgaScan(SAMPLE_SCAN, lazy=True)
+    for kwargs in ({"codec": "bz2"}, {"chunk_cycles": 0}, {"chunk_points": 0}):
+        with pytest.raises(ValueError):
+            write_chunked_scan(scan, str(tmp_path / "scan.rgachunks"), **kwargs)
+    assert os.listdir(tmp_path) == []  # Nothing left behind
+    with pytest.raises(ValueError):
+        read_chunked_scan(SAMPLE_SCAN)
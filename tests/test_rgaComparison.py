@@ -0,0 +1,82 @@
+import copy
+import os
+import numpy as np
+import pytest
+from rgaComparison import COMPARISON_MODES, ScanComparison, common_grid, compare_spectra
+from rgaScanClass import RgaScan
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans")
+SCAN_100 = os.path.join(SAMPLE_DIR, "2026-06-17 - RGA.rgadata")  # 1 to 100 AMU, 10 points per AMU
+SCAN_120 = os.path.join(SAMPLE_DIR, "2026-06-17 - RGA120.rgadata")  # 1 to 120 AMU
+SCAN_50 = os.path.join(SAMPLE_DIR, "SampleData-CompositeScans-v18.rgadata")  # 1 to 50 AMU
+
+
+def coarser(scan: RgaScan, factor: int) -> RgaScan:
+    """The scan as if it had been measured with factor times fewer points per AMU"""
+    coarse = copy.copy(scan)
+    coarse.pointsPerAmu = scan.pointsPerAmu // factor
+    coarse.spectra = np.ascontiguousarray(scan.spectra[:, ::factor])
+    return coarse
+
+
+def test_compare_spectra():
+    spectrum = np.array([2.0, 1.0, -1.0, np.nan, 4.0])
+    reference = np.array([1.0, 0.0, 2.0, 1.0, 4.0])
+    np.testing.assert_array_equal(compare_spectra(spectrum, reference, "difference"), [1, 1, -3, np.nan, 0])
+    np.testing.assert_array_equal(compare_spectra(spectrum, reference, "ratio"), [2, np.nan, -0.5, np.nan, 1])
+    np.testing.assert_allclose(compare_spectra(spectrum, reference, "log_ratio"), [np.log10(2), np.nan, np.nan, np.nan, 0])
+    assert set(COMPARISON_MODES) == {"difference", "ratio", "log_ratio"}
+    with pytest.raises(ValueError):
+        compare_spectra(spectrum, reference, "sum")
+
+
+def test_resample_onto_common_grid():
+    scan_100, scan_120, scan_50 = RgaScan(SCAN_100), RgaScan(SCAN_120), RgaScan(SCAN_50)
+    comparison = ScanComparison()
+    comparison.set_scans([scan_100, scan_50])
+    np.testing.assert_allclose(comparison.grid, scan_100.amu_axis())
+
+    # Same resolution: the points are kept, NaN past the end of the narrower scan
+    np.testing.assert_array_equal(comparison.resample(scan_100, -1), scan_100.spectra[-1])
+    resampled = comparison.resample(scan_50, 0)
+    np.testing.assert_array_equal(resampled[: scan_50.spectra.shape[1]], scan_50.spectra[0])
+    assert np.isnan(resampled[scan_50.spectra.shape[1] :]).all()
+
+    # A wider scan rebuilds the grid and drops what was resampled on the old one
+    comparison.set_scans([scan_100, scan_50, scan_120])
+    np.testing.assert_allclose(comparison.grid, common_grid([scan_120]))
+    assert not comparison.resampled
+    np.testing.assert_allclose(comparison.resample(scan_100, 0)[: scan_100.spectra.shape[1]], scan_100.spectra[0], rtol=1e-6, atol=1e-20)
+
+    # A coarser scan is interpolated linearly between its points
+    coarse = coarser(scan_100, 2)
+    comparison.set_scans([scan_100, coarse])
+    resampled = comparison.resample(coarse, 3)
+    np.testing.assert_array_equal(resampled[::2][: coarse.spectra.shape[1]], coarse.spectra[3])
+    np.testing.assert_allclose(resampled[1:-1:2][: coarse.spectra.shape[1] - 1], (coarse.spectra[3, :-1] + coarse.spectra[3, 1:]) / 2, rtol=1e-5, atol=1e-12)
+
+
+def test_compare_against_reference():
+    scan_100, scan_50 = RgaScan(SCAN_100), RgaScan(SCAN_50)
+    comparison = ScanComparison()
+    comparison.set_scans([scan_100, scan_50])
+    difference = comparison.compare(scan_50, 1, scan_100, -1, "difference")
+    points = scan_50.spectra.shape[1]
+    np.testing.assert_allclose(difference[:points], scan_50.spectra[1] - scan_100.spectra[-1][:points])
+    assert np.isnan(difference[points:]).all()
+    assert comparison.compare(scan_50, 1, scan_100, -1, "difference") is difference  # Memoized
+
+
+def test_memos_are_bounded_and_forget_scans():
+    scan_100, scan_120 = RgaScan(SCAN_100), RgaScan(SCAN_120)
+    comparison = ScanComparison(max_comparisons=8)
+    comparison.set_scans([scan_100, scan_120])
+    for cycle in range(len(scan_120.spectra)):
+        for mode in COMPARISON_MODES:
+            comparison.compare(scan_120, cycle, scan_100, 0, mode)
+    assert len(comparison.comparisons) == 8 and len(comparison.resampled) == 8
+    assert (scan_120, len(scan_120.spectra) - 1) in comparison.resampled  # The most recently used are kept
+
+    comparison.forget(scan_100)
+    assert not comparison.comparisons
+    assert all(scan is scan_120 for scan, _ in comparison.resampled)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from rgaLibrary import SpectrumLibrary
+
+WATER = """##TITLE=Water
+##JCAMP-DX=4.24
+##DATA TYPE=MASS SPECTRUM
+##CAS REGISTRY NO=7732-18-5
+##XUNITS=M/Z
+##YUNITS=RELATIVE ABUNDANCE
+##PEAK TABLE=(XY..XY)
+16,9 17,212
+18,999
+##END=
+"""
+
+NITROGEN = """##TITLE=Nitrogen
+##CAS REGISTRY NO=7727-37-9
+##PEAK TABLE=(XY..XY)
+14,137 28,999
+##END=
+"""
+
+
+def test_skips_unreadable_files(tmp_path):
+    (tmp_path / "water.jdx").write_text(WATER)
+    (tmp_path / "nitrogen.jdx").write_text(NITROGEN)
+    (tmp_path / "no_table.jdx").write_text("##TITLE=Broken\n##END=\n")
+    (tmp_path / "bad_value.jdx").write_text(NITROGEN.replace("14,137", "14,1e"))
+    missing = str(tmp_path / "missing.jdx")
+
+    library = SpectrumLibrary.from_jcamp_files([str(tmp_path), missing])
+    assert library.names == ["Nitrogen", "Water"]
+    np.testing.assert_allclose(library.patterns[1, [16, 17, 18]], [9 / 999, 212 / 999, 1], rtol=1e-6)
+    skipped = dict(library.skipped_files)
+    assert sorted(skipped) == sorted([str(tmp_path / "bad_value.jdx"), str(tmp_path / "no_table.jdx"), missing])
+    assert skipped[missing].startswith("FileNotFoundError")
+
+
+def test_raises_if_nothing_read(tmp_path):
+    (tmp_path / "no_table.jdx").write_text("##TITLE=Broken\n##END=\n")
+    with pytest.raises(ValueError):
+        SpectrumLibrary.from_jcamp_files([str(tmp_path)])
+
+
+def test_save_and_load(tmp_path):
+    (tmp_path / "water.jdx").write_text(WATER)
+    library = SpectrumLibrary.from_jcamp_files([str(tmp_path)])
+    library.save(str(tmp_path / "library.npz"))
+    loaded = SpectrumLibrary.load(str(tmp_path / "library.npz"))
+    assert loaded.names == library.names and loaded.skipped_files == []
+    np.testing.assert_array_equal(loaded.patterns, library.patterns)
@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pytest
+from rgaPeaks import concatenate_mass_tables, find_peaks
+from rgaScanClass import RgaScan
+
+SAMPLE_SCAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans", "2026-06-17 - RGA.rgadata")
+
+
+def gaussian_spectra(masses: list[float], heights: list[float], start_mass: float, stop_mass: float, points_per_amu: int, noise: float = 1e-12) -> np.ndarray:
+    """Two cycles of peaks 0.3 AMU wide on a flat background with a little noise"""
+    axis = start_mass + np.arange(int(round((stop_mass - start_mass) * points_per_amu)) + 1) / points_per_amu
+    spectrum = 1e-10 + sum(height * np.exp(-0.5 * ((axis - mass) / 0.3) ** 2) for mass, height in zip(masses, heights))
+    return (spectrum + np.random.default_rng(0).normal(0, noise, (2, len(axis)))).astype(np.float32)
+
+
+def test_synthetic_peaks():
+    spectra = gaussian_spectra([18.1, 28.0, 44.2], [2e-8, 5e-8, 1e-8], 1, 60, 10)
+    table = find_peaks(spectra, 1, 10)
+    assert table.nominal_masses[0] == 1 and table.nominal_masses[-1] == 60
+    peaks = table.cycle(1)
+    assert [mass for mass, _, _, _ in peaks] == [18, 28, 44]
+    np.testing.assert_allclose([centroid for _, centroid, _, _ in peaks], [18.1, 28.0, 44.2], atol=0.03)
+    np.testing.assert_allclose([height for _, _, height, _ in peaks], [2e-8, 5e-8, 1e-8], rtol=0.02)
+    # The area of a gaussian is height * sigma * sqrt(2 pi), nearly all of it within 0.5 AMU of the centre
+    np.testing.assert_allclose(table.integrals[1, 27], 5e-8 * 0.3 * np.sqrt(2 * np.pi) * 0.9050, rtol=0.02)
+    np.testing.assert_allclose(table.baselines[1, 9], 1e-10, rtol=0.05)
+
+
+def test_sample_scan_peaks():
+    scan = RgaScan(SAMPLE_SCAN)
+    table = scan.mass_table()
+    assert table.heights.shape == (len(scan.spectra), 100)
+    masses = {mass: (centroid, height) for mass, centroid, height, _ in table.cycle(-1)}
+    assert {2, 18, 28, 32, 44} <= masses.keys()
+    for mass, (centroid, height) in masses.items():
+        assert abs(centroid - mass) <= 0.5
+        assert height > 0
+
+    # The table of a single cycle and of chunks of cycles match the table of the whole scan
+    np.testing.assert_array_equal(scan.cycle_mass_table(5).heights[0], table.heights[5])
+    chunks = concatenate_mass_tables([find_peaks(scan.spectra[start : start + 7], scan.startMass, scan.pointsPerAmu) for start in range(0, len(scan.spectra), 7)])
+    np.testing.assert_array_equal(chunks.heights, table.heights)
+    np.testing.assert_array_equal(table.select(slice(3, 6)).centroids, table.centroids[3:6])
+
+
+@pytest.mark.parametrize("number_of_points", [0, 1, 2, 3, 4])
+@pytest.mark.parametrize("start_mass, points_per_amu", [(1, 1), (1.3, 10)])
+def test_narrow_spectra(number_of_points: int, start_mass: float, points_per_amu: int):
+    """Spectra too narrow for a peak or a baseline window give an empty table rather than an error"""
+    table = find_peaks(np.random.default_rng(0).random((4, number_of_points)), start_mass, points_per_amu)
+    assert table.heights.shape == (4, len(table.nominal_masses))
+    if number_of_points < 3:
+        assert np.isnan(table.heights).all() and np.isnan(table.integrals).all()
+        assert table.cycle(0) == []
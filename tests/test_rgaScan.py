@@ -0,0 +1,74 @@
+import glob
+import json
+import os
+import struct
+import numpy as np
+import pytest
+from rgaScanClass import AUX_SIGNALS_DTYPE, PVST_STEP, SPECTRUM_STEP, RgaScan
+
+SAMPLE_SCANS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans", "*.rgadata")))
+
+
+def reference_columns(file_path: str, step_types: list[str]) -> dict[str, np.ndarray]:
+    """Decodes a .rgadata file value by value with struct.unpack, as RGASoft's sample code does, into the columns of RgaScan"""
+    with open(file_path, "rb") as f:
+        f.read(32)
+        file_version = struct.unpack("<i", f.read(4))[0]
+        f.read(1)
+        metadata_size = struct.unpack("<I", f.read(4))[0]
+        metadata = struct.unpack(f"<{metadata_size}q", f.read(8 * metadata_size))
+        settings_location, data_location, settings_size, _, number_of_cycles = metadata[:5]
+        step_data_sizes = metadata[7 : 7 + metadata[6]]
+        f.seek(settings_location)
+        settings = json.loads(f.read(settings_size)[4:].decode("utf-8"))
+        f.seek(data_location)
+
+        columns = {}
+        for _ in range(number_of_cycles):
+            if file_version > 17:
+                for name, (dtype, _) in AUX_SIGNALS_DTYPE.fields.items():
+                    columns.setdefault(name, []).append(struct.unpack("<" + dtype.char, f.read(4))[0])
+            for step, step_data_size in enumerate(step_data_sizes):
+                columns.setdefault(f"step{step}_time_stamp", []).append(struct.unpack("<q", f.read(8))[0])
+                if step_types[step] == SPECTRUM_STEP:
+                    size = struct.unpack("<I", f.read(4))[0]
+                    columns.setdefault(f"step{step}_signals", []).append(struct.unpack(f"<{size}f", f.read(4 * size)))
+                    f.read(step_data_size - 12 - 4 * size)
+                elif step_types[step] == PVST_STEP:
+                    number_of_gases = len(settings["cfgs"][step]["gases"])
+                    columns.setdefault(f"step{step}_signals", []).append(struct.unpack(f"<{number_of_gases}f", f.read(4 * number_of_gases)))
+                    f.read(step_data_size - 8 - 4 * number_of_gases)
+                else:
+                    f.read(step_data_size - 8)
+    return {name: np.array(values) for name, values in columns.items()}
+
+
+@pytest.mark.parametrize("file_path", SAMPLE_SCANS, ids=os.path.basename)
+def test_eager_and_lazy_decoding(file_path: str):
+    """v17 and v18 files, single and composite (Analog + PvsT) scans, decode like the value by value parser"""
+    scan = RgaScan(file_path)
+    lazy_scan = RgaScan(file_path, lazy=True)
+    expected = reference_columns(file_path, scan.step_types)
+
+    assert scan.columns.keys() == lazy_scan.columns.keys() == expected.keys()
+    for name, values in expected.items():
+        np.testing.assert_array_equal(scan.columns[name], values.astype(scan.columns[name].dtype), err_msg=name)
+        np.testing.assert_array_equal(lazy_scan.columns[name], scan.columns[name], err_msg=name)
+        assert scan.columns[name].flags.c_contiguous
+
+    assert scan.spectra.shape == (len(expected["step0_time_stamp"]), len(scan.amu_axis()))
+    if PVST_STEP in scan.step_types:
+        assert scan.pvst.shape[1] == len(scan.pvst_gases(scan.step_types.index(PVST_STEP)))
+    if scan.f_version > 17:
+        np.testing.assert_array_equal(scan.total_pressures, expected["total_pressure"].astype(np.float32))
+
+
+@pytest.mark.parametrize("file_path", SAMPLE_SCANS, ids=os.path.basename)
+@pytest.mark.parametrize("lazy", [False, True])
+def test_iter_cycles(file_path: str, lazy: bool):
+    scan = RgaScan(file_path, lazy=lazy)
+    batches = list(scan.iter_cycles(start=1, step=2, chunk=3))
+    np.testing.assert_array_equal(np.concatenate([batch.cycles for batch in batches]), np.arange(1, len(scan.spectra), 2))
+    np.testing.assert_array_equal(np.concatenate([batch.spectra for batch in batches]), scan.spectra[1::2])
+    with pytest.raises(ValueError):
+        next(scan.iter_cycles(chunk=0))
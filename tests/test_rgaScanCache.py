@@ -0,0 +1,96 @@
+import glob
+import os
+import shutil
+import numpy as np
+import pytest
+from rgaScanCacheClass import CACHE_EXTENSION, RgaScanCache
+from rgaScanClass import RgaScan, is_memory_mapped
+
+SAMPLE_SCANS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans", "*.rgadata")))
+SAMPLE_SCAN = SAMPLE_SCANS[0]
+
+
+def entries(cache: RgaScanCache) -> list[str]:
+    return sorted(name for name in os.listdir(cache.cache_dir))
+
+
+def assert_same_scan(scan: RgaScan, expected: RgaScan):
+    assert scan.columns.keys() == expected.columns.keys()
+    for name, values in expected.columns.items():
+        assert scan.columns[name].dtype == values.dtype
+        np.testing.assert_array_equal(scan.columns[name], values, err_msg=name)
+    for name in ("f_version", "pointsPerAmu", "startMass", "stopMass", "step_types", "file_path", "f_identifier"):
+        assert getattr(scan, name) == getattr(expected, name), name
+    assert scan.cycle_dtype == expected.cycle_dtype
+
+
+@pytest.mark.parametrize("file_path", SAMPLE_SCANS, ids=os.path.basename)
+def test_round_trip(tmp_path, file_path: str):
+    cache = RgaScanCache(str(tmp_path))
+    expected = RgaScan(file_path)
+    assert_same_scan(cache.load(file_path), expected)
+    assert len(entries(cache)) == 1
+
+    scan = cache.load(file_path)  # From the entry this time
+    assert is_memory_mapped(scan.spectra)
+    assert_same_scan(scan, expected)
+
+
+@pytest.mark.parametrize("cut", ["magic", "header size", "header", "columns", "last byte"])
+def test_damaged_entry_is_a_miss(tmp_path, cut: str):
+    cache = RgaScanCache(str(tmp_path))
+    expected = RgaScan(SAMPLE_SCAN)
+    cache.load(SAMPLE_SCAN)
+    entry_path = cache.entry_path(SAMPLE_SCAN)
+    with open(entry_path, "rb") as f:
+        data = f.read()
+    size = {"magic": 4, "header size": 10, "header": 40, "columns": len(data) // 2, "last byte": len(data) - 1}[cut]
+    os.remove(entry_path)  # Not truncated in place, an entry may still be mapped
+    with open(entry_path, "wb") as f:
+        f.write(data[:size])
+
+    assert cache.read_entry(entry_path) is None
+    assert not os.path.exists(entry_path)
+    with open(entry_path, "wb") as f:
+        f.write(data[:size])
+    assert_same_scan(cache.load(SAMPLE_SCAN), expected)
+    assert os.path.getsize(entry_path) == len(data)
+
+
+def test_stale_entry_is_replaced(tmp_path):
+    scan_path = str(tmp_path / "scan.rgadata")
+    shutil.copyfile(SAMPLE_SCAN, scan_path)
+    cache = RgaScanCache(str(tmp_path / "cache"))
+    cache.load(scan_path)
+    old_entry = cache.entry_path(scan_path)
+
+    with open(scan_path, "ab") as f:  # A partial cycle appended, only the modification time and size change
+        f.write(b"\0" * 16)
+    new_entry = cache.entry_path(scan_path)
+    assert new_entry != old_entry
+    assert_same_scan(cache.load(scan_path), RgaScan(scan_path))
+    assert entries(cache) == [os.path.basename(new_entry)]
+
+
+def test_failed_write_opens_lazy_scan(tmp_path, monkeypatch):
+    cache = RgaScanCache(str(tmp_path))
+    iter_cycles = RgaScan.iter_cycles
+
+    def full_disk(self, *args, **kwargs):
+        batches = iter_cycles(self, *args, **kwargs)
+        yield next(batches)
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(RgaScan, "iter_cycles", full_disk)
+    scan = cache.load(SAMPLE_SCAN)
+    assert scan.lazy
+    np.testing.assert_array_equal(scan.spectra, RgaScan(SAMPLE_SCAN).spectra)
+    assert entries(cache) == []  # No entry and no temporary file left behind
+
+
+def test_eviction(tmp_path):
+    cache = RgaScanCache(str(tmp_path), max_size_bytes=1)
+    for file_path in SAMPLE_SCANS:
+        cache.load(file_path)
+    assert entries(cache) == [os.path.basename(cache.entry_path(SAMPLE_SCANS[-1]))]  # The entry just written is kept
+    assert all(name.endswith(CACHE_EXTENSION) for name in entries(cache))
@@ -0,0 +1,74 @@
+import os
+import shutil
+import pytest
+from rgaScanIndexClass import RgaScanIndex
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans")
+SCAN_100 = "2026-06-17 - RGA.rgadata"  # Last cycle peaks of 1.8e-6 Torr at 18 and 2.1e-6 Torr at 28
+SCAN_120 = "2026-06-17 - RGA120.rgadata"  # Last cycle peaks of 2.1e-7 Torr at 18 and 4.1e-7 Torr at 28
+SCAN_V17 = "SampleData-CompositeScans-v17.rgadata"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Copies of the sample scans in directories whose names are LIKE wildcards of each other"""
+    for directory, file_name in (("run_1", SCAN_100), ("run%1", SCAN_120), ("runx1", SCAN_V17)):
+        os.makedirs(tmp_path / "archive" / directory)
+        shutil.copyfile(os.path.join(SAMPLE_DIR, file_name), tmp_path / "archive" / directory / file_name)
+    index = RgaScanIndex(str(tmp_path / "index.sqlite"))
+    yield tmp_path / "archive", index
+    index.close()
+
+
+def paths(results: list[dict]) -> list[str]:
+    return [os.path.relpath(result["path"], os.path.dirname(os.path.dirname(result["path"]))) for result in results]
+
+
+def test_update_only_reads_changed_files(archive):
+    directory, index = archive
+    assert index.update(str(directory), workers=1) == (3, 0, 0)
+    assert len(index) == 3
+    assert index.update(str(directory), workers=1) == (0, 0, 0)
+
+    with open(directory / "run_1" / SCAN_100, "ab") as f:  # Partial cycle, only the size and modification time change
+        f.write(b"\0" * 8)
+    (directory / "run%1" / SCAN_120).unlink()
+    (directory / "runx1" / "broken.rgadata").write_bytes(b"not a scan")
+    summarized, dropped, failed = index.update(str(directory), workers=1)
+    assert (summarized, dropped, failed) == (2, 1, 1)
+    assert len(index) == 3
+    assert sorted(paths(index.search())) == [os.path.join("run_1", SCAN_100), os.path.join("runx1", SCAN_V17)]  # Not the broken file
+
+
+def test_search(archive):
+    directory, index = archive
+    index.update(str(directory), workers=1)
+
+    results = index.search()
+    assert paths(results) == [os.path.join("run%1", SCAN_120), os.path.join("run_1", SCAN_100), os.path.join("runx1", SCAN_V17)]
+    scan_100 = results[1]
+    assert (scan_100["start_mass"], scan_100["stop_mass"], scan_100["points_per_amu"], scan_100["file_version"]) == (1, 100, 10, 18)
+    assert scan_100["cycles"] == 23 and scan_100["step_types"] == "spectrum"
+    assert scan_100["peaks"][18] == pytest.approx(1.82e-6, rel=0.01)
+
+    assert paths(index.search(stop_mass=120)) == [os.path.join("run%1", SCAN_120)]
+    assert paths(index.search(file_version=17, step_type="pvst")) == [os.path.join("runx1", SCAN_V17)]
+    assert paths(index.search(min_cycles=24)) == [os.path.join("run%1", SCAN_120)]
+    assert paths(index.search(min_peaks={18: 1e-6})) == [os.path.join("run_1", SCAN_100)]
+    assert paths(index.search(min_peaks={18: 1e-7, 28: 3e-7})) == [os.path.join("run%1", SCAN_120), os.path.join("run_1", SCAN_100)]
+    assert index.search(min_peaks={18: 1e-7, 28: 1e-5}) == []
+    assert len(index.search(limit=2)) == 2
+
+
+def test_wildcards_in_paths(archive):
+    """% and _ in a directory or path searched only match themselves"""
+    directory, index = archive
+    index.update(str(directory / "run_1"), workers=1)
+    index.update(str(directory / "run%1"), workers=1)
+    assert len(index) == 2  # Updating one directory doesn't drop the files of another it matches as a pattern
+
+    assert paths(index.search(directory=str(directory / "run_1"))) == [os.path.join("run_1", SCAN_100)]
+    assert paths(index.search(directory=str(directory / "run%1"))) == [os.path.join("run%1", SCAN_120)]
+    assert paths(index.search(path_contains="run_1")) == [os.path.join("run_1", SCAN_100)]
+    assert paths(index.search(path_contains="RUN%1")) == [os.path.join("run%1", SCAN_120)]
+    assert index.search(directory=str(directory / "run")) == []
@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pytest
+from rgaScanClass import RgaScan
+from rgaStatistics import EXACT_QUANTILE_CYCLES, QUANTILE_BINS_PER_DECADE, QUANTILE_LOWEST, SpectrumAggregator
+
+SAMPLE_SCAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_scans", "2026-06-17 - RGA.rgadata")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+BIN_WIDTH = 10 ** (1 / QUANTILE_BINS_PER_DECADE) - 1  # Relative width of a histogram bin
+
+
+def aggregate(spectra: np.ndarray, chunk: int = 512):
+    aggregator = SpectrumAggregator(spectra.shape[1], quantiles=QUANTILES)
+    for start in range(0, len(spectra), chunk):
+        aggregator.add(spectra[start : start + chunk])
+    return aggregator.result(0, len(spectra))
+
+
+def assert_close_to_exact(result, spectra: np.ndarray):
+    """Every estimate must be within a bin of the order statistics np.quantile interpolates between, which can be
+    far apart (e.g. in the tails, or between repeated values), so it isn't compared with np.quantile's interpolation itself
+    """
+    assert not result.exact_quantiles
+    ordered = np.sort(spectra.astype(np.float64), axis=0)
+    for quantile in QUANTILES:
+        rank = quantile * (len(ordered) - 1)
+        lower, upper = ordered[int(np.floor(rank))], ordered[int(np.ceil(rank))]
+        estimate = result.quantiles[quantile]
+        assert np.all(estimate >= lower - BIN_WIDTH * np.abs(lower) - QUANTILE_LOWEST), f"quantile {quantile}"
+        assert np.all(estimate <= upper + BIN_WIDTH * np.abs(upper) + QUANTILE_LOWEST), f"quantile {quantile}"
+        np.testing.assert_allclose(np.median(estimate), np.median(np.quantile(ordered, quantile, axis=0)), rtol=BIN_WIDTH)
+
+
+def test_histogram_quantiles_of_sample_scan():
+    """Cycles of a real scan (about a fifth of its intensities are negative) drawn until past the exact quantile limit"""
+    spectra = np.asarray(RgaScan(SAMPLE_SCAN).spectra)
+    assert (spectra < 0).mean() > 0.1
+    cycles = np.random.default_rng(0).integers(0, len(spectra), 3 * EXACT_QUANTILE_CYCLES)
+    assert_close_to_exact(aggregate(spectra[cycles]), spectra[cycles])
+
+
+@pytest.mark.parametrize("scale", [1e-13, 1e-10, 1e-6])
+def test_histogram_quantiles_around_zero(scale: float):
+    """Noise centred on zero on top of a positive peak, so the quantiles of some points are negative and of others positive"""
+    rng = np.random.default_rng(1)
+    baseline = np.linspace(-2, 4, 200) * scale
+    spectra = (baseline + rng.normal(0, scale, (EXACT_QUANTILE_CYCLES + 500, len(baseline)))).astype(np.float32)
+    assert_close_to_exact(aggregate(spectra), spectra)
+
+
+def test_exact_quantiles_up_to_limit():
+    spectra = np.random.default_rng(2).normal(0, 1e-12, (EXACT_QUANTILE_CYCLES, 50)).astype(np.float32)
+    result = aggregate(spectra)
+    assert result.exact_quantiles
+    np.testing.assert_allclose(result.quantiles[0.5], np.median(spectra, axis=0), rtol=1e-6)